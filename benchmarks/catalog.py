@@ -0,0 +1,98 @@
+"""Compares the candidate catalog with one YAML file per candidate, for writing, loading and lookups.
+
+    python -m benchmarks.catalog --candidates 100000
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from dataclasses import asdict
+
+import yaml
+
+from src.common.catalog import Catalog, CatalogWriter
+from src.common.utility import candidate_key
+from src.onboard.synthetic import DEFAULT_SEED, YAML_DUMPER, SyntheticCorpus
+
+logger = logging.getLogger("benchmarks.catalog")
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def bench_yaml(records: list, directory: str, lookups: list) -> dict:
+    os.makedirs(directory, exist_ok=True)
+
+    def write():
+        for record in records:
+            with open(os.path.join(directory, record["name"].lower().replace(" ", "_") + ".yaml"), 'w') as f:
+                yaml.dump(record, f, Dumper=YAML_DUMPER, indent=2, sort_keys=False)
+
+    def load():
+        loaded = {}
+        for filename in os.listdir(directory):
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                record = yaml.load(f, Loader=YAML_LOADER)
+            loaded[candidate_key(record["name"])] = record
+        return loaded
+
+    write_seconds, _ = _timed(write)
+    load_seconds, loaded = _timed(load)
+    lookup_seconds, _ = _timed(lambda: [loaded[key] for key in lookups])
+    return {"format": "yaml", "write_seconds": write_seconds, "open_seconds": load_seconds,
+            "scan_seconds": load_seconds, "lookup_us": lookup_seconds / len(lookups) * 1e6,
+            "bytes": sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))}
+
+
+def bench_catalog(records: list, path: str, lookups: list) -> dict:
+    def write():
+        with CatalogWriter(path) as writer:
+            for record in records:
+                writer.append(record)
+
+    write_seconds, _ = _timed(write)
+    open_seconds, catalog = _timed(lambda: Catalog(path))
+    with catalog:
+        scan_seconds, count = _timed(lambda: sum(1 for _ in catalog.items()))
+        lookup_seconds, _ = _timed(lambda: [catalog.get(key) for key in lookups])
+    assert count == len({candidate_key(record["name"]) for record in records})
+    return {"format": "catalog", "write_seconds": write_seconds, "open_seconds": open_seconds,
+            "scan_seconds": scan_seconds, "lookup_us": lookup_seconds / len(lookups) * 1e6,
+            "bytes": os.path.getsize(path) + os.path.getsize(path + ".idx")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the candidate catalog against per-candidate YAML files.")
+    parser.add_argument("--candidates", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="JSON file for the results; printed to stdout if omitted.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    records = [asdict(candidate) for candidate in SyntheticCorpus(args.seed).candidates(args.candidates)]
+    keys = [candidate_key(record["name"]) for record in records]
+    lookups = random.Random(args.seed).choices(keys, k=args.lookups)
+    with tempfile.TemporaryDirectory(prefix="hireux-catalog-") as workdir:
+        results = [bench_yaml(records, os.path.join(workdir, "portfolio"), lookups),
+                   bench_catalog(records, os.path.join(workdir, "catalog.jsonl"), lookups)]
+
+    report = {"params": vars(args), "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
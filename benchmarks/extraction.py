@@ -0,0 +1,77 @@
+"""Compares Gemini calls and wall-clock time per candidate across onboarding extraction modes.
+
+Runs OnboardPortfolios over generated portfolio directories against the
+FakeGeminiClient, so no API key or network is needed.
+
+    python -m benchmarks.extraction --candidates 20 --projects 3 --concurrency 4
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.fakes import FakeGeminiClient
+from src.onboard.prepare import EXTRACTION_MODES, OnboardPortfolios
+
+logger = logging.getLogger("benchmarks.extraction")
+
+
+def write_portfolio_dirs(root: str, candidates: int, projects: int) -> None:
+    """Creates one directory per candidate with a resume and project PDFs, named as _collect_files expects."""
+    for i in range(candidates):
+        directory = os.path.join(root, f"candidate{i:05d}")
+        os.makedirs(directory, exist_ok=True)
+        for page in ["resume"] + [f"project{j}" for j in range(projects)]:
+            with open(os.path.join(directory, f"candidate{i:05d}_{page}.pdf"), 'wb') as f:
+                f.write(f"%PDF-1.4 {i} {page}".encode())  # Content only needs to be distinct
+
+
+def bench_mode(mode: str, input_root: str, workdir: str, candidates: int, concurrency: int, latency: float) -> dict:
+    client = FakeGeminiClient(generate_latency=latency)
+    output_dir = os.path.join(workdir, f"output_{mode}")
+    onboarder = OnboardPortfolios(input_root, output_dir, concurrency=concurrency, client=client,
+                                  extraction_mode=mode, batch_poll_interval=latency)
+    started = time.perf_counter()
+    onboarder.create_structured_portfolios()
+    elapsed = time.perf_counter() - started
+    written = len(os.listdir(output_dir))
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "seconds_per_candidate": elapsed / candidates,
+        "portfolios_written": written,
+        "calls": dict(client.calls),
+        "generate_calls_per_candidate": client.calls["models.generate_content"] / candidates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark onboarding extraction modes against a fake Gemini client.")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--projects", type=int, default=3, help="Project PDFs per candidate, besides the resume.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per generate_content call.")
+    parser.add_argument("--modes", default=",".join(EXTRACTION_MODES))
+    parser.add_argument("--output", help="JSON file for the results; printed to stdout if omitted.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    with tempfile.TemporaryDirectory(prefix="hireux-extraction-") as workdir:
+        input_root = os.path.join(workdir, "raw")
+        write_portfolio_dirs(input_root, args.candidates, args.projects)
+        results = [bench_mode(mode, input_root, workdir, args.candidates, args.concurrency, args.latency)
+                   for mode in args.modes.split(",")]
+
+    report = {"params": vars(args), "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.llms import MockLLM
+
+from src.data_classes.candidate import Candidate
+from src.data_classes.project import Project
+from src.data_classes.utility import generate_example
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+EMBED_DIM = 1536  # Same width as text-embedding-3-small, so Chroma does comparable work
+
+
+class HashEmbedding(BaseEmbedding):
+    """Deterministic, offline bag-of-words embedding using signed feature hashing.
+
+    Texts sharing words get similar vectors, so retrieval results are meaningful
+    enough to benchmark, and the same text always embeds to the same vector.
+    """
+
+    dim: int = EMBED_DIM
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashEmbedding"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), "little")
+            vector[digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+
+def fake_llm(max_tokens: int = 256) -> MockLLM:
+    """LLM that answers instantly with max_tokens of filler text."""
+    return MockLLM(max_tokens=max_tokens)
+
+
+def install_fakes(embed_dim: int = EMBED_DIM, max_tokens: int = 256) -> None:
+    """Points the global LlamaIndex Settings at the offline fakes."""
+    Settings.embed_model = HashEmbedding(dim=embed_dim)
+    Settings.llm = fake_llm(max_tokens)
+
+
+class FakeGeminiClient:
+    """Offline stand-in for google.genai.Client covering what the onboarding pipeline uses.
+
+    Uploads, generate_content and batch jobs each take a fixed latency and are
+    counted in `calls`. Responses are schema examples, with one project per
+    attached project document and the name taken from the first file, so the
+    pipeline writes one distinct portfolio per candidate.
+    """
+
+    def __init__(self, upload_latency: float = 0.05, generate_latency: float = 0.5,
+                 per_document_latency: float = 0.1, batch_polls: int = 2):
+        self.upload_latency = upload_latency
+        self.generate_latency = generate_latency
+        self.per_document_latency = per_document_latency
+        self.batch_polls = batch_polls
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._jobs = {}
+        self.files = SimpleNamespace(upload=self._upload)
+        self.models = SimpleNamespace(generate_content=self._generate_content)
+        self.batches = SimpleNamespace(create=self._create_batch, get=self._get_batch)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+
+    def _upload(self, file: str, **kwargs):
+        self._count("files.upload")
+        time.sleep(self.upload_latency)
+        return SimpleNamespace(name=f"files/{next(self._ids)}", uri=f"fake://{os.path.basename(file)}",
+                               mime_type="application/pdf")
+
+    @staticmethod
+    def _respond(prompt: str, documents: List[str], schema: type) -> SimpleNamespace:
+        if schema is Project:
+            return SimpleNamespace(text=json.dumps(generate_example(Project)))
+        data = generate_example(Candidate)
+        if documents:
+            data["name"] = documents[0].split("_")[0]
+        match = re.search(r"(\d+) (?:attached )?documents are project", prompt)
+        data["projects"] = [generate_example(Project) for _ in range(int(match.group(1)) if match else 0)]
+        return SimpleNamespace(text=json.dumps(data))
+
+    def _generate_content(self, model: str, contents: list, config: dict):
+        self._count("models.generate_content")
+        prompt = next(item for item in contents if isinstance(item, str))
+        documents = [item.uri[len("fake://"):] for item in contents if hasattr(item, "uri")]
+        time.sleep(self.generate_latency + self.per_document_latency * max(1, len(documents)))
+        return self._respond(prompt, documents, config["response_schema"])
+
+    def _create_batch(self, model: str, src: list, config: dict = None):
+        self._count("batches.create")
+        responses = []
+        for request in src:
+            parts = request["contents"][0]["parts"]
+            prompt = next(part.text for part in parts if part.text)
+            documents = [part.file_data.file_uri[len("fake://"):] for part in parts if part.file_data]
+            response = self._respond(prompt, documents, request["config"]["response_schema"])
+            responses.append(SimpleNamespace(response=response, error=None))
+        name = f"batches/{next(self._ids)}"
+        self._jobs[name] = [self.batch_polls, responses]
+        return SimpleNamespace(name=name, state="JOB_STATE_PENDING", dest=None)
+
+    def _get_batch(self, name: str):
+        self._count("batches.get")
+        job = self._jobs[name]
+        job[0] -= 1
+        if job[0] > 0:
+            return SimpleNamespace(name=name, state="JOB_STATE_RUNNING", dest=None)
+        return SimpleNamespace(name=name, state="JOB_STATE_SUCCEEDED", dest=SimpleNamespace(inlined_responses=job[1]))
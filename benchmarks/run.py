@@ -0,0 +1,251 @@
+"""Offline benchmarks for ingest, retrieval and end-to-end candidate matching.
+
+Everything runs against a synthetic corpus (src.onboard.synthetic) in a
+throwaway Chroma database, with the deterministic fakes from benchmarks.fakes
+in place of OpenAI, so runs need no network or API key and are comparable
+between commits. Retrieval quality is scored against the corpus's relevance
+labels alongside the latencies.
+
+    python -m benchmarks.run --sizes 10,100,1000 --output benchmarks/results/latest.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.fakes import EMBED_DIM, HashEmbedding, fake_llm, install_fakes
+from src.onboard.synthetic import PORTFOLIO_SUBDIR, JobDescription, SyntheticCorpus, ndcg_at_k, recall_at_k
+
+logger = logging.getLogger("benchmarks")
+
+DEFAULT_SIZES = "10,100,1000"
+DEFAULT_QUERIES = 50
+DEFAULT_SEED = 1234
+RETRIEVAL_MODES = ("chunk", "candidate", "hybrid")
+TOP_K = 3
+PROBE_QUERY = "Product designer for a fintech mobile app, fluent in Figma."
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    ms = np.asarray(samples) * 1000.0
+    return {"n": len(samples), "mean_ms": float(ms.mean()), "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)), "p99_ms": float(np.percentile(ms, 99))}
+
+
+class _FakeThread:
+    """Stands in for the discord thread a response is posted to."""
+
+    id = 0
+
+    def __init__(self):
+        self.sent: List[str] = []
+
+    async def send(self, content: str):
+        self.sent.append(content)
+        return self
+
+    async def edit(self, content: str):
+        return self
+
+    async def create_thread(self, **kwargs):
+        return self
+
+
+class _FakeAuthor:
+    id = 0
+    name = "benchmark"
+
+
+class _FakeMessage:
+    def __init__(self):
+        self.author = _FakeAuthor()
+        self.channel = _FakeThread()
+
+    async def reply(self, content: str):
+        return await self.channel.send(content)
+
+
+def bench_ingest(corpus_dir: str, chroma_path: str, embed_dim: int) -> dict:
+    from src.onboard.ingest import ingest_data
+
+    started = time.perf_counter()
+    counts = ingest_data(incremental=False, input_dir=corpus_dir, chroma_path=chroma_path,
+                         embed_model=HashEmbedding(dim=embed_dim), llm=fake_llm())
+    elapsed = time.perf_counter() - started
+
+    noop_started = time.perf_counter()
+    ingest_data(incremental=True, input_dir=corpus_dir, chroma_path=chroma_path,
+                embed_model=HashEmbedding(dim=embed_dim), llm=fake_llm())
+    noop_elapsed = time.perf_counter() - noop_started
+    return {"seconds": elapsed, "docs_per_s": counts["files"] / elapsed, "chunks_per_s": counts["chunks"] / elapsed,
+            "files": counts["files"], "chunks": counts["chunks"], "incremental_noop_seconds": noop_elapsed}
+
+
+def bench_cold_start(chroma_path: str, embed_dim: int) -> dict:
+    """Loads the index in a fresh interpreter, so import and file-cache effects are included."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--cold-start-probe", chroma_path, "--embed-dim", str(embed_dim)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+async def _cold_start_probe(chroma_path: str, embed_dim: int) -> dict:
+    started = time.perf_counter()
+    from src.bot.agent import build_rag_pipeline
+    from src.bot.vectordb import load_filter_index, load_index, load_sparse_index
+    from src.common.bm25 import BM25_FILENAME
+    from src.common.filter_index import FILTER_INDEX_FILENAME
+    install_fakes(embed_dim)
+    imported = time.perf_counter()
+    index = await load_index(chroma_path)
+    loaded = time.perf_counter()
+    sparse_index = load_sparse_index(os.path.join(chroma_path, BM25_FILENAME))
+    filter_index = load_filter_index(os.path.join(chroma_path, FILTER_INDEX_FILENAME))
+    side_indexes = time.perf_counter()
+    pipeline = build_rag_pipeline(index, similarity_top_k=TOP_K, filter_index=filter_index, sparse_index=sparse_index)
+    pipeline.retrieve(PROBE_QUERY)
+    first_query = time.perf_counter()
+    return {"import_s": imported - started, "load_index_s": loaded - imported,
+            "load_side_indexes_s": side_indexes - loaded, "first_query_s": first_query - side_indexes,
+            "total_s": first_query - started}
+
+
+def _ranked_candidates(nodes) -> List[str]:
+    """Candidate keys in rank order, once each."""
+    ranked = []
+    for node_with_score in nodes:
+        key = node_with_score.node.metadata.get("candidate_key")
+        if key and key not in ranked:
+            ranked.append(key)
+    return ranked
+
+
+async def bench_queries(chroma_path: str, jobs: List[JobDescription]) -> dict:
+    from src.bot.agent import build_rag_pipeline, handle_candidate_request
+    from src.bot.vectordb import load_filter_index, load_index, load_sparse_index
+    from src.common.bm25 import BM25_FILENAME
+    from src.common.filter_index import FILTER_INDEX_FILENAME
+
+    index = await load_index(chroma_path)
+    sparse_index = load_sparse_index(os.path.join(chroma_path, BM25_FILENAME))
+    filter_index = load_filter_index(os.path.join(chroma_path, FILTER_INDEX_FILENAME))
+    pipelines = {
+        "chunk": build_rag_pipeline(index, similarity_top_k=TOP_K, filter_index=filter_index),
+        "candidate": build_rag_pipeline(index, similarity_top_k=TOP_K, retrieval_mode="candidate",
+                                        filter_index=filter_index),
+        "hybrid": build_rag_pipeline(index, similarity_top_k=TOP_K, retrieval_mode="candidate",
+                                     filter_index=filter_index, sparse_index=sparse_index),
+    }
+
+    retrieval = {}
+    for mode in RETRIEVAL_MODES:
+        pipeline = pipelines[mode]
+        if mode == "hybrid" and sparse_index is None:
+            continue
+        pipeline.retrieve(jobs[0].text)  # Warm-up
+        samples, recalls, ndcgs = [], [], []
+        for job in jobs:
+            where = pipeline.where_for(job.text)
+            started = time.perf_counter()
+            nodes = pipeline.retrieve(job.text, None, where)
+            samples.append(time.perf_counter() - started)
+            ranked = _ranked_candidates(nodes)
+            recalls.append(recall_at_k(ranked, job.relevant, TOP_K))
+            ndcgs.append(ndcg_at_k(ranked, job.relevant, TOP_K))
+        retrieval[mode] = percentiles(samples)
+        retrieval[mode].update({f"recall@{TOP_K}": float(np.mean(recalls)), f"ndcg@{TOP_K}": float(np.mean(ndcgs))})
+
+    pipeline = pipelines["hybrid" if sparse_index is not None else "candidate"]
+    samples = []
+    for job in jobs:
+        message = _FakeMessage()
+        started = time.perf_counter()
+        await handle_candidate_request(message, job.text, pipeline)
+        samples.append(time.perf_counter() - started)
+        if not message.channel.sent:
+            raise RuntimeError("handle_candidate_request sent no response")
+    return {"retrieval": retrieval, "end_to_end": percentiles(samples)}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes: List[int], query_count: int, seed: int, embed_dim: int, workdir: str) -> dict:
+    corpus = SyntheticCorpus(seed)
+    results = []
+    for size in sizes:
+        corpus_dir = os.path.join(workdir, f"corpus_{size}")
+        chroma_path = os.path.join(workdir, f"chroma_{size}")
+        logger.warning(f"Benchmarking {size} candidates in {workdir}")
+        _, jobs = corpus.generate(corpus_dir, size, query_count)
+        portfolio_dir = os.path.join(corpus_dir, PORTFOLIO_SUBDIR)
+        result = {"candidates": size, "ingest": bench_ingest(portfolio_dir, chroma_path, embed_dim)}
+        result["cold_start"] = bench_cold_start(chroma_path, embed_dim)
+        result.update(asyncio.run(bench_queries(chroma_path, jobs)))
+        result["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        results.append(result)
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "params": {"sizes": sizes, "queries": query_count, "seed": seed, "embed_dim": embed_dim, "top_k": TOP_K},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ingest, retrieval and end-to-end benchmarks.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated corpus sizes, up to 100000.")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="Job descriptions timed per size.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--embed-dim", type=int, default=EMBED_DIM)
+    parser.add_argument("--output", help="JSON file for the results; printed to stdout if omitted.")
+    parser.add_argument("--workdir", help="Keep the generated corpora and databases here instead of a temp dir.")
+    parser.add_argument("--cold-start-probe", metavar="CHROMA_PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Only warnings; the per-run INFO summaries of ingest and retrieval would bury the report
+    logging.basicConfig(level=logging.WARNING, force=True)
+
+    if args.cold_start_probe:
+        print(json.dumps(asyncio.run(_cold_start_probe(args.cold_start_probe, args.embed_dim))))
+        return
+
+    install_fakes(args.embed_dim)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    if args.workdir:
+        report = run(sizes, args.queries, args.seed, args.embed_dim, args.workdir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="hireux-bench-") as workdir:
+            report = run(sizes, args.queries, args.seed, args.embed_dim, workdir)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+        logger.warning(f"Wrote results to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
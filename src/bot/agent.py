@@ -1,58 +1,107 @@
 import logging
 import asyncio
+import time
+import threading
 import discord
-from llama_index.core import VectorStoreIndex, Settings, get_response_synthesizer, Settings
-from llama_index.core.retrievers import VectorIndexRetriever
+from dataclasses import dataclass
+from typing import AsyncIterator, Collection, Iterator, List, Optional
+from llama_index.core import VectorStoreIndex, Settings, get_response_synthesizer, Settings, QueryBundle
+from llama_index.core.retrievers import BaseRetriever, VectorIndexRetriever
+from llama_index.core.schema import NodeWithScore
 from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.llms.openai import OpenAI
 
-from .chat import send_response_in_thread
+from .chat import send_response_in_thread, stream_response_in_thread
 from .responses import BotResponses
+from .intent import IntentClassifier
+from .answer_cache import AnswerCache
+from .retrievers import CandidateRetriever, HybridRetriever
+from .scheduler import RequestRejected, RequestScheduler, run_blocking
+from .telemetry import record_scores, span
+from src.common.filter_index import FilterIndex
+from src.common.bm25 import BM25Index
+from src.common.embeddings import get_embed_model
 
-# Load settings for LlamaIndex
-Settings.llm = OpenAI(model="gpt-4o")
-Settings.num_output = 512
-Settings.context_window = 3900
-
+logger = logging.getLogger("bot.agent")
 
+def configure_models() -> None:
+    """Points the global LlamaIndex settings at OpenAI; called once at bot startup, not on import."""
+    Settings.llm = OpenAI(model="gpt-4o")
+    # Must match the model used at ingest time; shares its on-disk embedding cache
+    Settings.embed_model = get_embed_model()
+    Settings.num_output = 512
+    Settings.context_window = 3900
 
-logger = logging.getLogger("bot.agent")
+intent_classifier = IntentClassifier()
 
 async def classify_intent(query: str) -> str:
-    """Classifies the intent of the user's query using an LLM."""
-    prompt = f"""
-    You are a helpful assistant that classifies user queries related to job descriptions and candidate matching.
-    Classify the following query into one of the following categories:
+    """Classifies the intent of the user's query, only calling the LLM when cheaper tiers are unsure."""
+    try:
+        return await intent_classifier.classify(query)
+    except Exception as e:
+        logger.error(f"Error during intent classification: {e}")
+        return "Other"  # Default to "Other" on error
 
-    * candidate-request
-    * Other
+CANDIDATE_PROMPT_TEMPLATE = """
+        You are a helpful assistant helping to match UX designers to job descriptions.
 
-    Examples:
+        Here is the job description:
+        {job_description}
 
-    Query: "Find me a UX designer with experience in Figma and user research."
-    Category: candidate-request
+        Based on the provided job description, identify the top 3 UX designer candidates from our database who are the best fit.  For each candidate, provide:
 
-    Query: "Hi there!"
-    Category: Other
+        1.  Candidate name
+        2.  A brief markdown formatted bullet summary (3-4 sentences max) explaining why they are a good match, referencing specific skills and experience from their portfolio. Use one sentence per bullet point.
 
-    Query: "{query}"
-    Category:
-    """
-    try:
-        llm = OpenAI(model="gpt-4o-mini")
-        response = await asyncio.to_thread(llm.complete, prompt)
-        intent = response.text.strip()
-        logger.info(f"Classified intent: {intent} for query: {query}")
+        Be concise and specific.
+        """
 
-        # Validate the intent
-        if intent not in ["candidate-request", "Other"]:
-            logger.warning(f"Unexpected intent received: {intent}.  Defaulting to 'Other'.")
-            return "Other"
-        return intent
+@dataclass
+class RAGPipeline:
+    """Retrieval and synthesis components shared by every candidate request."""
+    index: VectorStoreIndex
+    retriever: BaseRetriever
+    query_engine: RetrieverQueryEngine
+    similarity_top_k: int = 3
+    streaming: bool = False
+    answer_cache: Optional[AnswerCache] = None
+    filter_index: Optional[FilterIndex] = None
 
-    except Exception as e:
-        logger.error(f"Error during intent classification: {e}")
-        return "Other"  # Default to "Other" on error
+    def where_for(self, job_description: str, shortlist: Optional[Collection[str]] = None) -> Optional[dict]:
+        """Chroma where clause restricting the search to the shortlist, or else to the structured pre-filter.
+
+        A shortlist is already small, so the facet pre-filter isn't applied on top
+        of it, where it could rule out every shortlisted candidate.
+        """
+        if shortlist:
+            return {"candidate_key": {"$in": sorted(shortlist)}}
+        if not self.filter_index:
+            return None
+        doc_ids = self.filter_index.candidate_ids(job_description, min_results=self.similarity_top_k)
+        return {"document_id": {"$in": doc_ids}} if doc_ids else None
+
+    def retrieve(self, job_description: str, embedding: Optional[List[float]] = None,
+                 where: Optional[dict] = None) -> List[NodeWithScore]:
+        query_bundle = QueryBundle(job_description, embedding=embedding)
+        if isinstance(self.retriever, CandidateRetriever):
+            return self.retriever.retrieve_candidates(query_bundle, where=where)
+        if where:
+            filtered = VectorIndexRetriever(
+                index=self.index,
+                similarity_top_k=self.similarity_top_k,
+                vector_store_kwargs={"where": where},
+            )
+            return filtered.retrieve(query_bundle)
+        return self.retriever.retrieve(query_bundle)
+
+    def refresh_indexes(self, filter_index: Optional[FilterIndex], sparse_index: Optional[BM25Index]) -> None:
+        """Swaps in indexes rebuilt by an ingest that ran while the bot was up."""
+        self.filter_index = filter_index
+        if sparse_index is not None and isinstance(self.retriever, HybridRetriever):
+            self.retriever.sparse_index = sparse_index
+
+    def synthesize(self, prompt: str, nodes: List[NodeWithScore]):
+        return self.query_engine.synthesize(QueryBundle(prompt), nodes)
 
 def get_short_query_message() -> str:
     return BotResponses.format_with_example(BotResponses.SHORT_DESCRIPTION)
@@ -60,49 +109,175 @@ def get_short_query_message() -> str:
 def get_introductory_message() -> str:
     return BotResponses.INTRODUCTION.message
 
-async def handle_candidate_request(message: discord.Message, query: str, index: VectorStoreIndex):
-    """Handles a candidate request using the RAG pipeline."""
-    try:
-        # Construct a structured prompt (same as before, but now a separate function)
-        job_description = query
-        full_prompt = f"""
-        You are a helpful assistant helping to match UX designers to job descriptions.
+async def _iterate_in_thread(generator: Iterator[str]) -> AsyncIterator[str]:
+    """Drains a blocking generator on a worker thread, yielding its items on the event loop.
 
-        Here is the job description:
-        {job_description}
+    If the consumer stops early (e.g. the request hit its deadline) the worker
+    stops pulling from the generator at the next item instead of running to the end.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    stopped = threading.Event()
 
-        Based on the provided job description, identify the top 3 UX designer candidates from our database who are the best fit.  For each candidate, provide:
+    def pump():
+        try:
+            for item in generator:
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
 
-        1.  Candidate name
-        2.  A brief markdown formatted bullet summary (3-4 sentences max) explaining why they are a good match, referencing specific skills and experience from their portfolio. Use one sentence per bullet point.
+    pump_task = asyncio.ensure_future(run_blocking(pump))
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+    await pump_task
 
-        Be concise and specific.
-        """
+def build_rag_pipeline(index: VectorStoreIndex, similarity_top_k: int = 3, streaming: bool = False,
+                       answer_cache: Optional[AnswerCache] = None, retrieval_mode: str = "chunk",
+                       fetch_k: int = 30, candidate_scoring: str = "max",
+                       filter_index: Optional[FilterIndex] = None, sparse_index: Optional[BM25Index] = None,
+                       chunks_per_candidate: int = 2) -> RAGPipeline:
+    """Builds the retriever, synthesizer and query engine once, at startup.
 
-        # Set up retriever and query engine (same as before)
+    Args:
+        index: Index over the ux_portfolios collection.
+        similarity_top_k: Number of chunks ("chunk" mode) or distinct candidates ("candidate" mode) to return.
+        streaming: Whether the synthesizer streams tokens.
+        answer_cache: Optional cache of answers to repeated job descriptions.
+        retrieval_mode: "chunk" for plain top-k chunks, "candidate" to group over-fetched chunks by candidate.
+        fetch_k: Number of chunks over-fetched in "candidate" mode, and by each search in hybrid retrieval.
+        candidate_scoring: How "candidate" mode scores candidates: "max", "sum" or "mmr".
+        filter_index: Optional structured index used to pre-filter candidates by tools, skills and outcomes.
+        sparse_index: Optional BM25 index; when given, vector and keyword results are fused by reciprocal rank.
+        chunks_per_candidate: Number of supporting chunks per candidate passed to the synthesizer.
+    """
+    if sparse_index is not None:
+        retriever = HybridRetriever(
+            index.vector_store.client,
+            sparse_index,
+            fetch_k=fetch_k,
+            top_n=similarity_top_k,
+            scoring=candidate_scoring,
+            chunks_per_candidate=chunks_per_candidate,
+            group_by_candidate=retrieval_mode == "candidate",
+        )
+    elif retrieval_mode == "candidate":
+        retriever = CandidateRetriever(
+            index.vector_store.client,
+            fetch_k=fetch_k,
+            top_n=similarity_top_k,
+            scoring=candidate_scoring,
+            chunks_per_candidate=chunks_per_candidate,
+        )
+    else:
         retriever = VectorIndexRetriever(
             index=index,
-            similarity_top_k=3,
-        )
-        nodes_with_scores = await asyncio.to_thread(retriever.retrieve, full_prompt)
-        logger.info("Retrieved Nodes:")
-        for node_with_score in nodes_with_scores:
-            logger.info(f"Node Score: {node_with_score.score:.3f}")
-            logger.info(f"Node Text:\n{node_with_score.node.get_content()}")
-            logger.info("---")
-
-        response_synthesizer = get_response_synthesizer()
-        query_engine = RetrieverQueryEngine(
-            retriever=retriever,
-            response_synthesizer=response_synthesizer,
+            similarity_top_k=similarity_top_k,
         )
+    response_synthesizer = get_response_synthesizer(streaming=streaming)
+    query_engine = RetrieverQueryEngine(
+        retriever=retriever,
+        response_synthesizer=response_synthesizer,
+    )
+    return RAGPipeline(index=index, retriever=retriever, query_engine=query_engine,
+                       similarity_top_k=similarity_top_k, streaming=streaming,
+                       answer_cache=answer_cache, filter_index=filter_index)
+
+async def handle_candidate_request(message: discord.Message, query: str, pipeline: RAGPipeline,
+                                   shortlist: Optional[Collection[str]] = None):
+    """Handles a candidate request using the RAG pipeline, ranking only the shortlisted candidates if given."""
+    started_at = time.monotonic()
+    try:
+        job_description = query
+        full_prompt = CANDIDATE_PROMPT_TEMPLATE.format(job_description=job_description)
+
+        # Serve repeated or near-duplicate job descriptions from the answer cache
+        query_embedding = None
+        cache = pipeline.answer_cache
+        scope = ",".join(sorted(shortlist)) if shortlist else ""
+        if cache:
+            with span("answer_cache") as cache_span:
+                cached_response = cache.get_exact(job_description, scope)
+                if cached_response is None:
+                    with span("embed_query"):
+                        query_embedding = await run_blocking(Settings.embed_model.get_query_embedding,
+                                                             job_description)
+                    cached_response = cache.get_similar(query_embedding, scope)
+                cache_span.set("hit", cached_response is not None)
+            if cached_response is not None:
+                with span("deliver"):
+                    await send_response_in_thread(message, cached_response)
+                return
+
+        # Retrieve once, embedding only the job description rather than the instructions around it
+        # Only shortlisted candidates, or those passing the hard filters found in the job description, are scored
+        with span("retrieve") as retrieve_span:
+            where = pipeline.where_for(job_description, shortlist)
+            nodes_with_scores = await run_blocking(pipeline.retrieve, job_description, query_embedding, where)
+            retrieve_span.set("nodes", len(nodes_with_scores))
+            retrieve_span.set("filtered", where is not None)
+            record_scores(node_with_score.score for node_with_score in nodes_with_scores)
+        if shortlist and not nodes_with_scores:
+            await send_response_in_thread(message, "None of your shortlisted candidates' portfolios are indexed yet. "
+                                                   "Please try again once onboarding has finished.")
+            return
+        logger.info(f"Retrieved {len(nodes_with_scores)} nodes, scores: "
+                    f"{', '.join(f'{n.score:.3f}' for n in nodes_with_scores if n.score is not None)}")
+        if logger.isEnabledFor(logging.DEBUG):  # Node texts are long; don't build them unless they'll be logged
+            for node_with_score in nodes_with_scores:
+                logger.debug(f"Node {node_with_score.node.node_id} ({node_with_score.score or 0:.3f}):\n"
+                             f"{node_with_score.node.get_content()}")
 
-        RAG_response = await asyncio.to_thread(query_engine.query, full_prompt)
+        # Synthesize from the same nodes instead of letting the engine search again
+        with span("synthesize"):
+            RAG_response = await run_blocking(pipeline.synthesize, full_prompt, nodes_with_scores)
 
-        # Thread handling (same as before, but using a helper function)
-        await send_response_in_thread(message, str(RAG_response))
+        # When streaming, generation happens while delivering, so its tokens are counted here
+        with span("deliver", streaming=pipeline.streaming):
+            if pipeline.streaming:
+                response_text = await stream_response_in_thread(
+                    message, _iterate_in_thread(RAG_response.response_gen), started_at
+                )
+            else:
+                # Thread handling (same as before, but using a helper function)
+                response_text = str(RAG_response)
+                await send_response_in_thread(message, response_text)
+
+        if cache and response_text:
+            cache.put(job_description, query_embedding, response_text, scope)
 
     except Exception as e:
         await message.channel.send(f"An error occurred: {e}")
         logger.exception(f"Error during RAG processing: {e}")
 
+async def schedule_candidate_request(message: discord.Message, query: str, pipeline: RAGPipeline,
+                                     scheduler: RequestScheduler, shortlist: Optional[Collection[str]] = None):
+    """Runs handle_candidate_request under the scheduler's admission control and deadline."""
+    async def notify_queued(position: int):
+        await message.reply(f"⏳ Queued, position {position}. I'll answer as soon as a slot frees up.")
+
+    try:
+        with span("candidate_request"):  # Includes any time spent queued
+            await scheduler.run(
+                message.author.id,
+                lambda: handle_candidate_request(message, query, pipeline, shortlist),
+                on_queued=notify_queued,
+            )
+    except RequestRejected as e:
+        await message.reply(f"**⚠️** {e}")
+    except asyncio.TimeoutError:
+        await message.reply("**⚠️** Sorry, that took too long and was cancelled. Please try again.")
+    finally:
+        logger.info(f"Scheduler metrics: {scheduler.metrics()}")
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger("bot.answer_cache")
+
+ANSWER_CACHE_SIZE = 256
+ANSWER_CACHE_TTL = 3600.0  # Seconds
+ANSWER_CACHE_SIMILARITY = 0.97  # Cosine similarity above which two job descriptions share an answer
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+@dataclass
+class CachedAnswer:
+    response: str
+    embedding: Optional[np.ndarray]  # Unit-normalized
+    created_at: float
+    scope: str = ""  # Shortlist the answer was restricted to, if any
+
+
+class AnswerCache:
+    """Cache of RAG answers keyed by job description.
+
+    Lookups try an exact match on the normalized text first, then the most similar
+    cached job description by embedding. Entries expire after ttl seconds and the
+    least recently used entry is evicted once max_entries is reached. Answers
+    scoped to a candidate shortlist only match requests with the same shortlist. The whole
+    cache is dropped whenever the ingest version stamp changes, i.e. whenever the
+    ux_portfolios collection has been re-ingested.
+    """
+
+    def __init__(self, version_path: str, max_entries: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL,
+                 similarity_threshold: float = ANSWER_CACHE_SIMILARITY):
+        self.version_path = version_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._version = self._read_version()
+        self.hits = 0
+        self.misses = 0
+
+    def _read_version(self) -> Optional[int]:
+        try:
+            return os.stat(self.version_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _check_version(self) -> None:
+        version = self._read_version()
+        if version != self._version:
+            if self._entries:
+                logger.info(f"Collection re-ingested; dropping {len(self._entries)} cached answers")
+            self._entries.clear()
+            self._version = version
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        for key in [key for key, entry in self._entries.items() if entry.created_at < cutoff]:
+            del self._entries[key]
+
+    @staticmethod
+    def key(text: str, scope: str = "") -> str:
+        return hashlib.sha256(f"{scope}\0{_normalize(text)}".encode('utf-8')).hexdigest()
+
+    def get_exact(self, text: str, scope: str = "") -> Optional[str]:
+        """Returns the cached answer for exactly this job description (modulo case and whitespace)."""
+        self._check_version()
+        self._expire()
+        key = self.key(text, scope)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        logger.info("Answer cache hit (exact)")
+        return entry.response
+
+    def get_similar(self, embedding: List[float], scope: str = "") -> Optional[str]:
+        """Returns the answer for the most similar cached job description above the threshold."""
+        self._check_version()
+        self._expire()
+        keys = [key for key, entry in self._entries.items() if entry.embedding is not None and entry.scope == scope]
+        if not keys:
+            self.misses += 1
+            return None
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        similarities = np.stack([self._entries[key].embedding for key in keys]) @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(keys[best])
+        self.hits += 1
+        logger.info(f"Answer cache hit (similarity {similarities[best]:.3f})")
+        return self._entries[keys[best]].response
+
+    def put(self, text: str, embedding: Optional[List[float]], response: str, scope: str = "") -> None:
+        self._check_version()
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1.0
+        key = self.key(text, scope)
+        self._entries[key] = CachedAnswer(response=response, embedding=vector, created_at=time.monotonic(),
+                                          scope=scope)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,25 +1,56 @@
 import discord
 import logging
+import time
+from typing import AsyncIterator, List, Optional
+
+from .telemetry import span
+from src.common.utility import preview
 
 logger = logging.getLogger("bot.chat")
 
 MAX_MSG_LEN = 2000 # Max length of a message in Discord
 MSG_PREVIEW_LEN = 100 # How much of the message to show in a preview
+STREAM_EDIT_INTERVAL = 1.0 # Minimum seconds between edits of a streaming message (Discord rate-limits edits)
+STREAM_PLACEHOLDER = "✍️ Thinking..."
+
+def split_message(text: str, limit: int = MAX_MSG_LEN) -> List[str]:
+    """Splits text into Discord-sized chunks, preferring line then word boundaries."""
+    chunks = []
+    while len(text) > limit:
+        head, text = _split_at_boundary(text, limit)
+        chunks.append(head)
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+def _split_at_boundary(text: str, limit: int = MAX_MSG_LEN):
+    """Returns (head, rest) with len(head) <= limit, cutting at a newline or space when possible."""
+    cut = text.rfind("\n", 0, limit + 1)
+    if cut <= 0:
+        cut = text.rfind(" ", 0, limit + 1)
+    if cut <= 0:
+        cut = limit
+    return text[:cut], text[cut:].lstrip("\n")
+
+async def _get_response_channel(message: discord.Message):
+    """Returns the thread to respond in, creating one off the message if needed."""
+    if isinstance(message.channel, discord.Thread):
+        return message.channel
+    with span("create_thread"):
+        return await message.channel.create_thread(
+            name=f"RAG Response to {message.author.name}",
+            reason="Responding to RAG query",
+            type=discord.ChannelType.public_thread
+        )
 
 async def send_response_in_thread(message: discord.Message, response_text: str):
     """Sends the response in a thread, handling thread creation and errors."""
     try:
-        if isinstance(message.channel, discord.Thread):
-            await message.channel.send(response_text)
-            logger.info(f"Sent response to existing thread: {response_text}")
-        else:
-            thread = await message.channel.create_thread(
-                name=f"RAG Response to {message.author.name}",
-                reason="Responding to RAG query",
-                type=discord.ChannelType.public_thread
-            )
-            await thread.send(response_text)
-            logger.info(f"Created thread and sent response: {response_text}")
+        channel = await _get_response_channel(message)
+        for chunk in split_message(response_text):
+            await channel.send(chunk)
+        logger.info(f"Sent response to thread {channel.id}: {preview(response_text)}")
+        logger.debug(f"Full response sent to thread {channel.id}: {response_text}")
     except discord.errors.Forbidden as e:
         await message.channel.send(
             "I don't have permission to create threads or send messages in threads in this channel.  "
@@ -29,3 +60,71 @@ async def send_response_in_thread(message: discord.Message, response_text: str):
     except Exception as e:
         await message.channel.send(f"An error occurred creating the thread: {e}")
         logger.exception(f"Error creating thread: {e}")
+
+async def stream_response_in_thread(message: discord.Message, tokens: AsyncIterator[str],
+                                    started_at: Optional[float] = None) -> Optional[str]:
+    """Streams a response into a thread by editing a placeholder message as tokens arrive.
+
+    Edits are throttled to STREAM_EDIT_INTERVAL, and the text rolls over into a new
+    message whenever it would exceed MAX_MSG_LEN.
+
+    Args:
+        message: The message being answered.
+        tokens: Async iterator of response text fragments.
+        started_at: time.monotonic() at which the request started, used to log time to first visible token.
+
+    Returns:
+        The full response text, or None if it couldn't be delivered.
+    """
+    started_at = started_at if started_at is not None else time.monotonic()
+    parts = []
+    try:
+        channel = await _get_response_channel(message)
+        current = await channel.send(STREAM_PLACEHOLDER)
+        buffer = ""  # Text belonging to the current Discord message
+        shown = ""
+        last_edit = 0.0
+        first_visible = False
+        rolled_over = False
+
+        async for token in tokens:
+            parts.append(token)
+            buffer += token
+            while len(buffer) > MAX_MSG_LEN:
+                head, buffer = _split_at_boundary(buffer)
+                await current.edit(content=head)
+                current = await channel.send(STREAM_PLACEHOLDER)
+                shown = ""
+                rolled_over = True
+            now = time.monotonic()
+            if buffer.strip() and buffer != shown and now - last_edit >= STREAM_EDIT_INTERVAL:
+                await current.edit(content=buffer)
+                shown, last_edit = buffer, now
+                if not first_visible:
+                    first_visible = True
+                    logger.info(f"Time to first visible token: {now - started_at:.2f}s")
+
+        if buffer.strip():
+            if buffer != shown:
+                await current.edit(content=buffer)
+            if not first_visible:
+                logger.info(f"Time to first visible token: {time.monotonic() - started_at:.2f}s")
+        elif rolled_over:
+            await current.delete()  # Nothing followed the last rollover; drop its placeholder
+        else:
+            await current.edit(content="_(empty response)_")
+        response_text = "".join(parts)
+        logger.info(f"Streamed response to thread {channel.id} in {time.monotonic() - started_at:.2f}s: "
+                    f"{preview(response_text)}")
+        logger.debug(f"Full response streamed to thread {channel.id}: {response_text}")
+        return response_text
+    except discord.errors.Forbidden as e:
+        await message.channel.send(
+            "I don't have permission to create threads or send messages in threads in this channel.  "
+            "Please grant me the 'Create Public Threads' and 'Send Messages in Threads' permissions."
+        )
+        logger.error(f"Permission error creating thread: {e}")
+    except Exception as e:
+        await message.channel.send(f"An error occurred while streaming the response: {e}")
+        logger.exception(f"Error streaming response: {e}")
+    return None
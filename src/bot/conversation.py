@@ -1,7 +1,22 @@
 from enum import Enum
-from dataclasses import dataclass
-from typing import Dict, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 import asyncio
+import heapq
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from .scheduler import run_blocking
+
+logger = logging.getLogger("bot.conversation")
+
+SWEEP_INTERVAL = 30.0  # Seconds between expiry sweeps and write-behind flushes
+# Inactivity timeout of a conversation once it holds a shortlist, so follow-up questions stay scoped to
+# those candidates however long onboarding takes
+SHORTLIST_TIMEOUT = 7 * 24 * 3600.0
 
 class WorkflowState(Enum):
     AWAITING_START_CONFIRMATION = "awaiting_start_confirmation"
@@ -16,10 +31,75 @@ class Conversation:
     user_id: int
     state: WorkflowState
     timeout: float = 300.0  # 5 minutes default timeout
+    last_active: float = field(default_factory=time.time)  # Wall clock, so expiry survives restarts
+    candidates: Dict[str, str] = field(default_factory=dict)  # Name key -> portfolio URL
+
+    @property
+    def expires_at(self) -> float:
+        return self.last_active + self.timeout
+
+class ConversationStore:
+    """SQLite table of conversations, so they survive bot restarts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "thread_id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, state TEXT NOT NULL, "
+            "timeout REAL NOT NULL, last_active REAL NOT NULL, candidates TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, now: float) -> List[Conversation]:
+        """Returns the conversations that have not expired by now."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, user_id, state, timeout, last_active, candidates FROM conversations "
+                "WHERE last_active + timeout > ?", (now,)
+            ).fetchall()
+        return [Conversation(thread_id=thread_id, user_id=user_id, state=WorkflowState(state), timeout=timeout,
+                             last_active=last_active, candidates=json.loads(candidates))
+                for thread_id, user_id, state, timeout, last_active, candidates in rows]
+
+    def write(self, rows: List[Tuple], deleted: Iterable[int]) -> None:
+        """Upserts rows (as produced by ConversationManager) and deletes the given thread ids in one transaction."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO conversations "
+                "(thread_id, user_id, state, timeout, last_active, candidates) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.executemany("DELETE FROM conversations WHERE thread_id = ?",
+                                   [(thread_id,) for thread_id in deleted])
+            self._conn.commit()
 
 class ConversationManager:
-    def __init__(self):
+    """Active conversations by thread id, expiring timeout seconds after their last activity.
+
+    Lookups are a dict access. Expiry is handled by one periodic sweeper over a
+    min-heap of (expires_at, thread_id); entries are not updated on activity, so
+    a popped entry whose conversation has since been touched is simply re-pushed.
+    With a store, changes are written behind in batches on each sweep.
+    """
+
+    def __init__(self, store: Optional[ConversationStore] = None, sweep_interval: float = SWEEP_INTERVAL):
         self.active_conversations: Dict[int, Conversation] = {}  # thread_id -> Conversation
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self._expiry_heap: List[Tuple[float, int]] = []
+        self._dirty: Set[int] = set()
+        self._deleted: Set[int] = set()
+        self._sweeper: Optional[asyncio.Task] = None
+        if store:
+            for conversation in store.load(time.time()):
+                self._add(conversation)
+            logger.info(f"Restored {len(self.active_conversations)} conversations from {store.path}")
+
+    def _add(self, conversation: Conversation) -> None:
+        self.active_conversations[conversation.thread_id] = conversation
+        heapq.heappush(self._expiry_heap, (conversation.expires_at, conversation.thread_id))
 
     def start_conversation(self, thread_id: int, user_id: int) -> Conversation:
         conversation = Conversation(
@@ -27,12 +107,82 @@ class ConversationManager:
             user_id=user_id,
             state=WorkflowState.AWAITING_START_CONFIRMATION
         )
-        self.active_conversations[thread_id] = conversation
+        self._add(conversation)
+        if self.store:
+            self._deleted.discard(thread_id)
+            self._dirty.add(thread_id)
         return conversation
 
     def get_conversation(self, thread_id: int) -> Optional[Conversation]:
-        return self.active_conversations.get(thread_id)
+        """Returns the conversation and marks it active, or None if there is none or it has expired."""
+        conversation = self.active_conversations.get(thread_id)
+        if conversation is None:
+            return None
+        now = time.time()
+        if conversation.expires_at <= now:
+            self.end_conversation(thread_id)
+            return None
+        conversation.last_active = now
+        if self.store:
+            self._dirty.add(thread_id)  # Callers mutate the returned conversation; it is saved on the next flush
+        return conversation
 
     def end_conversation(self, thread_id: int):
         if thread_id in self.active_conversations:
-            del self.active_conversations[thread_id] 
\ No newline at end of file
+            del self.active_conversations[thread_id]
+            if self.store:  # Without a store nothing drains these sets
+                self._dirty.discard(thread_id)
+                self._deleted.add(thread_id)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Ends every conversation that has expired by now. Returns how many were ended."""
+        now = time.time() if now is None else now
+        expired = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, thread_id = heapq.heappop(self._expiry_heap)
+            conversation = self.active_conversations.get(thread_id)
+            if conversation is None:
+                continue  # Already ended
+            if conversation.expires_at > now:
+                heapq.heappush(self._expiry_heap, (conversation.expires_at, thread_id))
+                continue
+            self.end_conversation(thread_id)
+            expired += 1
+        if expired:
+            logger.info(f"Expired {expired} conversations; {len(self.active_conversations)} active")
+        return expired
+
+    def _take_pending(self) -> Tuple[List[Tuple], Set[int]]:
+        rows = []
+        for thread_id in self._dirty:
+            c = self.active_conversations.get(thread_id)
+            if c is not None:
+                rows.append((c.thread_id, c.user_id, c.state.value, c.timeout, c.last_active,
+                             json.dumps(c.candidates)))
+        deleted = self._deleted
+        self._dirty, self._deleted = set(), set()
+        return rows, deleted
+
+    def flush(self) -> None:
+        """Writes pending changes to the store synchronously, e.g. at shutdown."""
+        if self.store:
+            rows, deleted = self._take_pending()
+            if rows or deleted:
+                self.store.write(rows, deleted)
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+                if self.store:
+                    rows, deleted = self._take_pending()  # Snapshot on the event loop, write on a worker
+                    if rows or deleted:
+                        await run_blocking(self.store.write, rows, deleted)
+            except Exception as e:
+                logger.error(f"Error sweeping conversations: {e}")
+
+    def start_sweeper(self) -> None:
+        """Starts the periodic sweeper on the running event loop, if it isn't running already."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever())
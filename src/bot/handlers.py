@@ -1,14 +1,27 @@
 import logging
-import os
-from discord import Message
-from .conversation import WorkflowState
+import io
+import itertools
+from typing import Dict, Iterable, List, Optional, Tuple
+from discord import Attachment, Message
+from .conversation import SHORTLIST_TIMEOUT, WorkflowState
 from .responses import BotResponses
 from . import chat
-from src.common.utility import process_pdf
+from .onboarding import ShortlistOnboarder
+from src.common.utility import candidate_key, process_pdf, PDF_MAX_BYTES
 import csv
 
 logger = logging.getLogger("bot.handlers")
 
+MAX_CSV_BYTES = 1024 * 1024  # Candidate lists are a name and a URL per row; 1 MiB is tens of thousands of rows
+MAX_CANDIDATE_ROWS = 500
+
+def _too_large(attachment: Attachment, max_bytes: int) -> bool:
+    """Checks the size Discord reports for an attachment, before downloading it."""
+    if attachment.size > max_bytes:
+        logger.warning(f"Rejected {attachment.filename}: {attachment.size} bytes exceeds {max_bytes}")
+        return True
+    return False
+
 async def handle_start_confirmation(message: Message, conversation, conversation_manager) -> None:
     """Handle the start confirmation state."""
     response_lower = message.content.lower().strip()
@@ -27,11 +40,12 @@ async def handle_job_description(message: Message, conversation) -> None:
     # Check for PDF attachment
     if message.attachments and message.attachments[0].filename.lower().endswith('.pdf'):
         attachment = message.attachments[0]
+        if _too_large(attachment, PDF_MAX_BYTES):
+            await message.reply(f"**⚠️ Error:** That PDF is too large. Please upload one under "
+                                f"{PDF_MAX_BYTES // (1024 * 1024)} MB or paste the job description as text.")
+            return
         try:
-            await attachment.save(f"temp_{message.id}.pdf")
-            job_description = await process_pdf(f"temp_{message.id}.pdf")
-            os.remove(f"temp_{message.id}.pdf")
-            logger.info(f"Removed temp file: temp_{message.id}.pdf")
+            job_description = await process_pdf(await attachment.read())
             
             if not job_description:
                 await message.reply(BotResponses.PDF_PROCESSING_ERROR.message)
@@ -59,44 +73,36 @@ async def handle_job_description(message: Message, conversation) -> None:
     conversation.state = WorkflowState.AWAITING_CANDIDATE_LIST
     await message.reply(BotResponses.format_with_example(BotResponses.CANDIDATE_LIST_REQUEST))
 
-async def handle_candidate_list(message: Message, conversation) -> None:
-    """Handle the candidate list state."""
+async def handle_candidate_list(message: Message, conversation, onboarder: Optional[ShortlistOnboarder] = None) -> None:
+    """Handle the candidate list state, onboarding the candidates' portfolios in the background if an onboarder is given."""
     if not message.attachments or not message.attachments[0].filename.lower().endswith('.csv'):
         await message.reply("**⚠️ Error:** Please upload a CSV file with two columns: candidate names and URLs.")
         return
     
+    attachment = message.attachments[0]
+    if _too_large(attachment, MAX_CSV_BYTES):
+        await message.reply(f"**⚠️ Error:** That CSV is too large. Please upload one under "
+                            f"{MAX_CSV_BYTES // 1024} KB.")
+        return
+
     try:
-        attachment = message.attachments[0]
-        await attachment.save(f"temp_{message.id}.csv")
-        
-        candidates = {}
-        errors = []
-        
-        with open(f"temp_{message.id}.csv", 'r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            first_row = next(reader, None)
-            
-            # Process CSV data
-            is_header = _check_if_header(first_row)
-            rows = [first_row] if not is_header else []
-            rows.extend(reader)
-            
-            candidates, errors = _process_csv_rows(rows)
-        
-        # Clean up temp file
-        os.remove(f"temp_{message.id}.csv")
+        data = await attachment.read()
+        # Decode and validate row by row straight from the downloaded bytes
+        with io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline='') as file:
+            candidates, errors = _process_csv_rows(csv.reader(file))
         
         await _send_candidate_processing_response(message, candidates, errors)
         
         if candidates:
             conversation.candidates = candidates
             conversation.state = WorkflowState.COMPLETED
+            conversation.timeout = SHORTLIST_TIMEOUT
+            if onboarder:
+                onboarder.start(message, candidates)
             
     except Exception as e:
         logger.error(f"Error processing CSV: {e}")
         await message.reply("An error occurred while processing the CSV file. Please ensure the file is properly formatted.")
-        if os.path.exists(f"temp_{message.id}.csv"):
-            os.remove(f"temp_{message.id}.csv")
 
 def _check_if_header(first_row) -> bool:
     """Check if the first row is a header."""
@@ -105,12 +111,25 @@ def _check_if_header(first_row) -> bool:
         return not url.startswith(('http://', 'https://', 'www.'))
     return True
 
-def _process_csv_rows(rows):
-    """Process CSV rows and return candidates and errors."""
+def _process_csv_rows(rows: Iterable[List[str]]) -> Tuple[Dict[str, str], List[str]]:
+    """Validate CSV rows one at a time, skipping a leading header row.
+
+    Returns:
+        Candidates keyed by standardized name, and the errors found.
+    """
     candidates = {}
     errors = []
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is not None and not _check_if_header(first_row):
+        rows = itertools.chain([first_row], rows)
     
     for row_num, row in enumerate(rows, start=1):
+        if row_num > MAX_CANDIDATE_ROWS:
+            errors.append(f"Only the first {MAX_CANDIDATE_ROWS} rows were processed")
+            break
+        if not any(cell.strip() for cell in row):
+            continue  # Blank line
         if len(row) != 2:
             errors.append(f"Row {row_num}: Expected 2 columns, found {len(row)}")
             continue
@@ -126,7 +145,7 @@ def _process_csv_rows(rows):
             continue
         
         # Create standardized name key
-        key = ''.join(word.capitalize() for word in name_parts)
+        key = candidate_key(name)
         
         # Validate URL
         if not url.startswith(('http://', 'https://', 'www.')):
@@ -0,0 +1,186 @@
+import logging
+import math
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from llama_index.core import Settings
+from llama_index.llms.openai import OpenAI
+
+from .scheduler import run_blocking
+from src.common.utility import preview
+
+logger = logging.getLogger("bot.intent")
+
+CANDIDATE_REQUEST = "candidate-request"
+OTHER = "Other"
+INTENTS = (CANDIDATE_REQUEST, OTHER)
+
+INTENT_CACHE_SIZE = 1024
+CENTROID_MIN_MARGIN = 0.05  # Minimum cosine-similarity lead over the runner-up before trusting the centroids
+MIN_REQUEST_WORDS = 4  # Anything shorter is a greeting, a command or small talk
+
+GREETING_PATTERN = re.compile(
+    r"^(hi|hii+|hello|hey|heya|yo|sup|thanks|thank you|thx|ty|good (morning|afternoon|evening)|"
+    r"bye|goodbye|cheers|ok|okay|cool|great|nice)\b"
+)
+HIRING_KEYWORDS = (
+    "designer", "ux", "ui", "candidate", "hire", "hiring", "looking for", "seeking", "need someone",
+    "experience", "portfolio", "figma", "sketch", "adobe xd", "user research", "usability", "wireframe",
+    "prototype", "journey map", "job description", "responsibilities", "requirements", "years", "position",
+)
+MIN_KEYWORD_HITS = 2
+_KEYWORD_PATTERNS = [re.compile(rf"\b{re.escape(keyword)}s?\b") for keyword in HIRING_KEYWORDS]
+
+# Labelled examples used to build the nearest-centroid classifier
+LABELLED_EXAMPLES: List[Tuple[str, str]] = [
+    ("Find me a UX designer with experience in Figma and user research.", CANDIDATE_REQUEST),
+    ("We need a senior product designer who has shipped mobile apps for iOS and Android.", CANDIDATE_REQUEST),
+    ("Looking for someone who can run usability tests and build prototypes in Sketch.", CANDIDATE_REQUEST),
+    ("Who has done journey mapping and wireframes for an e-commerce checkout flow?", CANDIDATE_REQUEST),
+    ("Senior UX Designer, 5+ years, strong portfolio in fintech, accessibility experience required.", CANDIDATE_REQUEST),
+    ("Can you recommend designers with a background in healthcare web apps?", CANDIDATE_REQUEST),
+    ("Job description: lead the redesign of our SaaS dashboard, collaborate with engineers and PMs.", CANDIDATE_REQUEST),
+    ("Which candidates know Adobe XD and have led design sprints?", CANDIDATE_REQUEST),
+    ("Hi there!", OTHER),
+    ("What can you do?", OTHER),
+    ("How does this bot work?", OTHER),
+    ("Thanks, that was helpful.", OTHER),
+    ("What's the weather like today?", OTHER),
+    ("Can you tell me a joke?", OTHER),
+    ("Who built you?", OTHER),
+    ("I'll come back later.", OTHER),
+]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def classify_with_rules(normalized: str) -> Optional[str]:
+    """Cheap keyword rules. Returns None when the text isn't clearly one intent."""
+    words = normalized.split()
+    if len(words) < MIN_REQUEST_WORDS:
+        return OTHER
+    if GREETING_PATTERN.match(normalized) and len(words) < 8:
+        return OTHER
+    keyword_hits = sum(1 for pattern in _KEYWORD_PATTERNS if pattern.search(normalized))
+    if keyword_hits >= MIN_KEYWORD_HITS:
+        return CANDIDATE_REQUEST
+    return None
+
+
+def classify_with_llm(query: str) -> str:
+    """Classifies the intent of the user's query using an LLM (blocking)."""
+    prompt = f"""
+    You are a helpful assistant that classifies user queries related to job descriptions and candidate matching.
+    Classify the following query into one of the following categories:
+
+    * candidate-request
+    * Other
+
+    Examples:
+
+    Query: "Find me a UX designer with experience in Figma and user research."
+    Category: candidate-request
+
+    Query: "Hi there!"
+    Category: Other
+
+    Query: "{query}"
+    Category:
+    """
+    llm = OpenAI(model="gpt-4o-mini")
+    response = llm.complete(prompt)
+    intent = response.text.strip()
+
+    # Validate the intent
+    if intent not in INTENTS:
+        logger.warning(f"Unexpected intent received: {intent}.  Defaulting to 'Other'.")
+        return OTHER
+    return intent
+
+
+class IntentClassifier:
+    """Tiered intent classifier: keyword rules, then nearest centroid, then the LLM.
+
+    Each tier only runs when the previous one isn't confident. Results are kept in a
+    bounded LRU cache keyed by the normalized message text.
+    """
+
+    def __init__(self, examples: List[Tuple[str, str]] = LABELLED_EXAMPLES, cache_size: int = INTENT_CACHE_SIZE,
+                 min_margin: float = CENTROID_MIN_MARGIN, use_llm_fallback: bool = True):
+        self.examples = examples
+        self.cache_size = cache_size
+        self.min_margin = min_margin
+        self.use_llm_fallback = use_llm_fallback
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._centroids: Optional[Dict[str, List[float]]] = None
+        self.tier_counts = {"cache": 0, "rules": 0, "centroid": 0, "llm": 0}
+
+    def _build_centroids(self) -> Dict[str, List[float]]:
+        # Example embeddings go through Settings.embed_model, which caches them on disk
+        vectors = Settings.embed_model.get_text_embedding_batch([text for text, _ in self.examples])
+        sums: Dict[str, List[float]] = {}
+        counts: Dict[str, int] = {}
+        for (_, label), vector in zip(self.examples, vectors):
+            if label not in sums:
+                sums[label] = [0.0] * len(vector)
+                counts[label] = 0
+            sums[label] = [s + v for s, v in zip(sums[label], vector)]
+            counts[label] += 1
+        return {label: [s / counts[label] for s in total] for label, total in sums.items()}
+
+    def classify_with_centroids(self, query: str) -> Tuple[str, float]:
+        """Returns the nearest centroid's label and its margin over the runner-up (blocking)."""
+        if self._centroids is None:
+            self._centroids = self._build_centroids()
+        vector = Settings.embed_model.get_query_embedding(query)
+        scored = sorted(((_cosine(vector, centroid), label) for label, centroid in self._centroids.items()),
+                        reverse=True)
+        margin = scored[0][0] - scored[1][0] if len(scored) > 1 else 1.0
+        return scored[0][1], margin
+
+    def _remember(self, key: str, intent: str) -> None:
+        self._cache[key] = intent
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def classify(self, query: str) -> str:
+        key = normalize_query(query)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.tier_counts["cache"] += 1
+            return self._cache[key]
+
+        intent = classify_with_rules(key)
+        tier = "rules"
+        if intent is None:
+            try:
+                intent, margin = await run_blocking(self.classify_with_centroids, query)
+                tier = "centroid"
+                fall_back = margin < self.min_margin
+                if fall_back and self.use_llm_fallback:
+                    logger.debug(f"Low centroid margin {margin:.3f}; falling back to the LLM")
+            except Exception as e:
+                if not self.use_llm_fallback:
+                    raise
+                # The embedding tier is only a shortcut; an outage there shouldn't take classification down
+                logger.error(f"Centroid classification failed, falling back to the LLM: {e}")
+                fall_back = True
+            if fall_back and self.use_llm_fallback:
+                intent = await run_blocking(classify_with_llm, query)
+                tier = "llm"
+
+        self.tier_counts[tier] += 1
+        logger.info(f"Classified intent: {intent} via {tier} for query: {preview(query)}")
+        logger.debug(f"Full query classified as {intent}: {query}")
+        self._remember(key, intent)
+        return intent
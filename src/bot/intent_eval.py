@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+import dotenv
+from llama_index.core import Settings
+
+from src.common.embeddings import get_embed_model
+from .intent import IntentClassifier, classify_with_llm
+
+EVAL_FILE = "data/eval/intent_eval.jsonl"
+
+
+def load_eval_set(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _summarize(name: str, predictions: list, labels: list, latencies: list) -> dict:
+    correct = sum(1 for predicted, label in zip(predictions, labels) if predicted == label)
+    latencies = sorted(latencies)
+    return {
+        "classifier": name,
+        "accuracy": correct / len(labels),
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+async def evaluate(path: str) -> list:
+    examples = load_eval_set(path)
+    labels = [example["label"] for example in examples]
+
+    classifier = IntentClassifier()
+    await asyncio.to_thread(classifier.classify_with_centroids, "warm up")  # Build centroids outside the timings
+    tiered_predictions, tiered_latencies = [], []
+    for example in examples:
+        start = time.perf_counter()
+        tiered_predictions.append(await classifier.classify(example["text"]))
+        tiered_latencies.append(time.perf_counter() - start)
+
+    llm_predictions, llm_latencies = [], []
+    for example in examples:
+        start = time.perf_counter()
+        llm_predictions.append(await asyncio.to_thread(classify_with_llm, example["text"]))
+        llm_latencies.append(time.perf_counter() - start)
+
+    tiered = _summarize("tiered", tiered_predictions, labels, tiered_latencies)
+    tiered["tiers"] = classifier.tier_counts
+    llm_only = _summarize("llm-only", llm_predictions, labels, llm_latencies)
+    llm_only["tiers"] = {"llm": len(examples)}
+    return [tiered, llm_only]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate intent classification accuracy and latency.')
+    parser.add_argument('--eval-file', default=EVAL_FILE, help=f'Labelled JSONL file (default: {EVAL_FILE})')
+    args = parser.parse_args()
+
+    dotenv.load_dotenv()
+    logging.basicConfig(level=logging.WARNING)
+    Settings.embed_model = get_embed_model()
+    for result in asyncio.run(evaluate(args.eval_file)):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
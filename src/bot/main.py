@@ -1,13 +1,22 @@
 import discord
 import os
+import atexit
+import asyncio
 import dotenv
 import logging
+from typing import Optional
+from llama_index.core import Settings
 
 from . import agent
-from .vectordb import load_index
+from .vectordb import load_index, load_filter_index, load_sparse_index, INGEST_VERSION_PATH
+from .answer_cache import AnswerCache
+from .scheduler import RequestScheduler, configure_executor
+from .telemetry import configure_telemetry, register_gauges, span, start_metrics_server
+from .onboarding import ShortlistOnboarder
 from . import chat
-from .conversation import ConversationManager, WorkflowState
-from src.common.utility import process_pdf
+from .conversation import ConversationManager, ConversationStore, WorkflowState
+from src.common.logging_setup import configure_logging
+from src.common.utility import process_pdf, preview
 from .responses import BotResponses
 from .handlers import (
     handle_start_confirmation,
@@ -22,21 +31,59 @@ APPROVED_CHANNELS = [
     int(channel_id) for channel_id in os.getenv("APPROVED_CHANNELS", "").split(",")
     if channel_id
 ]
+# Stream answers into the thread as they are generated instead of waiting for the full response
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() in ("1", "true", "yes")
+# Semantic cache of answers to repeated job descriptions; set ANSWER_CACHE_SIZE=0 to disable
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.97"))
+# "candidate" returns the best distinct candidates from an over-fetched set of chunks; "chunk" the best chunks
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "candidate")
+RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "30"))
+CANDIDATE_SCORING = os.getenv("CANDIDATE_SCORING", "max")  # max, sum or mmr
+# Fuse BM25 keyword matches with vector search so exact tool and method names rank first
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() in ("1", "true", "yes")
+CHUNKS_PER_CANDIDATE = int(os.getenv("CHUNKS_PER_CANDIDATE", "2"))
+# Dedicated threads for blocking LLM/Chroma calls, and admission control for candidate requests
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "8"))
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "4"))
+MAX_PER_USER = int(os.getenv("MAX_PER_USER", "1"))
+MAX_QUEUE = int(os.getenv("MAX_QUEUE", "20"))
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "120"))
+# Fetch, extract and ingest the portfolios of uploaded candidate shortlists
+ONBOARD_SHORTLISTS = os.getenv("ONBOARD_SHORTLISTS", "true").lower() in ("1", "true", "yes")
+ONBOARD_CONCURRENCY = int(os.getenv("ONBOARD_CONCURRENCY", "4"))
+ONBOARD_RPM = float(os.getenv("ONBOARD_RPM")) if os.getenv("ONBOARD_RPM") else None
+# Optional SQLite file so conversations survive restarts, e.g. data/conversations.sqlite
+CONVERSATION_DB = os.getenv("CONVERSATION_DB")
+# Per-stage latency, token and score histograms; served on localhost:METRICS_PORT/metrics when set
+TELEMETRY = os.getenv("TELEMETRY", "false").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+TRACE_FILE = os.getenv("TRACE_FILE")  # Optional OpenTelemetry JSON-lines span export, e.g. data/traces.jsonl
+# Logs are written by a background thread; long messages are truncated and DEBUG records sampled
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text or json
+LOG_FILE = os.getenv("LOG_FILE")
+LOG_MAX_CHARS = int(os.getenv("LOG_MAX_CHARS", "4000"))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
 
 intents = discord.Intents.all()
 client = discord.Client(intents=intents)
 tree = discord.app_commands.CommandTree(client)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger("bot")
 
-# Add after other global variables
-conversation_manager = ConversationManager()
+# Set up by main(). PDF worker processes re-import this module, so nothing here may start
+# threads, open stores or configure models at import time.
+conversation_manager: Optional[ConversationManager] = None
+shortlist_onboarder: Optional[ShortlistOnboarder] = None
+request_scheduler: Optional[RequestScheduler] = None
+rag_pipeline = None
+metrics_runner = None  # aiohttp AppRunner serving /metrics, cleaned up when the client closes
+
+def reload_indexes():
+    """Picks up the filter and BM25 indexes rewritten by a shortlist ingest."""
+    rag_pipeline.refresh_indexes(load_filter_index(), load_sparse_index() if HYBRID_RETRIEVAL else None)
 
 @tree.command(name="start", description="Start a conversation with the HireUX bot")
 async def start(interaction: discord.Interaction):
@@ -67,11 +114,39 @@ async def start(interaction: discord.Interaction):
         await interaction.response.send_message("Sorry, something went wrong while starting the conversation.", ephemeral=True)
 
 
+@client.event
+async def setup_hook():
+    # Runs once before the first connect; on_ready fires again after every gateway reconnect
+    global metrics_runner
+    if METRICS_PORT:
+        metrics_runner = await start_metrics_server(METRICS_PORT)
+
+
 @client.event
 async def on_ready():
     logger.info(f'We have logged in as {client.user}')
-    global index
+    conversation_manager.start_sweeper()
+    global rag_pipeline
     index = await load_index()
+    answer_cache = None
+    if ANSWER_CACHE_SIZE > 0:
+        answer_cache = AnswerCache(
+            INGEST_VERSION_PATH,
+            max_entries=ANSWER_CACHE_SIZE,
+            ttl=ANSWER_CACHE_TTL,
+            similarity_threshold=ANSWER_CACHE_SIMILARITY
+        )
+    rag_pipeline = agent.build_rag_pipeline(
+        index,
+        streaming=STREAM_RESPONSES,
+        answer_cache=answer_cache,
+        retrieval_mode=RETRIEVAL_MODE,
+        fetch_k=RETRIEVAL_FETCH_K,
+        candidate_scoring=CANDIDATE_SCORING,
+        filter_index=load_filter_index(),
+        sparse_index=load_sparse_index() if HYBRID_RETRIEVAL else None,
+        chunks_per_candidate=CHUNKS_PER_CANDIDATE
+    )
     # Sync the command tree
     await tree.sync()
     logger.info("Index loaded successfully and commands synced.")
@@ -81,21 +156,29 @@ async def on_ready():
 async def on_message(message):
     if message.author == client.user:
         return
+    with span("on_message"):
+        await handle_message(message)
+
+
+async def handle_message(message):
 
     # Check if message is in an approved channel or thread
     if not (message.channel.id in APPROVED_CHANNELS or 
             (isinstance(message.channel, discord.Thread) and 
              message.channel.parent_id in APPROVED_CHANNELS)):
-        logger.warning(f"Received message in non-approved channel/thread: {message.content}")
+        logger.warning(f"Received message in non-approved channel/thread: {preview(message.content)}")
         return
 
-    logger.info(f"Received message in approved channel/thread: {message.content}")
+    logger.info(f"Received message in approved channel/thread: {preview(message.content)}")
     
     # Check if this is part of an active conversation
+    shortlist = None
     if isinstance(message.channel, discord.Thread):
         conversation = conversation_manager.get_conversation(message.channel.id)
         # Only allow the original user who started the conversation to interact with it
         if conversation and conversation.user_id == message.author.id:
+            # Requests in a conversation with an uploaded candidate list only rank those candidates
+            shortlist = conversation.candidates or None
             # Handle workflow states
             if conversation.state == WorkflowState.AWAITING_START_CONFIRMATION:
                 await handle_start_confirmation(message, conversation, conversation_manager)
@@ -106,11 +189,12 @@ async def on_message(message):
                 return
 
             elif conversation.state == WorkflowState.AWAITING_CANDIDATE_LIST:
-                await handle_candidate_list(message, conversation)
+                await handle_candidate_list(message, conversation, shortlist_onboarder)
                 return
 
             elif conversation.state == WorkflowState.USER_ONBOARDING:
-                await agent.handle_candidate_request(message, message.content, index)
+                await agent.schedule_candidate_request(message, message.content, rag_pipeline, request_scheduler,
+                                                       shortlist)
                 return
 
     # Handle regular messages (non-workflow)
@@ -119,15 +203,69 @@ async def on_message(message):
         await message.reply(BotResponses.HELP.message)
         return
 
-    intent = await agent.classify_intent(query)
+    with span("classify_intent"):
+        intent = await agent.classify_intent(query)
 
     if intent == "candidate-request":
         if len(query.split()) < 15:
             await chat.send_response_in_thread(message, agent.get_short_query_message())
             return
-        await agent.handle_candidate_request(message, query, index)
+        await agent.schedule_candidate_request(message, query, rag_pipeline, request_scheduler, shortlist)
     else:
         await chat.send_response_in_thread(message, agent.get_introductory_message())
 
 
-client.run(DISCORD_TOKEN)
\ No newline at end of file
+async def run_client():
+    """Runs the client until it closes, then stops the metrics server."""
+    global metrics_runner
+    async with client:
+        try:
+            await client.start(DISCORD_TOKEN)
+        finally:
+            if metrics_runner is not None:
+                await metrics_runner.cleanup()
+                metrics_runner = None
+
+
+def main():
+    global conversation_manager, shortlist_onboarder, request_scheduler
+
+    # Configure logging; replaces the handlers the onboarding modules install on import
+    configure_logging(
+        level=getattr(logging, LOG_LEVEL, logging.INFO),
+        json_output=LOG_FORMAT == "json",
+        max_chars=LOG_MAX_CHARS,
+        debug_sample_rate=LOG_DEBUG_SAMPLE_RATE,
+        log_file=LOG_FILE
+    )
+    agent.configure_models()
+
+    conversation_manager = ConversationManager(
+        store=ConversationStore(CONVERSATION_DB) if CONVERSATION_DB else None
+    )
+    atexit.register(conversation_manager.flush)
+    shortlist_onboarder = ShortlistOnboarder(
+        concurrency=ONBOARD_CONCURRENCY,
+        requests_per_minute=ONBOARD_RPM,
+        on_ingested=reload_indexes,
+        embed_model=Settings.embed_model
+    ) if ONBOARD_SHORTLISTS else None
+    configure_executor(BLOCKING_WORKERS)
+    request_scheduler = RequestScheduler(
+        max_in_flight=MAX_IN_FLIGHT,
+        max_per_user=MAX_PER_USER,
+        max_queue=MAX_QUEUE,
+        timeout=REQUEST_TIMEOUT
+    )
+    configure_telemetry(TELEMETRY or METRICS_PORT > 0 or bool(TRACE_FILE), trace_file=TRACE_FILE)
+    register_gauges("hireux_scheduler", "Candidate request scheduler state.", request_scheduler.metrics)
+
+    # Rather than client.run, which would also give the discord logger a second handler
+    try:
+        asyncio.run(run_client())
+    except KeyboardInterrupt:
+        pass  # asyncio.run cancels the client, which closes its connections
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Optional, Set
+
+from discord import Message
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from . import chat
+from .scheduler import run_blocking
+from src.onboard.cache import ExtractionCache, DEFAULT_WEB_CACHE_DIR
+from src.onboard.fetch import FetchCache, PortfolioFetcher, DEFAULT_FETCH_CACHE_DIR
+from src.onboard.ingest import PORTFOLIO_DIR, ingest_data
+from src.onboard.pipeline import OnboardSummary, onboard_candidates
+from src.onboard.prepare import OnboardPortfolios
+
+logger = logging.getLogger("bot.onboarding")
+
+
+class ShortlistOnboarder:
+    """Onboards the portfolios of an uploaded candidate shortlist in the background.
+
+    Progress is posted to the conversation's thread. Runs share one extraction
+    client, and their ingests are serialized since they update the same collection.
+    """
+
+    def __init__(self, output_dir: str = PORTFOLIO_DIR, concurrency: int = 4,
+                 requests_per_minute: Optional[float] = None,
+                 fetch_cache_dir: str = DEFAULT_FETCH_CACHE_DIR, extraction_cache_dir: str = DEFAULT_WEB_CACHE_DIR,
+                 on_ingested: Optional[Callable[[], None]] = None, embed_model: Optional[BaseEmbedding] = None):
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.fetch_cache = FetchCache(fetch_cache_dir)
+        self.extraction_cache_dir = extraction_cache_dir
+        self.on_ingested = on_ingested
+        self.embed_model = embed_model  # The bot's own; ingest must not replace the global Settings under live queries
+        self._onboarder: Optional[OnboardPortfolios] = None
+        self._ingest_lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get_onboarder(self) -> OnboardPortfolios:
+        if self._onboarder is None:
+            self._onboarder = OnboardPortfolios(
+                input_root_dir=self.output_dir,  # Unused; pages are fetched rather than read from disk
+                output_dir=self.output_dir,
+                concurrency=self.concurrency,
+                requests_per_minute=self.requests_per_minute,
+                cache=ExtractionCache(self.extraction_cache_dir),
+            )
+        return self._onboarder
+
+    def start(self, message: Message, candidates: Dict[str, str]) -> asyncio.Task:
+        """Starts onboarding without blocking the handler that received the CSV."""
+        task = asyncio.get_running_loop().create_task(self.run(message, candidates))
+        self._tasks.add(task)  # Keep a reference until it finishes
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def run(self, message: Message, candidates: Dict[str, str]) -> Optional[OnboardSummary]:
+        async def progress(text: str):
+            await message.channel.send(f"⏳ {text}")
+
+        try:
+            await message.channel.send(f"Fetching {len(candidates)} portfolio{'s' if len(candidates) != 1 else ''}...")
+            onboarder = await run_blocking(self._get_onboarder)
+            async with PortfolioFetcher(cache=self.fetch_cache) as fetcher:
+                summary = await onboard_candidates(
+                    candidates, onboarder, fetcher,
+                    ingest=self._ingest,
+                    progress=progress,
+                    run_blocking=run_blocking,
+                )
+        except Exception as e:
+            logger.exception(f"Error onboarding shortlist: {e}")
+            await message.channel.send("**❌ Something went wrong while onboarding the candidates' portfolios.**")
+            return None
+
+        text = f"**✅ Onboarded {summary.extracted} of {summary.total} candidates.**"
+        if summary.failed:
+            text += "\n**Couldn't onboard:**\n" + "\n".join(f"• {key}: {reason}" for key, reason in summary.failed.items())
+        for chunk in chat.split_message(text):
+            await message.channel.send(chunk)
+        return summary
+
+    def _ingest(self) -> None:
+        """Runs on a worker thread; one ingest at a time, as each rewrites the manifest and indexes."""
+        with self._ingest_lock:
+            ingest_data(incremental=True, input_dir=self.output_dir, embed_model=self.embed_model,
+                        configure_globals=False)
+        if self.on_ingested:
+            self.on_ingested()
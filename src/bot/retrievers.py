@@ -0,0 +1,221 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from llama_index.core import QueryBundle, Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import BaseNode, NodeWithScore, TextNode
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+
+from src.common.bm25 import BM25Index
+
+logger = logging.getLogger("bot.retrievers")
+
+SCORING_MODES = ("max", "sum", "mmr")
+RRF_K = 60  # Reciprocal rank fusion constant; dampens the weight of the very top ranks
+
+
+def candidate_group_key(node: BaseNode) -> str:
+    """Identifies the candidate a chunk belongs to (one source YAML file per candidate)."""
+    metadata = node.metadata
+    return str(node.ref_doc_id or metadata.get("document_id") or metadata.get("file_path") or "")
+
+
+def _to_node(node_id: str, text: str, metadata: dict) -> TextNode:
+    try:
+        return metadata_dict_to_node(metadata, text=text)
+    except Exception:
+        return TextNode(text=text or "", id_=node_id, metadata=metadata)
+
+
+@dataclass
+class ChunkResults:
+    """Chunks returned by a single vector search, in rank order."""
+    nodes: List[TextNode]
+    similarities: np.ndarray
+    embeddings: Optional[np.ndarray] = None
+
+
+class CandidateRetriever(BaseRetriever):
+    """Retrieves the best N distinct candidates rather than the best N chunks.
+
+    Over-fetches fetch_k chunks in one vector search, groups them by source
+    candidate and scores every candidate in a single vectorized step:
+
+    * ``max``: the candidate's best chunk similarity.
+    * ``sum``: the total similarity of the candidate's chunks (rewards more evidence).
+    * ``mmr``: max similarity, re-ranked by maximal marginal relevance over the
+      candidates' mean chunk embeddings so near-identical profiles don't crowd
+      out the rest.
+
+    The top chunks_per_candidate chunks of each selected candidate are returned,
+    grouped in candidate rank order.
+    """
+
+    def __init__(self, collection, fetch_k: int = 30, top_n: int = 3, scoring: str = "max",
+                 chunks_per_candidate: int = 2, mmr_lambda: float = 0.7,
+                 embed_model: Optional[BaseEmbedding] = None):
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{scoring}', expected one of {SCORING_MODES}")
+        super().__init__()
+        self.collection = collection
+        self.fetch_k = fetch_k
+        self.top_n = top_n
+        self.scoring = scoring
+        self.chunks_per_candidate = chunks_per_candidate
+        self.mmr_lambda = mmr_lambda
+        self._embed_model = embed_model
+
+    def _query_embedding(self, query_bundle: QueryBundle) -> List[float]:
+        if query_bundle.embedding is not None:
+            return query_bundle.embedding
+        embed_model = self._embed_model or Settings.embed_model
+        return embed_model.get_query_embedding(query_bundle.query_str)
+
+    def query_chunks(self, embedding: List[float], n_results: int, where: Optional[dict] = None,
+                     include_embeddings: bool = False) -> ChunkResults:
+        """Runs one vector search against the collection."""
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+        kwargs = {"where": where} if where else {}
+        results = self.collection.query(
+            query_embeddings=[embedding], n_results=n_results, include=include, **kwargs
+        )
+        nodes = [_to_node(node_id, text, metadata) for node_id, text, metadata
+                 in zip(results["ids"][0], results["documents"][0], results["metadatas"][0])]
+        # Same distance-to-similarity mapping as ChromaVectorStore
+        similarities = np.exp(-np.asarray(results["distances"][0], dtype=np.float64))
+        embeddings = None
+        if include_embeddings and len(nodes):
+            embeddings = np.asarray(results["embeddings"][0], dtype=np.float64)
+        return ChunkResults(nodes=nodes, similarities=similarities, embeddings=embeddings)
+
+    def _score_candidates(self, chunks: ChunkResults, group_index: np.ndarray, n_groups: int) -> np.ndarray:
+        """Returns the candidates' indices in rank order."""
+        scores = np.full(n_groups, -np.inf)
+        np.maximum.at(scores, group_index, chunks.similarities)
+        if self.scoring == "sum":
+            scores = np.bincount(group_index, weights=chunks.similarities, minlength=n_groups)
+        if self.scoring != "mmr" or chunks.embeddings is None:
+            return np.argsort(-scores, kind="stable")[:self.top_n]
+
+        # Mean chunk embedding per candidate, unit-normalized
+        centroids = np.zeros((n_groups, chunks.embeddings.shape[1]))
+        np.add.at(centroids, group_index, chunks.embeddings)
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True).clip(min=1e-12)
+        redundancy = centroids @ centroids.T
+
+        selected = [int(np.argmax(scores))]
+        max_redundancy = redundancy[selected[0]].copy()
+        while len(selected) < min(self.top_n, n_groups):
+            mmr = self.mmr_lambda * scores - (1 - self.mmr_lambda) * max_redundancy
+            mmr[selected] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            max_redundancy = np.maximum(max_redundancy, redundancy[best])
+        return np.asarray(selected)
+
+    def group_chunks(self, chunks: ChunkResults) -> List[NodeWithScore]:
+        """Groups chunks by candidate and returns the best candidates' supporting chunks."""
+        if not chunks.nodes:
+            return []
+        keys = [candidate_group_key(node) for node in chunks.nodes]
+        group_keys, group_index = np.unique(keys, return_inverse=True)
+        ranked = self._score_candidates(chunks, group_index, len(group_keys))
+
+        results = []
+        for group in ranked:
+            members = np.flatnonzero(group_index == group)  # Already in similarity order
+            for i in members[:self.chunks_per_candidate]:
+                results.append(NodeWithScore(node=chunks.nodes[i], score=float(chunks.similarities[i])))
+        logger.debug(f"Grouped {len(chunks.nodes)} chunks into {len(group_keys)} candidates, "
+                     f"kept {[group_keys[group] for group in ranked]}")
+        return results
+
+    def retrieve_candidates(self, query_bundle: QueryBundle, where: Optional[dict] = None) -> List[NodeWithScore]:
+        embedding = self._query_embedding(query_bundle)
+        chunks = self.query_chunks(embedding, self.fetch_k, where=where,
+                                   include_embeddings=self.scoring == "mmr")
+        return self.group_chunks(chunks)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        return self.retrieve_candidates(query_bundle)
+
+
+class HybridRetriever(CandidateRetriever):
+    """Fuses dense vector search with BM25 keyword search by reciprocal rank fusion.
+
+    Job descriptions name exact tools and methods ("Figma", "journey mapping")
+    that embeddings only loosely capture. Both searches return up to fetch_k
+    chunk ids; each chunk scores sum(1 / (rrf_k + rank)) over the lists it
+    appears in, and the best fetch_k fused chunks are fetched from the
+    collection in one call. The fused chunks are then grouped by candidate as
+    in CandidateRetriever, or returned as the top_n chunks when
+    group_by_candidate is off.
+    """
+
+    def __init__(self, collection, sparse_index: BM25Index, fetch_k: int = 30, top_n: int = 3,
+                 scoring: str = "max", chunks_per_candidate: int = 2, mmr_lambda: float = 0.7,
+                 embed_model: Optional[BaseEmbedding] = None, rrf_k: int = RRF_K,
+                 group_by_candidate: bool = True):
+        super().__init__(collection, fetch_k=fetch_k, top_n=top_n, scoring=scoring,
+                         chunks_per_candidate=chunks_per_candidate, mmr_lambda=mmr_lambda,
+                         embed_model=embed_model)
+        self.sparse_index = sparse_index
+        self.rrf_k = rrf_k
+        self.group_by_candidate = group_by_candidate
+
+    def _dense_ids(self, embedding: List[float], where: Optional[dict]) -> List[str]:
+        kwargs = {"where": where} if where else {}
+        results = self.collection.query(
+            query_embeddings=[embedding], n_results=self.fetch_k, include=["distances"], **kwargs
+        )
+        return results["ids"][0]
+
+    def fuse(self, *rankings: List[str]) -> List[tuple]:
+        """Returns (chunk id, fused score) pairs, best first, for the ranked id lists given."""
+        scores = defaultdict(float)
+        for ranking in rankings:
+            for rank, chunk_id in enumerate(ranking, start=1):
+                scores[chunk_id] += 1.0 / (self.rrf_k + rank)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def get_chunks(self, fused: List[tuple], include_embeddings: bool = False) -> ChunkResults:
+        """Fetches the fused chunks from the collection, keeping the fused order and scores."""
+        include = ["documents", "metadatas"]
+        if include_embeddings:
+            include.append("embeddings")
+        results = self.collection.get(ids=[chunk_id for chunk_id, _ in fused], include=include)
+        position = {chunk_id: i for i, chunk_id in enumerate(results["ids"])}
+        nodes, similarities, embeddings = [], [], []
+        for chunk_id, score in fused:
+            i = position.get(chunk_id)
+            if i is None:
+                continue  # Sparse index is ahead of or behind the collection; skip the stale id
+            nodes.append(_to_node(chunk_id, results["documents"][i], results["metadatas"][i]))
+            similarities.append(score)
+            if include_embeddings:
+                embeddings.append(results["embeddings"][i])
+        return ChunkResults(
+            nodes=nodes,
+            similarities=np.asarray(similarities, dtype=np.float64),
+            embeddings=np.asarray(embeddings, dtype=np.float64) if include_embeddings and nodes else None,
+        )
+
+    def retrieve_candidates(self, query_bundle: QueryBundle, where: Optional[dict] = None) -> List[NodeWithScore]:
+        dense = self._dense_ids(self._query_embedding(query_bundle), where)
+        sparse = [chunk_id for chunk_id, _ in self.sparse_index.search(query_bundle.query_str, self.fetch_k, where)]
+        fused = self.fuse(dense, sparse)[:self.fetch_k]
+        logger.debug(f"Fused {len(dense)} dense and {len(sparse)} BM25 results into {len(fused)} chunks "
+                     f"({len(set(dense) & set(sparse))} in both)")
+        if not fused:
+            return []
+        chunks = self.get_chunks(fused, include_embeddings=self.group_by_candidate and self.scoring == "mmr")
+        if self.group_by_candidate:
+            return self.group_chunks(chunks)
+        return [NodeWithScore(node=node, score=float(score))
+                for node, score in zip(chunks.nodes[:self.top_n], chunks.similarities)]
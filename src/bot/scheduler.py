@@ -0,0 +1,161 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Deque, Optional
+
+logger = logging.getLogger("bot.scheduler")
+
+BLOCKING_WORKERS = 8  # Threads available to LLM, embedding and Chroma calls
+MAX_IN_FLIGHT = 4  # Candidate requests processed at once
+MAX_PER_USER = 1  # Candidate requests a single user may have running or queued
+MAX_QUEUE = 20  # Candidate requests waiting for a slot before new ones are turned away
+REQUEST_TIMEOUT = 120.0  # Seconds a candidate request may run once admitted
+WAIT_SAMPLES = 256  # Recent queue wait times kept for the metrics snapshot
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def configure_executor(max_workers: int = BLOCKING_WORKERS) -> ThreadPoolExecutor:
+    """Replaces the executor used by run_blocking; call once at startup."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bot-blocking")
+    return _executor
+
+
+def get_executor() -> ThreadPoolExecutor:
+    return _executor or configure_executor()
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """Runs a blocking call on the bot's dedicated executor.
+
+    Like asyncio.to_thread, but a burst of slow OpenAI or Chroma calls can't
+    exhaust the default executor that the event loop and discord.py rely on.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+class RequestRejected(Exception):
+    """Raised when a request is not admitted; the message is suitable for the user."""
+
+
+class RequestScheduler:
+    """Admission control for expensive requests.
+
+    At most max_in_flight requests run at once; later ones wait in FIFO order
+    up to max_queue deep, and each user may have at most max_per_user requests
+    running or waiting. Admitted requests are cancelled after timeout seconds.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, max_per_user: int = MAX_PER_USER,
+                 max_queue: int = MAX_QUEUE, timeout: float = REQUEST_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._per_user: Counter = Counter()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.counts = Counter()  # completed, rejected, timed_out, failed
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _release(self) -> None:
+        """Hands the finished request's slot to the next waiter, or frees it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def _acquire(self, on_queued: Optional[Callable[[int], Awaitable]]) -> None:
+        if self._in_flight < self.max_in_flight and not self.queue_depth:
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        position = self.queue_depth
+        logger.info(f"Request queued at position {position} ({self._in_flight} in flight)")
+        try:
+            if on_queued:
+                await on_queued(position)
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # The slot was already handed over; pass it on
+            else:
+                waiter.cancel()
+            raise
+
+    async def run(self, user_id: int, request: Callable[[], Awaitable],
+                  on_queued: Optional[Callable[[int], Awaitable]] = None, timeout: Optional[float] = None):
+        """Runs request() once a slot is free.
+
+        Args:
+            user_id: Who the request is for; used for the per-user limit.
+            request: Coroutine function doing the work.
+            on_queued: Awaited with the queue position when the request has to wait.
+            timeout: Seconds the request may run once admitted; defaults to the scheduler's timeout.
+
+        Raises:
+            RequestRejected: The user already has max_per_user requests, or the queue is full.
+            asyncio.TimeoutError: The request ran past its deadline and was cancelled.
+        """
+        if self._per_user[user_id] >= self.max_per_user:
+            self.counts["rejected"] += 1
+            raise RequestRejected("You already have a request in progress. Please send this one again once "
+                                  "it's answered.")
+        if self._in_flight >= self.max_in_flight and self.queue_depth >= self.max_queue:
+            self.counts["rejected"] += 1
+            raise RequestRejected("I'm handling a lot of requests right now. Please try again in a few minutes.")
+
+        deadline = timeout or self.timeout
+        self._per_user[user_id] += 1
+        enqueued_at = time.monotonic()
+        try:
+            await self._acquire(on_queued)
+            wait = time.monotonic() - enqueued_at
+            self._waits.append(wait)
+            logger.info(f"Request admitted after {wait:.2f}s wait (queue depth {self.queue_depth}, "
+                        f"{self._in_flight} in flight)")
+            try:
+                result = await asyncio.wait_for(request(), deadline)
+                self.counts["completed"] += 1
+                return result
+            except asyncio.TimeoutError:
+                self.counts["timed_out"] += 1
+                logger.warning(f"Request cancelled after {deadline:g}s deadline")
+                raise
+            except Exception:
+                self.counts["failed"] += 1
+                raise
+            finally:
+                self._release()
+        finally:
+            self._per_user[user_id] -= 1
+            if not self._per_user[user_id]:
+                del self._per_user[user_id]
+
+    def metrics(self) -> dict:
+        """Snapshot of queue depth, in-flight count, recent wait times and outcome counts."""
+        waits = sorted(self._waits)
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "wait_p50_s": waits[len(waits) // 2] if waits else 0.0,
+            "wait_p95_s": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            "wait_max_s": waits[-1] if waits else 0.0,
+            **self.counts,
+        }
@@ -0,0 +1,261 @@
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from llama_index.core import Settings
+from llama_index.core.callbacks import CBEventType
+from llama_index.core.callbacks.base_handler import BaseCallbackHandler
+from llama_index.core.callbacks.token_counting import get_llm_token_counts
+from llama_index.core.utilities.token_counting import TokenCounter
+
+logger = logging.getLogger("bot.telemetry")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Seconds
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+METRICS_HOST = "127.0.0.1"  # Local only; put a proxy in front to scrape from elsewhere
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels."""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float], label_names: Tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.label_names = label_names
+        self._series: Dict[Tuple[str, ...], List] = {}  # Labels -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            label_text = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{self.name}_sum{suffix} {total:g}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+stage_seconds = Histogram("hireux_stage_seconds", "Latency of each request stage.", LATENCY_BUCKETS, ("stage",))
+llm_tokens = Histogram("hireux_llm_tokens", "Tokens per LLM call, by stage and kind (prompt or completion).",
+                       TOKEN_BUCKETS, ("stage", "kind"))
+retrieval_scores = Histogram("hireux_retrieval_score", "Scores of retrieved nodes.", SCORE_BUCKETS, ("stage",))
+HISTOGRAMS = (stage_seconds, llm_tokens, retrieval_scores)
+
+_enabled = False
+_gauges: Dict[str, Tuple[str, Callable[[], Dict[str, float]]]] = {}
+_otel_tracer = None
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("telemetry_span", default=None)
+
+
+class _NoopSpan:
+    """Returned by span() while telemetry is disabled, so instrumented code costs one flag check."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times one stage of a request and carries its attributes (token counts, scores, ...).
+
+    Spans nest through a context variable, which run_blocking copies into worker
+    threads, so LLM callbacks on those threads attribute tokens to the right stage.
+    """
+
+    __slots__ = ("name", "attributes", "_started", "_token", "_otel_cm", "_otel_span")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self._otel_cm = None
+        self._otel_span = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add(self, key: str, value: float) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        if _otel_tracer is not None:
+            self._otel_cm = _otel_tracer.start_as_current_span(self.name)
+            self._otel_span = self._otel_cm.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._started
+        stage_seconds.observe(elapsed, self.name)
+        _current_span.reset(self._token)
+        if self._otel_cm is not None:
+            for key, value in self.attributes.items():
+                if isinstance(value, (bool, int, float, str)):
+                    self._otel_span.set_attribute(key, value)
+            self._otel_cm.__exit__(exc_type, exc, tb)
+        logger.debug(f"{self.name} took {elapsed * 1000:.1f} ms {self.attributes or ''}")
+
+
+def span(name: str, **attributes: Any):
+    """Context manager timing a request stage, e.g. `with span("retrieve") as s: s.set("nodes", 3)`."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int) -> None:
+    """Attributes an LLM call's token counts to the current span."""
+    if not _enabled:
+        return
+    current = _current_span.get()
+    stage = current.name if current else "other"
+    llm_tokens.observe(prompt_tokens, stage, "prompt")
+    llm_tokens.observe(completion_tokens, stage, "completion")
+    if current:
+        current.add("prompt_tokens", prompt_tokens)
+        current.add("completion_tokens", completion_tokens)
+
+
+def record_scores(scores: Iterable[Optional[float]]) -> None:
+    """Records retrieval scores against the current span."""
+    if not _enabled:
+        return
+    current = _current_span.get()
+    stage = current.name if current else "other"
+    values = [score for score in scores if score is not None]
+    for score in values:
+        retrieval_scores.observe(score, stage)
+    if current and values:
+        current.set("top_score", max(values))
+        current.set("min_score", min(values))
+
+
+class _TokenCountingHandler(BaseCallbackHandler):
+    """Feeds the token counts of every LlamaIndex LLM call into record_tokens."""
+
+    def __init__(self):
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self._token_counter = TokenCounter()
+
+    def on_event_start(self, event_type, payload=None, event_id: str = "", parent_id: str = "", **kwargs) -> str:
+        return event_id
+
+    def on_event_end(self, event_type, payload=None, event_id: str = "", **kwargs) -> None:
+        if event_type == CBEventType.LLM and payload is not None:
+            counts = get_llm_token_counts(self._token_counter, payload, event_id)
+            record_tokens(counts.prompt_token_count, counts.completion_token_count)
+
+    def start_trace(self, trace_id: Optional[str] = None) -> None:
+        pass
+
+    def end_trace(self, trace_id: Optional[str] = None, trace_map=None) -> None:
+        pass
+
+
+def _configure_otel(trace_file: str):
+    """Tracer exporting finished spans as JSON lines to trace_file, or None without the OpenTelemetry SDK."""
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("opentelemetry-sdk is not installed; traces will not be exported")
+        return None
+    if os.path.dirname(trace_file):
+        os.makedirs(os.path.dirname(trace_file), exist_ok=True)
+    out = open(trace_file, 'a', encoding='utf-8')
+    exporter = ConsoleSpanExporter(out=out, formatter=lambda s: s.to_json(indent=None) + "\n")
+    provider = TracerProvider(resource=Resource.create({"service.name": "hireux-bot"}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    return provider.get_tracer("hireux.bot")
+
+
+def configure_telemetry(enabled: bool, trace_file: Optional[str] = None) -> None:
+    """Turns span timing and token counting on or off; call once at startup.
+
+    Args:
+        enabled: Record stage latencies, token counts and retrieval scores.
+        trace_file: Optional file that finished spans are appended to as OpenTelemetry JSON.
+    """
+    global _enabled, _otel_tracer
+    _enabled = enabled
+    if not enabled:
+        return
+    Settings.callback_manager.add_handler(_TokenCountingHandler())
+    if trace_file:
+        _otel_tracer = _configure_otel(trace_file)
+    logger.info(f"Telemetry enabled{f'; exporting traces to {trace_file}' if _otel_tracer else ''}")
+
+
+def register_gauges(name: str, description: str, read: Callable[[], Dict[str, float]]) -> None:
+    """Exposes the numeric values returned by read() as gauges named {name}_{key}, read at scrape time."""
+    _gauges[name] = (description, read)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for name, (description, read) in _gauges.items():
+        try:
+            values = read()
+        except Exception as e:
+            logger.error(f"Error reading gauges {name}: {e}")
+            continue
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                lines.append(f"# HELP {name}_{key} {description}")
+                lines.append(f"# TYPE {name}_{key} gauge")
+                lines.append(f"{name}_{key} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+async def start_metrics_server(port: int, host: str = METRICS_HOST):
+    """Serves render_metrics() at http://host:port/metrics on the running event loop."""
+    from aiohttp import web
+
+    async def metrics(request):
+        return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -1,15 +1,21 @@
 import logging
+import os
 import chromadb
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.core import VectorStoreIndex, StorageContext
+from src.common.filter_index import FilterIndex, FILTER_INDEX_FILENAME
+from src.common.bm25 import BM25Index, BM25_FILENAME
 
 logger = logging.getLogger("bot.vectordb")
 
 CHROMA_DB_PATH = "chroma_db"  # Path to your ChromaDB database directory
+INGEST_VERSION_PATH = os.path.join(CHROMA_DB_PATH, "ingest_version")  # Touched by every ingest that changes the collection
+FILTER_INDEX_PATH = os.path.join(CHROMA_DB_PATH, FILTER_INDEX_FILENAME)
+SPARSE_INDEX_PATH = os.path.join(CHROMA_DB_PATH, BM25_FILENAME)
 
-async def load_index():
+async def load_index(chroma_path: str = CHROMA_DB_PATH):
     # Load Chroma client and collection
-    chroma_client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+    chroma_client = chromadb.PersistentClient(path=chroma_path)
     chroma_collection = chroma_client.get_collection("ux_portfolios")
 
     # Set up ChromaVectorStore
@@ -23,3 +29,22 @@ async def load_index():
 
     return index
 
+def load_filter_index(path: str = FILTER_INDEX_PATH):
+    """Loads the structured pre-filter index written at ingest time, if there is one."""
+    try:
+        filter_index = FilterIndex.load(path)
+    except FileNotFoundError:
+        logger.warning(f"No filter index at {path}; retrieval will not be pre-filtered")
+        return None
+    logger.info(f"Loaded filter index over {len(filter_index.doc_ids)} candidates")
+    return filter_index
+
+def load_sparse_index(path: str = SPARSE_INDEX_PATH):
+    """Loads the BM25 index written at ingest time, if there is one."""
+    try:
+        sparse_index = BM25Index.load(path)
+    except FileNotFoundError:
+        logger.warning(f"No BM25 index at {path}; retrieval will be vector-only")
+        return None
+    logger.info(f"Loaded BM25 index over {len(sparse_index.chunk_ids)} chunks")
+    return sparse_index
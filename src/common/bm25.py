@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BM25_FILENAME = "bm25"  # Written as bm25.npz (arrays) and bm25.json (vocabulary and chunk ids)
+FILTER_COLUMNS = ("document_id", "candidate_key")  # Chunk metadata kept so Chroma-style where clauses can be applied
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[+#][a-z0-9+#]*)?")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "we our you your they their who what which".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 index over chunk text, stored as compressed-sparse-row arrays.
+
+    Postings for term t are postings[offsets[t]:offsets[t + 1]] (chunk ordinals)
+    with matching term frequencies in tfs, so loading is a couple of array reads
+    and scoring a query is a few vectorized numpy operations per query term.
+    """
+
+    def __init__(self, vocab: Dict[str, int], chunk_ids: List[str], columns: Dict[str, List[str]],
+                 offsets: np.ndarray, postings: np.ndarray, tfs: np.ndarray, doc_lens: np.ndarray,
+                 k1: float = 1.5, b: float = 0.75):
+        self.vocab = vocab
+        self.chunk_ids = chunk_ids
+        # Indexes written before a column existed filter as if every chunk had an empty value
+        self.columns = {name: columns.get(name) or [""] * len(chunk_ids) for name in FILTER_COLUMNS}
+        self.offsets = offsets
+        self.postings = postings
+        self.tfs = tfs
+        self.doc_lens = doc_lens
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = float(doc_lens.mean()) if len(doc_lens) else 0.0
+        self._column_arrays = {name: np.asarray(values, dtype=object) for name, values in self.columns.items()}
+
+    @staticmethod
+    def _triplets(chunks: Iterable[Tuple[str, str, dict]], vocab: Dict[str, int], first_ordinal: int = 0):
+        """Tokenizes chunks into (term id, chunk ordinal, term frequency) arrays plus ids, columns and lengths."""
+        term_ids, ordinals, freqs = [], [], []
+        chunk_ids, doc_lens = [], []
+        columns = {name: [] for name in FILTER_COLUMNS}
+        for ordinal, (chunk_id, text, metadata) in enumerate(chunks, start=first_ordinal):
+            tokens = tokenize(text or "")
+            for term, count in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                ordinals.append(ordinal)
+                freqs.append(count)
+            chunk_ids.append(chunk_id)
+            doc_lens.append(len(tokens))
+            for name in FILTER_COLUMNS:
+                columns[name].append(str((metadata or {}).get(name, "")))
+        return (np.asarray(term_ids, dtype=np.int64), np.asarray(ordinals, dtype=np.uint32),
+                np.asarray(freqs, dtype=np.uint16), chunk_ids, columns, np.asarray(doc_lens, dtype=np.uint32))
+
+    @classmethod
+    def _from_triplets(cls, vocab, chunk_ids, columns, term_ids, ordinals, freqs, doc_lens) -> "BM25Index":
+        order = np.argsort(term_ids, kind="stable")
+        counts = np.bincount(term_ids, minlength=len(vocab)) if len(term_ids) else np.zeros(len(vocab), dtype=np.int64)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(vocab, chunk_ids, columns, offsets, ordinals[order], freqs[order], doc_lens)
+
+    @classmethod
+    def build(cls, chunks: Iterable[Tuple[str, str, dict]]) -> "BM25Index":
+        """Builds an index from (chunk id, text, metadata) tuples."""
+        vocab: Dict[str, int] = {}
+        term_ids, ordinals, freqs, chunk_ids, columns, doc_lens = cls._triplets(chunks, vocab)
+        return cls._from_triplets(vocab, chunk_ids, columns, term_ids, ordinals, freqs, doc_lens)
+
+    def update(self, removed_document_ids: Sequence[str], new_chunks: Iterable[Tuple[str, str, dict]]) -> "BM25Index":
+        """Returns a new index without the chunks of removed_document_ids and with new_chunks added.
+
+        Only the new chunks are tokenized; existing postings are filtered and re-sorted as arrays.
+        """
+        removed = set(removed_document_ids)
+        keep = np.asarray([doc_id not in removed for doc_id in self.columns["document_id"]], dtype=bool)
+        remap = np.cumsum(keep) - 1
+
+        term_ids = np.repeat(np.arange(len(self.vocab), dtype=np.int64), np.diff(self.offsets))
+        kept_postings = keep[self.postings] if len(self.postings) else np.zeros(0, dtype=bool)
+        vocab = dict(self.vocab)
+        new_terms, new_ordinals, new_freqs, new_ids, new_columns, new_lens = self._triplets(
+            new_chunks, vocab, first_ordinal=int(keep.sum())
+        )
+        chunk_ids = [chunk_id for chunk_id, kept in zip(self.chunk_ids, keep) if kept] + new_ids
+        columns = {name: [value for value, kept in zip(values, keep) if kept] + new_columns[name]
+                   for name, values in self.columns.items()}
+        return self._from_triplets(
+            vocab, chunk_ids, columns,
+            np.concatenate([term_ids[kept_postings], new_terms]),
+            np.concatenate([remap[self.postings[kept_postings]].astype(np.uint32), new_ordinals]),
+            np.concatenate([self.tfs[kept_postings], new_freqs]),
+            np.concatenate([self.doc_lens[keep], new_lens]),
+        )
+
+    def _mask_for(self, where: Optional[dict]) -> Optional[np.ndarray]:
+        """Evaluates the subset of Chroma where clauses used by the bot ($and, $in, $eq) over FILTER_COLUMNS."""
+        if not where:
+            return None
+        mask = np.ones(len(self.chunk_ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    clause_mask = self._mask_for(clause)
+                    if clause_mask is not None:
+                        mask &= clause_mask
+                continue
+            if key not in self._column_arrays:
+                raise ValueError(f"BM25 index has no '{key}' column to filter on")
+            column = self._column_arrays[key]
+            if isinstance(condition, dict) and "$in" in condition:
+                mask &= np.isin(column, list(condition["$in"]))
+            else:
+                value = condition["$eq"] if isinstance(condition, dict) else condition
+                mask &= column == value
+        return mask
+
+    def search(self, query: str, top_k: int, where: Optional[dict] = None) -> List[Tuple[str, float]]:
+        """Returns up to top_k (chunk id, score) pairs, best first."""
+        n_chunks = len(self.chunk_ids)
+        if not n_chunks:
+            return []
+        scores = np.zeros(n_chunks)
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            if start == end:
+                continue
+            ordinals = self.postings[start:end]
+            tf = self.tfs[start:end].astype(np.float64)
+            idf = math.log(1 + (n_chunks - (end - start) + 0.5) / ((end - start) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lens[ordinals] / (self.avg_doc_len or 1.0))
+            scores[ordinals] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        mask = self._mask_for(where)
+        if mask is not None:
+            scores[~mask] = 0.0
+        top_k = min(top_k, n_chunks)
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.chunk_ids[i], float(scores[i])) for i in candidates if scores[i] > 0]
+
+    def save(self, base_path: str) -> None:
+        np.savez(f"{base_path}.tmp.npz", offsets=self.offsets, postings=self.postings, tfs=self.tfs,
+                 doc_lens=self.doc_lens)
+        with open(f"{base_path}.tmp.json", 'w', encoding='utf-8') as f:
+            json.dump({"vocab": sorted(self.vocab, key=self.vocab.get), "chunk_ids": self.chunk_ids,
+                       "columns": self.columns}, f)
+        os.replace(f"{base_path}.tmp.npz", f"{base_path}.npz")
+        os.replace(f"{base_path}.tmp.json", f"{base_path}.json")
+
+    @classmethod
+    def load(cls, base_path: str) -> "BM25Index":
+        with open(f"{base_path}.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with np.load(f"{base_path}.npz") as arrays:
+            return cls({term: i for i, term in enumerate(meta["vocab"])}, meta["chunk_ids"], meta["columns"],
+                       arrays["offsets"], arrays["postings"], arrays["tfs"], arrays["doc_lens"])
+
+
+def iter_collection_chunks(collection, page_size: int = 1000):
+    """Yields (chunk id, text, metadata) for every chunk in a Chroma collection, a page at a time."""
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            return
+        yield from zip(page["ids"], page["documents"], page["metadatas"])
+        offset += len(page["ids"])
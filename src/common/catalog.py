@@ -0,0 +1,333 @@
+"""Compact candidate catalog: every candidate record in one append-only JSON lines file.
+
+    catalog.jsonl      {"key": "JaneDoe", "record": {...}} per line; a null record removes the key
+    catalog.jsonl.idx  key<TAB>offset<TAB>length per line, appended alongside each record
+                       (a negative length marks a removal)
+
+The latest line for a key wins. Readers load the index into a dict and memory-map
+the data file, so looking up a candidate is one dict lookup and one json.loads.
+A writer that crashed between the two files leaves records past the end of the
+index; readers index those by scanning the tail of the data file, and the next
+writer appends their missing index lines before writing anything new. An index
+that doesn't match the data file is ignored and rebuilt by scanning.
+
+    python -m src.common.catalog build data/output/portfolio data/output/catalog.jsonl
+    python -m src.common.catalog export data/output/catalog.jsonl exported/
+    python -m src.common.catalog compact data/output/catalog.jsonl
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from src.common.utility import candidate_key, write_json_to_yaml
+
+logger = logging.getLogger("common.catalog")
+
+DEFAULT_CATALOG_PATH = "data/output/catalog.jsonl"
+INDEX_SUFFIX = ".idx"
+
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def _encode(key: str, record: Optional[dict]) -> bytes:
+    line = json.dumps({"key": key, "record": record}, ensure_ascii=False, separators=(",", ":"))
+    return (line + "\n").encode('utf-8')
+
+
+def _key_prefix(key: str) -> bytes:
+    return ('{"key":' + json.dumps(key, ensure_ascii=False) + ',').encode('utf-8')
+
+
+IndexEntry = Tuple[str, int, int]  # Key, offset, length (negative for a removal)
+
+
+def _read_index(path: str, data) -> Optional[List[IndexEntry]]:
+    """Entries of the index for a data file, or None if the index doesn't belong to that data."""
+    entries = []
+    try:
+        with open(index_path(path), 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 3:
+                    break  # Partial last line from an interrupted write
+                entries.append((parts[0], int(parts[1]), int(parts[2])))
+    except FileNotFoundError:
+        logger.warning(f"No index for catalog {path}; scanning it instead")
+        return []
+    except ValueError:
+        return None
+    for key, offset, length in entries:
+        if offset + abs(length) > len(data):
+            return None
+    if entries:
+        key, offset, _ = entries[-1]
+        if not data[offset:offset + len(_key_prefix(key))] == _key_prefix(key):
+            return None
+    return entries
+
+
+def _scan_entries(path: str, data, start: int) -> List[IndexEntry]:
+    """Index entries for the complete records in the data file from start onwards."""
+    entries = []
+    offset, end = start, len(data)
+    while offset < end:
+        newline = data.find(b"\n", offset, end)
+        if newline < 0:
+            break  # Partial last record from an interrupted write
+        try:
+            entry = json.loads(data[offset:newline])
+            length = newline + 1 - offset
+            entries.append((entry["key"], offset, length if entry["record"] is not None else -length))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Skipping unreadable record at offset {offset} of {path}: {e}")
+        offset = newline + 1
+    logger.info(f"Indexed catalog records {start}-{offset} of {path} by scanning")
+    return entries
+
+
+def _indexed_entries(path: str, data) -> Tuple[List[IndexEntry], List[IndexEntry]]:
+    """Returns (entries from the index, entries for records the index is missing)."""
+    entries = _read_index(path, data)
+    if entries is None:
+        logger.warning(f"Index of catalog {path} does not match its data; rebuilding it by scanning")
+        return [], _scan_entries(path, data, 0)
+    indexed_end = max((offset + abs(length) for _, offset, length in entries), default=0)
+    return entries, _scan_entries(path, data, indexed_end) if indexed_end < len(data) else []
+
+
+def _truncate_partial_line(path: str) -> None:
+    """Cuts off an unterminated last line left by an interrupted write, so appends start on a fresh line."""
+    try:
+        with open(path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                start = max(0, end - 65536)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end < size:
+                logger.warning(f"Discarding {size - end} bytes of an interrupted write at the end of {path}")
+                f.truncate(end)
+    except FileNotFoundError:
+        pass
+
+
+class CatalogWriter:
+    """Appends candidate records to a catalog, creating it if needed. Safe to share between threads."""
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        _truncate_partial_line(path)
+        _truncate_partial_line(index_path(path))
+        self._repair_index()
+        self._data = open(path, 'ab')
+        self._index = open(index_path(path), 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def _repair_index(self) -> None:
+        """Indexes records a crashed writer left unindexed, before new appends move the end of the index past them."""
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            entries, missing = _indexed_entries(self.path, data)
+        # Without usable index entries, missing covers the whole file and replaces the index
+        self._write_index(missing, mode='a' if entries else 'w')
+
+    def _write_index(self, entries: List[IndexEntry], mode: str) -> None:
+        if not entries:
+            return
+        tmp_path = f"{index_path(self.path)}.tmp" if mode == 'w' else index_path(self.path)
+        with open(tmp_path, mode, encoding='utf-8') as f:
+            f.writelines(f"{key}\t{offset}\t{length}\n" for key, offset, length in entries)
+        if mode == 'w':
+            os.replace(tmp_path, index_path(self.path))
+        logger.warning(f"Added {len(entries)} missing entries to the index of {self.path}")
+
+    def append(self, record: dict, key: Optional[str] = None) -> str:
+        """Writes a candidate record, replacing any earlier one with the same key.
+
+        Args:
+            record: Candidate data, as written to the portfolio YAML files.
+            key: Candidate key; derived from record["name"] if omitted.
+
+        Returns:
+            The candidate key.
+        """
+        if key is None:
+            name = record.get("name")
+            if not isinstance(name, str) or not name.strip():
+                raise KeyError("Candidate name not found in data object.")
+            key = candidate_key(name)
+        self._write(key, record)
+        return key
+
+    def remove(self, key: str) -> None:
+        """Marks a candidate as removed; the space is reclaimed by compact()."""
+        self._write(key, None)
+
+    def _write(self, key: str, record: Optional[dict]) -> None:
+        if "\t" in key or "\n" in key:
+            raise ValueError(f"Candidate key {key!r} contains a tab or newline")
+        line = _encode(key, record)
+        with self._lock:
+            offset = self._data.tell()
+            self._data.write(line)
+            self._data.flush()
+            length = len(line) if record is not None else -len(line)
+            self._index.write(f"{key}\t{offset}\t{length}\n")
+            self._index.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self) -> "CatalogWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Catalog:
+    """Read-only view of a catalog with O(1) lookup by candidate key.
+
+    Reflects the catalog as it was when opened; open a new one to see later appends.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        self.path = path
+        self._offsets: Dict[str, Tuple[int, int]] = {}  # Key -> (offset, length) of its latest record
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        entries, missing = _indexed_entries(path, self._mmap)
+        for key, offset, length in entries + missing:
+            if length < 0:
+                self._offsets.pop(key, None)
+            else:
+                self._offsets[key] = (offset, length)
+
+    def _read(self, offset: int, length: int) -> Optional[dict]:
+        return json.loads(self._mmap[offset:offset + length])["record"]
+
+    def get(self, key: str) -> Optional[dict]:
+        """The candidate record for key, or None if it isn't in the catalog."""
+        location = self._offsets.get(key)
+        return self._read(*location) if location else None
+
+    def keys(self) -> List[str]:
+        """Keys of the candidates in the catalog."""
+        return list(self._offsets)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """Yields (key, record) for every candidate, reading the data file sequentially."""
+        for key, (offset, length) in sorted(self._offsets.items(), key=lambda item: item[1][0]):
+            yield key, self._read(offset, length)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def close(self) -> None:
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def compact(path: str = DEFAULT_CATALOG_PATH) -> int:
+    """Rewrites a catalog without replaced or removed records. Returns the number of candidates kept."""
+    tmp_path = f"{path}.compact"
+    for stale in (tmp_path, index_path(tmp_path)):
+        if os.path.exists(stale):
+            os.remove(stale)
+    with Catalog(path) as catalog, CatalogWriter(tmp_path) as writer:
+        kept = 0
+        for key, record in catalog.items():
+            writer.append(record, key=key)
+            kept += 1
+    # Drop the old index first: if we stop between these steps, readers scan the data file instead
+    # of using an index that belongs to the other version of it
+    if os.path.exists(index_path(path)):
+        os.remove(index_path(path))
+    os.replace(tmp_path, path)
+    os.replace(index_path(tmp_path), index_path(path))
+    logger.info(f"Compacted {path} to {kept} candidates")
+    return kept
+
+
+def build_from_yaml(input_dir: str, path: str = DEFAULT_CATALOG_PATH) -> int:
+    """Appends every candidate YAML file in input_dir to the catalog. Returns the number added."""
+    added = 0
+    with CatalogWriter(path) as writer:
+        for filename in sorted(os.listdir(input_dir)):
+            if not filename.endswith((".yaml", ".yml")):
+                continue
+            filepath = os.path.join(input_dir, filename)
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    writer.append(yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {})
+                added += 1
+            except (OSError, yaml.YAMLError, KeyError) as e:
+                logger.error(f"Skipping {filepath}: {e}")
+    logger.info(f"Added {added} candidates from {input_dir} to {path}")
+    return added
+
+
+def export_yaml(path: str, output_dir: str) -> int:
+    """Writes one YAML file per catalog candidate, as onboarding does, for reading by people."""
+    exported = 0
+    with Catalog(path) as catalog:
+        for _, record in catalog.items():
+            write_json_to_yaml(record, output_dir)
+            exported += 1
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, export or compact a candidate catalog.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Append a directory of candidate YAML files to a catalog.")
+    build.add_argument("input_dir")
+    build.add_argument("catalog", nargs="?", default=DEFAULT_CATALOG_PATH)
+    export = commands.add_parser("export", help="Write a catalog out as one YAML file per candidate.")
+    export.add_argument("catalog")
+    export.add_argument("output_dir")
+    compact_parser = commands.add_parser("compact", help="Drop replaced and removed records.")
+    compact_parser.add_argument("catalog", nargs="?", default=DEFAULT_CATALOG_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    if args.command == "build":
+        build_from_yaml(args.input_dir, args.catalog)
+    elif args.command == "export":
+        print(f"Exported {export_yaml(args.catalog, args.output_dir)} candidates to {args.output_dir}")
+    else:
+        compact(args.catalog)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.embeddings.openai import OpenAIEmbedding
+from pydantic import PrivateAttr
+
+logger = logging.getLogger("common.embeddings")
+
+EMBED_MODEL = "text-embedding-3-small"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite")
+DEFAULT_EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+_SQLITE_MAX_PARAMS = 500  # Keep IN (...) lists well under SQLite's variable limit
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so trivially different chunks share a cache entry."""
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class EmbeddingStore:
+    """SQLite-backed store of embedding vectors keyed by (model, text hash).
+
+    Vectors are stored as packed float32 blobs. A single connection is shared
+    between threads and guarded by a lock; WAL mode lets the bot and an ingest
+    run use the same file concurrently.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, Embedding]:
+        """Returns the cached vectors for the given hashes; missing hashes are omitted."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), _SQLITE_MAX_PARAMS):
+                batch = unique[start:start + _SQLITE_MAX_PARAMS]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                )
+                for digest, blob in rows:
+                    found[digest] = array('f', blob).tolist()
+        return found
+
+    def put_many(self, model: str, items: Dict[str, Embedding]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, digest, array('f', vector).tobytes()) for digest, vector in items.items()],
+            )
+            self._conn.commit()
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Wraps an embedding model with a persistent cache.
+
+    Only texts missing from the cache are sent to the wrapped model, in batches of
+    embed_batch_size. Query embeddings are cached under a separate namespace, since
+    some models embed queries differently from documents.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _store: EmbeddingStore = PrivateAttr()
+    _hits: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+
+    def __init__(self, inner: BaseEmbedding, store: EmbeddingStore,
+                 embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE, **kwargs):
+        super().__init__(model_name=inner.model_name, embed_batch_size=embed_batch_size, **kwargs)
+        inner.embed_batch_size = embed_batch_size
+        self._inner = inner
+        self._store = store
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self._hits, "misses": self._misses}
+
+    def _embed_cached(self, texts: List[str]) -> List[Embedding]:
+        hashes = [text_hash(text) for text in texts]
+        cached = self._store.get_many(self.model_name, hashes)
+
+        # Embed each distinct missing text once
+        missing = {}
+        for digest, text in zip(hashes, texts):
+            if digest not in cached and digest not in missing:
+                missing[digest] = text
+        self._hits += len(texts) - len(missing)
+        self._misses += len(missing)
+        if missing:
+            vectors = self._inner.get_text_embedding_batch(list(missing.values()))
+            new_items = dict(zip(missing, vectors))
+            self._store.put_many(self.model_name, new_items)
+            cached.update(new_items)
+        return [cached[digest] for digest in hashes]
+
+    def _query_namespace(self) -> str:
+        return f"{self.model_name}:query"
+
+    def _cached_query(self, query: str) -> Optional[Embedding]:
+        digest = text_hash(query)
+        vector = self._store.get_many(self._query_namespace(), [digest]).get(digest)
+        if vector is not None:
+            self._hits += 1
+        else:
+            self._misses += 1
+        return vector
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        vector = self._cached_query(query)
+        if vector is None:
+            vector = self._inner.get_query_embedding(query)
+            self._store.put_many(self._query_namespace(), {text_hash(query): vector})
+        return vector
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        vector = self._cached_query(query)
+        if vector is None:
+            vector = await self._inner.aget_query_embedding(query)
+            self._store.put_many(self._query_namespace(), {text_hash(query): vector})
+        return vector
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._embed_cached([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        return self._embed_cached(texts)
+
+
+def get_embed_model(embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE, api_key: Optional[str] = None,
+                    cache_path: str = EMBEDDING_CACHE_PATH) -> CachedEmbedding:
+    """Returns the project's embedding model wrapped in the persistent cache."""
+    inner = OpenAIEmbedding(model=EMBED_MODEL, api_key=api_key)
+    return CachedEmbedding(inner, EmbeddingStore(cache_path), embed_batch_size=embed_batch_size)
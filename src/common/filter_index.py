@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import re
+from dataclasses import fields
+from typing import Dict, Iterable, List, Optional, Set
+
+import yaml
+
+from src.data_classes.project import Project
+
+logger = logging.getLogger("common.filter_index")
+
+FILTER_INDEX_FILENAME = "filter_index.json"
+
+# Facet -> (candidate-level fields, project-level fields) that feed it
+FACETS = {
+    "tool": (["tools"], ["software_or_tools_used"]),
+    "skill": (["skills"], []),
+    "process": ([], ["process"]),
+    "outcome": ([], ["outcome"]),
+}
+# Allowed values too generic to act as a hard filter when they appear in a job description
+IGNORED_VALUES = {"other", "outcome"}
+MAX_FILTER_FRACTION = 0.5  # Don't bother filtering when more than this share of candidates passes
+
+
+def normalize_value(value: str) -> str:
+    return " ".join(str(value).lower().split())
+
+
+def _allowed_values() -> Dict[str, List[str]]:
+    """Allowed values declared on the Project dataclass, by facet."""
+    allowed = {}
+    for field_ in fields(Project):
+        for facet, (_, project_fields) in FACETS.items():
+            if field_.name in project_fields and "allowed_values" in field_.metadata:
+                allowed.setdefault(facet, []).extend(field_.metadata["allowed_values"])
+    return allowed
+
+
+def extract_facet_values(candidate: dict) -> Dict[str, List[str]]:
+    """Collects the normalized facet values of one candidate record."""
+    values: Dict[str, Set[str]] = {facet: set() for facet in FACETS}
+    projects = candidate.get("projects") or []
+    for facet, (candidate_fields, project_fields) in FACETS.items():
+        for name in candidate_fields:
+            values[facet].update(normalize_value(v) for v in candidate.get(name) or [] if v)
+        for project in projects:
+            for name in project_fields:
+                values[facet].update(normalize_value(v) for v in (project or {}).get(name) or [] if v)
+    return {facet: sorted(vals) for facet, vals in values.items()}
+
+
+def _iter_bits(bits: int) -> Iterable[int]:
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class FilterIndex:
+    """Inverted index of structured candidate fields, one bitset per facet value.
+
+    Bit i of a bitset is set when candidate doc_ids[i] has that value. Python ints
+    serve as arbitrary-length bitsets, so intersecting filters is a handful of ANDs.
+    """
+
+    def __init__(self, docs: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                 doc_ids: Optional[List[str]] = None, bitsets: Optional[Dict[str, Dict[str, int]]] = None):
+        self.docs = docs or {}  # doc_id -> facet -> values; kept so updates don't re-read unchanged files
+        if doc_ids is not None and bitsets is not None:
+            self.doc_ids = doc_ids
+            self.bitsets = bitsets
+            self.all_bits = (1 << len(self.doc_ids)) - 1
+        else:
+            self._build_bitsets()
+        self._compile_patterns()
+
+    def _build_bitsets(self) -> None:
+        self.doc_ids = sorted(self.docs)
+        self.bitsets: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        for ordinal, doc_id in enumerate(self.doc_ids):
+            bit = 1 << ordinal
+            for facet, values in self.docs[doc_id].items():
+                facet_bits = self.bitsets.setdefault(facet, {})
+                for value in values:
+                    facet_bits[value] = facet_bits.get(value, 0) | bit
+        self.all_bits = (1 << len(self.doc_ids)) - 1
+
+    def _compile_patterns(self) -> None:
+        self._patterns = {}
+        allowed = _allowed_values()
+        for facet, facet_bits in self.bitsets.items():
+            vocabulary = set(facet_bits) | {normalize_value(v) for v in allowed.get(facet, [])}
+            vocabulary -= IGNORED_VALUES
+            if vocabulary:
+                alternation = "|".join(re.escape(v) for v in sorted(vocabulary, key=len, reverse=True))
+                self._patterns[facet] = re.compile(rf"(?<!\w)({alternation})(?!\w)")
+
+    def update(self, docs: Dict[str, Dict[str, List[str]]], removed: Iterable[str] = ()) -> None:
+        for doc_id in removed:
+            self.docs.pop(doc_id, None)
+        self.docs.update(docs)
+        self._build_bitsets()
+        self._compile_patterns()
+
+    def extract_filters(self, text: str) -> Dict[str, Set[str]]:
+        """Finds known facet values mentioned in a job description."""
+        normalized = normalize_value(text)
+        return {facet: set(pattern.findall(normalized)) for facet, pattern in self._patterns.items()
+                if pattern.search(normalized)}
+
+    def match(self, filters: Dict[str, Set[str]], require_all: bool = True) -> int:
+        """Returns the bitset of candidates passing the filters.
+
+        Facets are always ANDed together; values within a facet are ANDed when
+        require_all is set, ORed otherwise.
+        """
+        bits = self.all_bits
+        for facet, values in filters.items():
+            facet_bits = 0 if not require_all else self.all_bits
+            for value in values:
+                value_bits = self.bitsets.get(facet, {}).get(value, 0)
+                facet_bits = facet_bits & value_bits if require_all else facet_bits | value_bits
+            bits &= facet_bits
+        return bits
+
+    def candidate_ids(self, text: str, min_results: int = 1) -> Optional[List[str]]:
+        """Returns the doc ids passing the hard filters found in text, or None if no filtering applies.
+
+        Filters are relaxed from all-values to any-value-per-facet, and dropped
+        entirely, when fewer than min_results candidates would pass.
+        """
+        filters = self.extract_filters(text)
+        if not filters or not self.doc_ids:
+            return None
+        for require_all in (True, False):
+            bits = self.match(filters, require_all=require_all)
+            count = bin(bits).count("1")
+            if count >= min_results:
+                if count > MAX_FILTER_FRACTION * len(self.doc_ids):
+                    return None
+                logger.info(f"Pre-filter {filters} ({'all' if require_all else 'any'} values) "
+                            f"kept {count}/{len(self.doc_ids)} candidates")
+                return [self.doc_ids[i] for i in _iter_bits(bits)]
+        logger.info(f"Pre-filter {filters} matched fewer than {min_results} candidates; not filtering")
+        return None
+
+    def save(self, path: str) -> None:
+        data = {
+            "docs": self.docs,
+            "doc_ids": self.doc_ids,
+            "bitsets": {facet: {value: format(bits, "x") for value, bits in facet_bits.items()}
+                        for facet, facet_bits in self.bitsets.items()},
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FilterIndex":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        bitsets = {facet: {value: int(bits, 16) for value, bits in facet_bits.items()}
+                   for facet, facet_bits in data["bitsets"].items()}
+        return cls(data["docs"], doc_ids=data["doc_ids"], bitsets=bitsets)
+
+
+def index_portfolio_files(input_dir: str, rel_paths: Iterable[str]) -> Dict[str, Dict[str, List[str]]]:
+    """Parses portfolio YAML files into facet values keyed by their relative path (the Chroma document id)."""
+    docs = {}
+    for rel_path in rel_paths:
+        try:
+            with open(os.path.join(input_dir, rel_path), 'r', encoding='utf-8') as f:
+                candidate = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            logger.error(f"Could not index {rel_path}: {e}")
+            continue
+        docs[rel_path] = extract_facet_values(candidate)
+    return docs
@@ -0,0 +1,154 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+MAX_MESSAGE_CHARS = 4000  # Longer messages (retrieved chunks, whole responses, PDF text) are cut to this
+DEBUG_SAMPLE_RATE = 0.1  # Share of DEBUG records kept per logger
+QUEUE_SIZE = 10000  # Records waiting for the writer thread; beyond this new records are dropped, never waited on
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and goes into the JSON output
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra=` fields alongside the standard ones."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """Keeps one in every 1/rate DEBUG records per logger; other levels always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if not self.every:
+            return False
+        count = self._counts.get(record.name, 0)
+        self._counts[record.name] = count + 1
+        return count % self.every == 0
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread without ever waiting.
+
+    Only the cheap part happens in the caller: the message is merged, and it and
+    any traceback or stack are cut to max_chars. Records arriving while the queue
+    is full are counted and dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue, max_chars: int = MAX_MESSAGE_CHARS):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        message = self._truncate(record.getMessage())
+        record = logging.makeLogRecord(vars(record))  # Copy, so other handlers see the original
+        record.msg, record.args, record.exc_info = message, None, None
+        # A traceback can carry an arbitrarily large repr, so it is cut the same way
+        record.exc_text = self._truncate(record.exc_text)
+        record.stack_info = self._truncate(record.stack_info)
+        return record
+
+    def _truncate(self, text: Optional[str]) -> Optional[str]:
+        if text and len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}... [truncated {len(text) - self.max_chars} chars]"
+        return text
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.dropped and not self.queue.full():
+            self._report_dropped()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def _report_dropped(self) -> None:
+        with self._drop_lock:
+            dropped, self.dropped = self.dropped, 0
+        notice = logging.makeLogRecord({"name": "logging", "levelno": logging.WARNING, "levelname": "WARNING",
+                                        "msg": f"Dropped {dropped} log records while the log queue was full"})
+        try:
+            self.queue.put_nowait(notice)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += dropped
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener that can be stopped more than once, and waits for room for its stop sentinel."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+
+def configure_logging(level: int = logging.INFO, json_output: bool = False, max_chars: int = MAX_MESSAGE_CHARS,
+                      debug_sample_rate: float = DEBUG_SAMPLE_RATE, log_file: Optional[str] = None,
+                      queue_size: int = QUEUE_SIZE) -> logging.handlers.QueueListener:
+    """Routes all logging through a bounded queue to a background writer thread.
+
+    Replaces any handlers already on the root logger (the onboarding modules call
+    basicConfig on import). The listener is stopped, flushing the queue, at exit.
+
+    Args:
+        level: Root log level.
+        json_output: Write JSON lines instead of the usual text format.
+        max_chars: Messages and tracebacks are truncated to this many characters before being queued.
+        debug_sample_rate: Share of DEBUG records kept, per logger.
+        log_file: Append to this file instead of writing to stderr.
+        queue_size: Records buffered for the writer before new ones are dropped.
+    """
+    writer = logging.FileHandler(log_file, encoding='utf-8') if log_file else logging.StreamHandler(sys.stderr)
+    writer.setFormatter(JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue, max_chars=max_chars)
+    if debug_sample_rate < 1:
+        handler.addFilter(DebugSampler(debug_sample_rate))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = _Listener(log_queue, writer, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,84 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger("common.ratelimit")
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting calls to a number of requests per minute."""
+
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None):
+        """Initialize the bucket.
+
+        Args:
+            requests_per_minute: Sustained number of requests allowed per minute.
+            burst: Maximum number of tokens that can accumulate (defaults to one second's worth, minimum 1).
+        """
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+        self.rate = requests_per_minute / 60.0  # tokens per second
+        self.capacity = burst if burst is not None else max(1, int(self.rate))
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def get_status_code(exc: BaseException) -> Optional[int]:
+    """Best-effort extraction of an HTTP status code from an API exception."""
+    for attr in ("code", "status_code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Returns True for rate-limit (429) and server-side (5xx) errors."""
+    return get_status_code(exc) in RETRYABLE_STATUS_CODES
+
+
+def retry_with_backoff(
+    func: Callable[[], T],
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    should_retry: Callable[[BaseException], bool] = is_retryable,
+) -> T:
+    """Calls func, retrying with exponential backoff and full jitter on retryable errors."""
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not should_retry(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            logger.warning(f"Retryable error ({get_status_code(e)}), attempt {attempt}/{max_retries}, "
+                           f"retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
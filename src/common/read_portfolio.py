@@ -1,6 +1,23 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
 import yaml
 
-def load_candidate_data(filepath):
+from src.common.utility import candidate_key
+from src.data_classes.candidate import Candidate
+from src.data_classes.utility import from_dict
+
+logger = logging.getLogger("common.read_portfolio")
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)  # libyaml when available, ~10x faster
+CACHE_SIZE = 4096  # Candidates kept in memory, by path and modification time
+LOAD_WORKERS = 8  # Threads used by load_candidates
+
+
+def load_candidate_data(filepath: str) -> Optional[dict]:
     """Loads candidate data from a YAML file.
 
     Args:
@@ -10,66 +27,104 @@ def load_candidate_data(filepath):
         A dictionary representing the candidate data, or None on error.
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:  # Use UTF-8 encoding
-            data = yaml.safe_load(f)
-            return data
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=YAML_LOADER)
     except FileNotFoundError:
-        print(f"Error: File not found at {filepath}")
+        logger.error(f"Candidate file not found: {filepath}")
+        return None
+    except (OSError, yaml.YAMLError) as e:
+        logger.error(f"Error parsing candidate file {filepath}: {e}")
         return None
-    except yaml.YAMLError as e:
-        print(f"Error parsing YAML: {e}")
+    if not isinstance(data, dict):
+        logger.error(f"Candidate file {filepath} does not contain a mapping")
         return None
+    return data
 
-def print_candidate_info(data):
-    """Prints formatted candidate information."""
-    if not data:
-        return
-
-    print(f"Candidate Name: {data['candidate']['name']}")
-    print(f"Portfolio URL: {data['candidate']['portfolio_url']}")
-    print("\nSkills and Experience:")
-    for category, skills in data['skills_and_experience'].items():
-        print(f"  {category.title().replace('_', ' ')}:")  # Nicer formatting
-        for skill in skills:
-            print(f"    - {skill}")
-
-    print("\nProjects:")
-    for project in data['projects']:
-        print(f"  Project Name: {project['name']}")
-        print(f"    Problem: {project['problem']}")
-        print(f"    Solution: {project['solution']}")
-        print(f"    Role: {project['role']}")
-        if 'impact' in project:  # Handle optional fields
-            print(f"    Impact: {project['impact']}")
-        print("-" * 20)
-
-def get_project_names(data):
-    """Extracts a list of project names."""
-    return [project['name'] for project in data['projects']]
 
-def get_skills_by_category(data, category):
-    """Gets skills for a given category."""
-    return data['skills_and_experience'].get(category, [])
+@lru_cache(maxsize=CACHE_SIZE)
+def _load_candidate(filepath: str, mtime_ns: int, size: int) -> Optional[Candidate]:
+    """Cached on (path, mtime, size), so a rewritten file is read again on its next lookup."""
+    data = load_candidate_data(filepath)
+    return from_dict(Candidate, data) if data is not None else None
+
+
+def load_candidate(filepath: str) -> Optional[Candidate]:
+    """Loads a candidate YAML file as a Candidate, from memory unless the file changed since it was last read.
+
+    The same Candidate instance is returned to every caller, so treat it as read-only.
+    """
+    filepath = os.path.abspath(filepath)
+    try:
+        stat = os.stat(filepath)
+    except OSError as e:
+        logger.error(f"Cannot read candidate file {filepath}: {e}")
+        return None
+    return _load_candidate(filepath, stat.st_mtime_ns, stat.st_size)
+
+
+def load_candidates(directory: str, max_workers: int = LOAD_WORKERS) -> Dict[str, Candidate]:
+    """Loads every candidate YAML file in a directory, in parallel.
+
+    Returns:
+        Candidates by candidate key. Files that can't be read or have no name are skipped.
+    """
+    try:
+        paths = [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+                 if filename.endswith((".yaml", ".yml"))]
+    except FileNotFoundError:
+        logger.error(f"Portfolio directory not found: {directory}")
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="read_portfolio") as executor:
+        loaded = list(executor.map(load_candidate, paths))
+    candidates = {}
+    for path, candidate in zip(paths, loaded):
+        if candidate is None:
+            continue
+        if not isinstance(candidate.name, str) or not candidate.name.strip():
+            logger.warning(f"Skipping candidate file without a name: {path}")
+            continue
+        candidates[candidate_key(candidate.name)] = candidate
+    logger.info(f"Loaded {len(candidates)} candidates from {directory}")
+    return candidates
+
 
+def clear_cache() -> None:
+    """Forgets all cached candidates."""
+    _load_candidate.cache_clear()
+
+
+def get_project_names(candidate: Candidate) -> List[str]:
+    """Extracts a list of project names."""
+    return [project.name for project in candidate.projects if project.name]
 
-# Example usage:
-filepath = "candidate_data.yaml"  # Or wherever you save the file
-candidate_data = load_candidate_data(filepath)
 
-if candidate_data:
-    print_candidate_info(candidate_data)
+def format_candidate(candidate: Candidate) -> str:
+    """Formats the main candidate details and their projects as plain text."""
+    lines = [f"Candidate Name: {candidate.name}", f"Portfolio URL: {candidate.portfolio}"]
+    if candidate.skills:
+        lines.append(f"Skills: {', '.join(candidate.skills)}")
+    if candidate.tools:
+        lines.append(f"Tools: {', '.join(candidate.tools)}")
+    lines.append("\nProjects:")
+    for project in candidate.projects:
+        lines.append(f"  Project Name: {project.name}")
+        lines.append(f"    Role: {project.role}")
+        lines.append(f"    Problem: {project.problem_description}")
+        lines.append(f"    Solution: {project.solution_description}")
+        if project.outcome:
+            lines.append(f"    Outcome: {', '.join(project.outcome)}")
+        lines.append("-" * 20)
+    return "\n".join(lines)
 
-    project_names = get_project_names(candidate_data)
-    print(f"\nProject Names: {project_names}")
 
-    interaction_design_skills = get_skills_by_category(candidate_data, 'interaction_design')
-    print(f"\nInteraction Design Skills: {interaction_design_skills}")
+if __name__ == "__main__":
+    import sys
 
-    #Chunking by section
-    print("\nChunking by Skills and Experience Section")
-    for category, skills in candidate_data['skills_and_experience'].items():
-      print(f"\n  {category.title().replace('_', ' ')}:")  # Nicer formatting
-      chunk = "\n".join([f"    - {skill}" for skill in skills])
-      print(chunk)
-else:
-    print("Failed to load candidate data.")
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    for path in sys.argv[1:] or ["candidate_data.yaml"]:
+        candidate = load_candidate(path)
+        if candidate:
+            print(format_candidate(candidate))
+            print(f"\nProject Names: {get_project_names(candidate)}")
+        else:
+            print(f"Failed to load candidate data from {path}.")
@@ -1,12 +1,43 @@
 import yaml
+import asyncio
+import hashlib
 import logging
+import multiprocessing
 import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict
+from io import BytesIO
+from typing import Dict, Optional, Set, Union
 from PyPDF2 import PdfReader
 
 
 logger = logging.getLogger("common.utility")
 
+PDF_MAX_BYTES = 10 * 1024 * 1024  # Larger uploads are rejected rather than parsed
+PDF_MAX_PAGES = 30  # Pages beyond this are ignored; job descriptions are rarely more than a few
+PDF_TIMEOUT = 20.0  # Seconds before a parse is abandoned and its worker recycled
+PDF_WORKERS = 2
+PDF_CACHE_SIZE = 128  # Extracted texts kept by content hash
+LOG_PREVIEW_LEN = 200
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pending: Dict[ProcessPoolExecutor, Dict[asyncio.Future, float]] = {}  # Parses in flight -> deadline, per pool
+_retired_pools: Set[ProcessPoolExecutor] = set()  # Pools with a stuck worker, killed once their other parses end
+_retire_tasks: Set[asyncio.Task] = set()
+_pdf_cache: "OrderedDict[str, str]" = OrderedDict()
+
+class PdfTooLargeError(ValueError):
+    """Raised when a PDF exceeds PDF_MAX_BYTES."""
+
+def candidate_key(name: str) -> str:
+    """Normalized candidate key, e.g. "jane  doe" -> "JaneDoe"; shared by shortlists and chunk metadata."""
+    return ''.join(word.capitalize() for word in name.split())
+
+def portfolio_filename(name: str) -> str:
+    """File name a candidate's portfolio YAML is written under, e.g. "Jane Doe" -> "jane_doe.yaml"."""
+    return name.lower().replace(" ", "_") + ".yaml"
+
 def dataclass_to_yaml(data_object: object) -> str:
     """Converts a dataclass instance to a YAML string."""
     return yaml.dump(asdict(data_object), indent=2, sort_keys=False)
@@ -28,19 +59,109 @@ def write_json_to_yaml(data_object: dict, output_dir: str) -> None:
     except KeyError:
         logging.error("Candidate name not found in data object.")
         raise KeyError("Candidate name not found in data object.")
-    candidate_name = candidate_name.lower().replace(" ", "_")
-    with open(f"{output_dir}/{candidate_name}.yaml", 'w') as file:
+    with open(os.path.join(output_dir, portfolio_filename(candidate_name)), 'w') as file:
         file.write(yaml_string)
 
-async def process_pdf(filepath: str) -> str:
-    """Process a PDF file and extract its text content."""
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        # Workers are forked from a clean forkserver rather than from the bot process, whose threads must
+        # not be duplicated mid-lock. Workers re-import the entry module as __mp_main__, so entry points
+        # (src/bot/main.py) do their setup in main() rather than at import.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context("spawn")
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=context)
+    return _pdf_pool
+
+def _retire_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """Replaces a pool whose worker is stuck on a parse; it is killed once its other parses have finished.
+
+    A process pool can't kill one worker without failing every parse in flight,
+    so new parses go to a fresh pool while the old one drains.
+    """
+    global _pdf_pool
+    if _pdf_pool is pool:
+        _pdf_pool = None
+    if pool in _retired_pools:
+        return
+    _retired_pools.add(pool)
+    task = asyncio.get_running_loop().create_task(_terminate_when_drained(pool))
+    _retire_tasks.add(task)
+    task.add_done_callback(_retire_tasks.discard)
+
+async def _terminate_when_drained(pool: ProcessPoolExecutor) -> None:
+    pending = {future: deadline for future, deadline in _pdf_pending.get(pool, {}).items() if not future.done()}
+    if pending:
+        # Every parse ends by its own deadline, succeeding or timing out
+        grace = max(pending.values()) - asyncio.get_running_loop().time()
+        await asyncio.wait(pending, timeout=max(0.0, grace))
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+    _pdf_pending.pop(pool, None)
+    _retired_pools.discard(pool)
+
+def _extract_pdf_text(data: bytes, max_pages: int) -> str:
+    """Runs in a worker process: extracts the text of the first max_pages pages."""
+    reader = PdfReader(BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages[:max_pages]).strip()
+
+def _read_file(filepath: str, max_bytes: int) -> bytes:
+    if os.path.getsize(filepath) > max_bytes:
+        raise PdfTooLargeError(f"PDF is larger than {max_bytes} bytes")
+    with open(filepath, 'rb') as f:
+        return f.read()
+
+def preview(text: str, length: int = LOG_PREVIEW_LEN) -> str:
+    """Shortens text for logging."""
+    return text if len(text) <= length else f"{text[:length]}... ({len(text)} chars)"
+
+async def process_pdf(source: Union[str, bytes], max_pages: int = PDF_MAX_PAGES, max_bytes: int = PDF_MAX_BYTES,
+                      timeout: float = PDF_TIMEOUT) -> str:
+    """Extracts the text of a PDF without blocking the event loop.
+
+    Parsing runs in a process pool and is abandoned after timeout seconds. Results
+    are cached by content hash, so re-uploading the same file returns immediately.
+
+    Args:
+        source: Path to the PDF, or its raw bytes.
+        max_pages: Only the first max_pages pages are extracted.
+        max_bytes: Larger files raise PdfTooLargeError without being parsed.
+        timeout: Seconds to wait for the parse.
+    """
     try:
-        reader = PdfReader(filepath)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-        logger.info(f"Extracted text from PDF: {text}")
-        return text.strip()
+        loop = asyncio.get_running_loop()
+        if isinstance(source, str):
+            data = await loop.run_in_executor(None, _read_file, source, max_bytes)
+        else:
+            data = bytes(source)
+        if len(data) > max_bytes:
+            raise PdfTooLargeError(f"PDF is larger than {max_bytes} bytes")
+
+        key = f"{hashlib.sha256(data).hexdigest()}:{max_pages}"
+        if key in _pdf_cache:
+            _pdf_cache.move_to_end(key)
+            logger.info("PDF text served from cache")
+            return _pdf_cache[key]
+
+        pool = _get_pdf_pool()
+        future = loop.run_in_executor(pool, _extract_pdf_text, data, max_pages)
+        pending = _pdf_pending.setdefault(pool, {})
+        pending[future] = loop.time() + timeout
+        future.add_done_callback(lambda done: pending.pop(done, None))
+        try:
+            text = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            _retire_pdf_pool(pool)
+            raise TimeoutError(f"PDF extraction took longer than {timeout:g}s")
+        _pdf_cache[key] = text
+        while len(_pdf_cache) > PDF_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
+        logger.info(f"Extracted text from PDF: {preview(text)}")
+        return text
     except Exception as e:
         logger.error(f"Error processing PDF: {e}")
-        raise e
\ No newline at end of file
+        raise e
@@ -1,19 +1,27 @@
 import json
-from typing import List, Optional
-from dataclasses import fields
+import typing
+from typing import Any, List, Optional
+from dataclasses import MISSING, fields, is_dataclass
 
-def generate_prompt(dataclass_type: type) -> str:
-    """Generates a prompt string for the given dataclass."""
+def _schema_lines(dataclass_type: type, skip: tuple = (), indent: str = "") -> List[str]:
+    """One bullet per field of the dataclass, with its description, instruction and allowed values."""
     prompt_parts = []
     for field_ in fields(dataclass_type):
         field_name = field_.name
+        if field_name in skip:
+            continue
         description = field_.metadata.get("description", "")
         prompt_instruction = field_.metadata.get("prompt_instruction", "")
         allowed_values = field_.metadata.get("allowed_values", None)
 
-        prompt_parts.append(f"*   `{field_name}`: {description} {prompt_instruction}")
+        prompt_parts.append(f"{indent}*   `{field_name}`: {description} {prompt_instruction}")
         if allowed_values:
-            prompt_parts.append(f"    Allowed values: {', '.join(allowed_values)}")
+            prompt_parts.append(f"{indent}    Allowed values: {', '.join(allowed_values)}")
+    return prompt_parts
+
+def generate_prompt(dataclass_type: type) -> str:
+    """Generates a prompt string for the given dataclass."""
+    prompt_parts = _schema_lines(dataclass_type)
     
     prompt = (
         "Analyze the provided document, which contains a project case study, and structure the output as JSON, "
@@ -23,6 +31,35 @@ def generate_prompt(dataclass_type: type) -> str:
     )
     return prompt
 
+def generate_combined_prompt(parent_type: type, child_field: str, child_type: type, has_parent_document: bool,
+                             child_document_count: Optional[int]) -> str:
+    """Generates a prompt extracting a parent record and its nested list from several documents in one call.
+
+    Used for a candidate's resume (the parent) and their project case studies
+    (the children), which are attached after the prompt in that order. With
+    child_document_count None, a single document (a portfolio site) holds both.
+    """
+    child_entries = "One entry per project case study, in the order attached"
+    if child_document_count is None:
+        documents = ("The provided content is a candidate's portfolio website, which may describe several projects; "
+                     "fill in the candidate fields from it where possible.")
+        child_entries = "One entry per project described"
+    elif has_parent_document:
+        documents = (f"The first attached document is the candidate's resume. The remaining {child_document_count} "
+                     f"documents are project case studies, one project each.")
+    else:
+        documents = (f"No resume was provided. The {child_document_count} attached documents are project case "
+                     f"studies, one project each; fill in the candidate fields from them where possible.")
+    prompt = (
+        f"{documents} Structure the output as a single JSON object following this schema:\n\n"
+        + "\n".join(_schema_lines(parent_type, skip=(child_field,))) +
+        f"\n*   `{child_field}`: {child_entries}, each following "
+        f"this schema:\n" + "\n".join(_schema_lines(child_type, indent="    ")) +
+        "\n\nProvide a detailed analysis, filling in as many fields as possible based on the content of the documents. "
+        "Return *only* the JSON, nothing else."
+    )
+    return prompt
+
 def generate_example(dataclass_type: type) -> dict:
     """Generates an example JSON dict for the given dataclass."""
     example_data = {}
@@ -45,3 +82,35 @@ def generate_example(dataclass_type: type) -> dict:
         else:
             example_data[field_name] = None  # Default for other types
     return example_data
+
+def _hydrate_value(field_type: Any, value: Any) -> Any:
+    """Converts a parsed value to field_type, recursing into dataclasses and lists of them."""
+    if value is None:
+        return None
+    origin = typing.get_origin(field_type)
+    if origin is typing.Union:  # Optional[X]
+        field_type = next(arg for arg in typing.get_args(field_type) if arg is not type(None))
+        origin = typing.get_origin(field_type)
+    if origin is list:
+        (item_type,) = typing.get_args(field_type) or (Any,)
+        items = value if isinstance(value, list) else [value]
+        return [_hydrate_value(item_type, item) for item in items if item is not None]
+    if is_dataclass(field_type) and isinstance(value, dict):
+        return from_dict(field_type, value)
+    return value
+
+def from_dict(dataclass_type: type, data: dict):
+    """Builds a dataclass instance from extracted or loaded data, recursing into nested dataclasses.
+
+    The data comes from the LLM and is not guaranteed to match the schema, so
+    unknown keys are ignored, and missing fields get their default (an empty list
+    for lists) or None.
+    """
+    hints = typing.get_type_hints(dataclass_type)
+    values = {}
+    for field_ in fields(dataclass_type):
+        if field_.name in data and data[field_.name] is not None:
+            values[field_.name] = _hydrate_value(hints[field_.name], data[field_.name])
+        elif field_.default is MISSING and field_.default_factory is MISSING:
+            values[field_.name] = None
+    return dataclass_type(**values)
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+logger = logging.getLogger("ingest.cache")
+
+DEFAULT_CACHE_DIR = "data/cache/extraction"
+# Extractions of fetched portfolio pages; kept apart since prune_cache only knows the PDF keys
+DEFAULT_WEB_CACHE_DIR = "data/cache/extraction_web"
+
+
+def file_sha256(filepath: str) -> str:
+    """Returns the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extraction_key(content_hash: str, prompt: str, model: str, schema: type) -> str:
+    """Builds the cache key for one structured extraction.
+
+    Any change to the document, the prompt, the model or the schema produces a new key.
+    """
+    digest = hashlib.sha256()
+    for part in (content_hash, prompt, model, f"{schema.__module__}.{schema.__qualname__}"):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Content-addressed on-disk cache of structured extraction results.
+
+    Each entry is a small JSON file named after its key, so entries can be written
+    from several worker threads without coordination.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the cached extraction for key, or None on a miss."""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry["data"]
+
+    def put(self, key: str, data: dict, source: str = "") -> None:
+        """Stores an extraction result atomically."""
+        entry = {"source": source, "created_at": time.time(), "data": data}
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+
+    def prune(self, keep_keys: Iterable[str]) -> int:
+        """Deletes every entry whose key is not in keep_keys. Returns the number removed."""
+        keep = set(keep_keys)
+        removed = 0
+        for filename in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(filename)
+            if ext == ".json" and key in keep:
+                continue
+            os.remove(os.path.join(self.cache_dir, filename))
+            removed += 1
+        logger.info(f"Pruned {removed} stale cache entries from {self.cache_dir}")
+        return removed
+
+    def log_stats(self) -> None:
+        """Logs hit/miss statistics for this run."""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total else 0.0
+        logger.info(f"Extraction cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate)")
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger("ingest.fetch")
+
+DEFAULT_FETCH_CACHE_DIR = "data/cache/fetch"
+MAX_CONNECTIONS = 20  # Open connections across all portfolio hosts
+MAX_PER_HOST = 2  # Many candidates share a host (Behance, Squarespace, ...); don't hammer any one of them
+FETCH_TIMEOUT = 20.0  # Seconds for a whole request, connect through last byte
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+USER_AGENT = "HireUX-portfolio-fetcher/1.0"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int] = None
+    body: Optional[bytes] = None
+    content_type: str = ""
+    not_modified: bool = False  # Served from the cache after a 304
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.body is not None and self.error is None
+
+
+class FetchCache:
+    """On-disk cache of fetched pages and their validators (ETag, Last-Modified) for conditional GETs."""
+
+    def __init__(self, cache_dir: str = DEFAULT_FETCH_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def get(self, url: str) -> Tuple[Optional[dict], Optional[bytes]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                return meta, f.read()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], content_type: str,
+            body: bytes) -> None:
+        meta_path, body_path = self._paths(url)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified,
+                "content_type": content_type, "fetched_at": time.time()}
+        for path, mode, payload in ((body_path, 'wb', body), (meta_path, 'w', json.dumps(meta))):
+            with open(path + ".tmp", mode) as f:
+                f.write(payload)
+            os.replace(path + ".tmp", path)
+
+
+class PortfolioFetcher:
+    """Fetches portfolio pages concurrently over one pooled aiohttp session.
+
+    Use as an async context manager. Pages are revalidated with If-None-Match /
+    If-Modified-Since when a cached copy exists, so unchanged sites cost a 304.
+    """
+
+    def __init__(self, cache: Optional[FetchCache] = None, max_connections: int = MAX_CONNECTIONS,
+                 max_per_host: int = MAX_PER_HOST, timeout: float = FETCH_TIMEOUT,
+                 max_bytes: int = MAX_PAGE_BYTES):
+        self.cache = cache
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "PortfolioFetcher":
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_per_host),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._session.close()
+        self._session = None
+
+    async def fetch(self, url: str) -> FetchResult:
+        meta, cached_body = (None, None)
+        if self.cache:
+            meta, cached_body = await asyncio.to_thread(self.cache.get, url)
+        headers = {}
+        if meta and cached_body is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            async with self._session.get(url, headers=headers) as response:
+                if response.status == 304 and cached_body is not None:
+                    logger.debug(f"{url} not modified")
+                    return FetchResult(url, status=304, body=cached_body, content_type=meta.get("content_type", ""),
+                                       not_modified=True)
+                if response.status != 200:
+                    return FetchResult(url, status=response.status, error=f"HTTP {response.status}")
+                body = await response.content.read(self.max_bytes + 1)
+                if len(body) > self.max_bytes:
+                    return FetchResult(url, status=response.status, error=f"Page larger than {self.max_bytes} bytes")
+                content_type = response.headers.get("Content-Type", "")
+                if self.cache:
+                    await asyncio.to_thread(self.cache.put, url, response.headers.get("ETag"),
+                                            response.headers.get("Last-Modified"), content_type, body)
+                return FetchResult(url, status=response.status, body=body, content_type=content_type)
+        except asyncio.TimeoutError:
+            return FetchResult(url, error=f"Timed out after {self.timeout:g}s")
+        except aiohttp.ClientError as e:
+            return FetchResult(url, error=str(e) or type(e).__name__)
+
+    async def fetch_all(self, urls: Iterable[str]) -> List[FetchResult]:
+        """Fetches every URL concurrently, within the connector's global and per-host limits."""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+
+class _TextExtractor(HTMLParser):
+    SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template"}
+    BLOCK_TAGS = {"p", "div", "section", "article", "li", "br", "h1", "h2", "h3", "h4", "h5", "h6", "tr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Visible text of an HTML page, one line per block element."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def decode_body(result: FetchResult) -> str:
+    """Decodes a fetched HTML or plain-text page using the charset from its Content-Type."""
+    charset = "utf-8"
+    for param in result.content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            charset = value.strip('"')
+    try:
+        text = result.body.decode(charset, errors="replace")
+    except LookupError:
+        text = result.body.decode("utf-8", errors="replace")
+    return html_to_text(text) if "html" in result.content_type.lower() or "<html" in text[:1000].lower() else text
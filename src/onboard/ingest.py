@@ -1,16 +1,31 @@
 import os
+import json
+import time
+import hashlib
+import argparse
 import dotenv
-from llama_index.embeddings.openai import OpenAIEmbedding
+import yaml
 from llama_index.core.node_parser import SentenceSplitter
 from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings, StorageContext
 from llama_index.llms.openai import OpenAI
 from llama_index.vector_stores.chroma import ChromaVectorStore
 import chromadb  # Import chromadb
 import logging
+from typing import Optional
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.llms import LLM
+from src.common.embeddings import get_embed_model, DEFAULT_EMBED_BATCH_SIZE
+from src.common.filter_index import FilterIndex, FILTER_INDEX_FILENAME, index_portfolio_files
+from src.common.bm25 import BM25Index, BM25_FILENAME, iter_collection_chunks
+from src.common.utility import candidate_key
 
 dotenv.load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CHROMA_DB_PATH = "chroma_db"  # Path to your ChromaDB database directory
+COLLECTION_NAME = "ux_portfolios"
+PORTFOLIO_DIR = "data/output/portfolio"
+MANIFEST_FILENAME = "ingest_manifest.json"  # Stored next to the Chroma database it describes
+VERSION_FILENAME = "ingest_version"  # Touched whenever the collection changes; the bot watches it to drop stale caches
 
 # Configure logging
 logging.basicConfig(
@@ -19,32 +34,233 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger("ingest")
 
-def ingest_data():
-    Settings.llm = OpenAI(model="gpt-4o", api_key=OPENAI_API_KEY)  # Ensure you have your OPENAI_API_KEY set
-    Settings.embed_model = OpenAIEmbedding(model="text-embedding-3-small", api_key=OPENAI_API_KEY)
-    Settings.node_parser = SentenceSplitter(chunk_size=512, chunk_overlap=128 )
+def new_node_parser() -> SentenceSplitter:
+    return SentenceSplitter(chunk_size=512, chunk_overlap=128)
+
+def configure_settings(embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE, embed_model: Optional[BaseEmbedding] = None,
+                       llm: Optional[LLM] = None):
+    """Configures the global LlamaIndex settings used for ingest.
+
+    embed_model and llm replace the OpenAI defaults, e.g. with offline fakes for benchmarks.
+    """
+    Settings.llm = llm or OpenAI(model="gpt-4o", api_key=OPENAI_API_KEY)  # Ensure you have your OPENAI_API_KEY set
+    # Embeddings are cached on disk, so only chunks never seen before are sent to OpenAI
+    Settings.embed_model = embed_model or get_embed_model(embed_batch_size=embed_batch_size, api_key=OPENAI_API_KEY)
+    Settings.node_parser = new_node_parser()
     Settings.num_output = 512
     Settings.context_window = 3900
     logger.info("Settings loaded successfully.")
 
-    # Load documents
-    reader = SimpleDirectoryReader(input_dir="data/output/portfolio", recursive=True)
-    documents = reader.load_data()
+def manifest_path(chroma_path: str = CHROMA_DB_PATH) -> str:
+    return os.path.join(chroma_path, MANIFEST_FILENAME)
+
+def load_manifest(chroma_path: str = CHROMA_DB_PATH) -> dict:
+    """Loads the ingest manifest, returning an empty one if none exists."""
+    try:
+        with open(manifest_path(chroma_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": {}}
+
+def save_manifest(manifest: dict, chroma_path: str = CHROMA_DB_PATH) -> None:
+    os.makedirs(chroma_path, exist_ok=True)
+    tmp_path = manifest_path(chroma_path) + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path(chroma_path))
+
+def touch_ingest_version(chroma_path: str = CHROMA_DB_PATH) -> None:
+    with open(os.path.join(chroma_path, VERSION_FILENAME), 'w') as f:
+        f.write(str(time.time()))
+
+def update_filter_index(input_dir: str, chroma_path: str, current: dict, changed: list, removed: list,
+                        incremental: bool) -> None:
+    """Updates the structured pre-filter index for the changed and removed portfolio files."""
+    filter_index_path = os.path.join(chroma_path, FILTER_INDEX_FILENAME)
+    if incremental and os.path.exists(filter_index_path):
+        if not (changed or removed):
+            return
+        filter_index = FilterIndex.load(filter_index_path)
+        filter_index.update(index_portfolio_files(input_dir, changed), removed=removed)
+    else:
+        filter_index = FilterIndex(index_portfolio_files(input_dir, current))
+    filter_index.save(filter_index_path)
+    logger.info(f"Filter index covers {len(filter_index.doc_ids)} candidates.")
+
+def update_sparse_index(chroma_path: str, chroma_collection, removed_doc_ids: list, nodes: list,
+                        incremental: bool) -> None:
+    """Keeps the BM25 index in step with the collection.
+
+    Incremental runs drop the chunks of removed_doc_ids and tokenize only the new
+    nodes; otherwise, or when no index exists yet, it is rebuilt from the collection.
+    """
+    sparse_path = os.path.join(chroma_path, BM25_FILENAME)
+    if incremental and os.path.exists(sparse_path + ".npz"):
+        if not (removed_doc_ids or nodes):
+            return
+        sparse_index = BM25Index.load(sparse_path).update(
+            removed_doc_ids,
+            ((node.node_id, node.get_content(),
+              {"document_id": node.ref_doc_id, "candidate_key": node.metadata.get("candidate_key", "")})
+             for node in nodes),
+        )
+    else:
+        sparse_index = BM25Index.build(iter_collection_chunks(chroma_collection))
+    sparse_index.save(sparse_path)
+    logger.info(f"BM25 index covers {len(sparse_index.chunk_ids)} chunks, {len(sparse_index.vocab)} terms.")
+
+def _hash_file(filepath: str) -> str:
+    with open(filepath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def scan_portfolio_files(input_dir: str) -> dict:
+    """Returns a mapping of relative YAML path -> content hash for the portfolio tree."""
+    hashes = {}
+    for root, _, filenames in os.walk(input_dir):
+        for filename in filenames:
+            if not filename.endswith((".yaml", ".yml")):
+                continue
+            filepath = os.path.join(root, filename)
+            rel_path = os.path.relpath(filepath, input_dir).replace(os.sep, "/")
+            hashes[rel_path] = _hash_file(filepath)
+    return hashes
+
+def _candidate_key_for(filepath: str) -> str:
+    """Shortlist key of the candidate a portfolio YAML describes, or "" if it has no readable name."""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            name = (yaml.safe_load(f) or {}).get("name")
+    except (OSError, yaml.YAMLError, AttributeError) as e:
+        logger.warning(f"Could not read candidate name from {filepath}: {e}")
+        return ""
+    return candidate_key(name) if isinstance(name, str) else ""
+
+def _load_documents(input_dir: str, rel_paths: list) -> dict:
+    """Loads documents for the given files, using the relative path as a stable document id.
+
+    Each document carries a candidate_key metadata field so queries can be scoped
+    to a recruiter's shortlist. It is kept out of the embedded and LLM text.
+
+    Returns:
+        A mapping of relative path -> list of documents loaded from that file.
+    """
+    abs_to_rel = {os.path.abspath(os.path.join(input_dir, rel_path)): rel_path for rel_path in rel_paths}
+    reader = SimpleDirectoryReader(input_files=list(abs_to_rel))
+    documents_by_file = {rel_path: [] for rel_path in rel_paths}
+    keys = {rel_path: _candidate_key_for(os.path.join(input_dir, rel_path)) for rel_path in rel_paths}
+    for document in reader.load_data():
+        rel_path = abs_to_rel[os.path.abspath(document.metadata["file_path"])]
+        docs = documents_by_file[rel_path]
+        document.id_ = rel_path if not docs else f"{rel_path}#{len(docs)}"
+        document.metadata["candidate_key"] = keys[rel_path]
+        document.excluded_embed_metadata_keys.append("candidate_key")
+        document.excluded_llm_metadata_keys.append("candidate_key")
+        docs.append(document)
+    return documents_by_file
+
+def ingest_data(incremental: bool = True, input_dir: str = PORTFOLIO_DIR, chroma_path: str = CHROMA_DB_PATH,
+                embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE, embed_model: Optional[BaseEmbedding] = None,
+                llm: Optional[LLM] = None, configure_globals: bool = True) -> dict:
+    """Embeds the portfolio YAML files into the ux_portfolios collection.
+
+    In incremental mode only new or changed files are embedded and upserted, and the
+    chunks of changed or removed files are deleted, based on a manifest of content
+    hashes from the previous run. A full ingest drops and rebuilds the collection, as
+    does the first run against a collection built before the manifest existed.
+
+    Args:
+        configure_globals: Set the global LlamaIndex Settings first, as the command line does. Pass False
+            from a running bot, whose queries read those globals on other threads; embed_model, or the
+            already configured Settings.embed_model, is then used without reassigning anything.
+
+    Returns:
+        Counts of files and chunks embedded and removed in this run.
+    """
+    if configure_globals:
+        configure_settings(embed_batch_size, embed_model=embed_model, llm=llm)
+        embed_model, node_parser = Settings.embed_model, Settings.node_parser
+    else:
+        embed_model, node_parser = embed_model or Settings.embed_model, new_node_parser()
 
     # Create Chroma client and collection
-    chroma_client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-    chroma_collection = chroma_client.get_or_create_collection("ux_portfolios")
+    chroma_client = chromadb.PersistentClient(path=chroma_path)
+    manifest = load_manifest(chroma_path)
+    if not incremental:
+        try:
+            chroma_client.delete_collection(COLLECTION_NAME)
+            logger.info(f"Dropped collection '{COLLECTION_NAME}' for full re-ingest.")
+        except Exception:
+            pass  # Collection didn't exist yet
+        manifest = {"files": {}}
+    chroma_collection = chroma_client.get_or_create_collection(COLLECTION_NAME)
+    if incremental and chroma_collection.count() > 0 and not os.path.exists(manifest_path(chroma_path)):
+        # Chunks from before the manifest existed have random ids that can't be tied to files,
+        # so upserting beside them would duplicate every portfolio; rebuild once instead
+        logger.warning(f"Collection '{COLLECTION_NAME}' has no ingest manifest; rebuilding it in full.")
+        chroma_client.delete_collection(COLLECTION_NAME)
+        chroma_collection = chroma_client.get_or_create_collection(COLLECTION_NAME)
+        incremental = False
+    if chroma_collection.count() == 0:
+        manifest = {"files": {}}  # Manifest is meaningless without the chunks it describes
 
     # Set up ChromaVectorStore
     vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
     storage_context = StorageContext.from_defaults(vector_store=vector_store)
+    index = VectorStoreIndex.from_vector_store(vector_store, storage_context=storage_context, embed_model=embed_model)
 
-    # Create the index
-    VectorStoreIndex.from_documents(
-        documents, storage_context=storage_context
-    )
+    # Work out what changed since the last run
+    current = scan_portfolio_files(input_dir)
+    previous = manifest["files"]
+    changed = [path for path, digest in current.items() if previous.get(path, {}).get("sha256") != digest]
+    removed = [path for path in previous if path not in current]
+    logger.info(f"{len(current)} portfolio files: {len(changed)} new or changed, {len(removed)} removed, "
+                f"{len(current) - len(changed)} unchanged.")
+
+    # Delete stale chunks before upserting the new versions
+    removed_doc_ids = []
+    for path in removed + [path for path in changed if path in previous]:
+        for doc_id in previous[path]["doc_ids"]:
+            vector_store.delete(doc_id)
+            removed_doc_ids.append(doc_id)
+        del previous[path]
+
+    nodes = []
+    if changed:
+        documents_by_file = _load_documents(input_dir, changed)
+        documents = [doc for docs in documents_by_file.values() for doc in docs]
+        nodes = node_parser.get_nodes_from_documents(documents)
+        index.insert_nodes(nodes)
+        for path, docs in documents_by_file.items():
+            previous[path] = {"sha256": current[path], "doc_ids": [doc.id_ for doc in docs]}
+        logger.info(f"Embedded {len(nodes)} chunks from {len(documents)} documents "
+                    f"(embedding cache: {getattr(embed_model, 'stats', {})}).")
+
+    collection_changed = bool(changed or removed) or not incremental
+    if collection_changed:
+        manifest["updated_at"] = time.time()
+    manifest["files"] = previous
+    save_manifest(manifest, chroma_path)
+    update_filter_index(input_dir, chroma_path, current, changed, removed, incremental)
+    update_sparse_index(chroma_path, chroma_collection, removed_doc_ids, nodes, incremental)
+    if collection_changed:
+        touch_ingest_version(chroma_path)
     logging.info("Data ingestion and indexing complete.")
+    return {"files": len(current), "changed_files": len(changed), "removed_files": len(removed),
+            "chunks": len(nodes), "collection_chunks": chroma_collection.count()}
 
 
 if __name__ == "__main__":
-    ingest_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Embed structured portfolios into the vector store.')
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Drop the collection and re-embed every portfolio instead of only the changed files'
+    )
+    parser.add_argument(
+        '--embed-batch-size',
+        type=int,
+        default=DEFAULT_EMBED_BATCH_SIZE,
+        help=f'Number of uncached chunks sent per embedding request (default: {DEFAULT_EMBED_BATCH_SIZE})'
+    )
+    args = parser.parse_args()
+    ingest_data(incremental=not args.full, embed_batch_size=args.embed_batch_size)
@@ -1,6 +1,9 @@
 import argparse
 import logging
-from src.onboard.prepare import OnboardPortfolios
+from src.onboard.prepare import OnboardPortfolios, EXTRACTION_MODES
+from src.common.catalog import CatalogWriter
+from src.onboard.cache import ExtractionCache, DEFAULT_CACHE_DIR
+from src.onboard.uploads import UploadRegistry, DEFAULT_UPLOAD_REGISTRY, UPLOAD_CONCURRENCY
 
 def main():
     # Configure argument parser
@@ -17,16 +20,79 @@ def main():
         default='data/output/portfolio',
         help='Directory for processed output (default: data/output/portfolio)'
     )
+    parser.add_argument(
+        '--catalog',
+        default=None,
+        help='Also append each candidate to this catalog file (see src/common/catalog.py)'
+    )
+    parser.add_argument(
+        '--no-yaml',
+        action='store_true',
+        help='Skip the per-candidate YAML files; requires --catalog'
+    )
     parser.add_argument(
         '--log-level',
         default='INFO',
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
         help='Set the logging level (default: INFO)'
     )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Number of concurrent upload/extraction workers (default: 1, sequential)'
+    )
+    parser.add_argument(
+        '--rpm',
+        type=float,
+        default=None,
+        help='Maximum Gemini generate_content requests per minute (default: unlimited)'
+    )
+    parser.add_argument(
+        '--extraction-mode',
+        default='per_file',
+        choices=list(EXTRACTION_MODES),
+        help='per_file: one Gemini call per PDF; combined: one call per candidate; '
+             'batch: combined calls submitted as polled batch jobs (default: per_file)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=DEFAULT_CACHE_DIR,
+        help=f'Directory for cached extraction results (default: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the extraction cache and re-extract every PDF'
+    )
+    parser.add_argument(
+        '--upload-registry',
+        default=DEFAULT_UPLOAD_REGISTRY,
+        help=f'File recording uploaded PDFs so unexpired uploads are reused (default: {DEFAULT_UPLOAD_REGISTRY})'
+    )
+    parser.add_argument(
+        '--no-upload-registry',
+        action='store_true',
+        help='Upload every PDF again instead of reusing earlier uploads'
+    )
+    parser.add_argument(
+        '--upload-concurrency',
+        type=int,
+        default=UPLOAD_CONCURRENCY,
+        help=f'Maximum number of simultaneous file uploads (default: {UPLOAD_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--prune-cache',
+        action='store_true',
+        help='Remove cache entries that no longer match any input PDF, prompt or model, then exit'
+    )
 
     # Parse arguments
     args = parser.parse_args()
 
+    if args.no_yaml and not args.catalog:
+        parser.error('--no-yaml requires --catalog')
+
     # Configure logging
     logging.basicConfig(
         level=getattr(logging, args.log_level),
@@ -36,7 +102,21 @@ def main():
 
     # Create and run portfolio processor
     try:
-        onboarder = OnboardPortfolios(args.input_dir, args.output_dir)
+        onboarder = OnboardPortfolios(
+            args.input_dir,
+            args.output_dir,
+            concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            cache=None if args.no_cache else ExtractionCache(args.cache_dir),
+            extraction_mode=args.extraction_mode,
+            upload_registry=None if args.no_upload_registry else UploadRegistry(args.upload_registry),
+            upload_concurrency=args.upload_concurrency,
+            catalog=CatalogWriter(args.catalog) if args.catalog else None,
+            write_yaml=not args.no_yaml
+        )
+        if args.prune_cache:
+            onboarder.prune_cache()
+            return
         onboarder.create_structured_portfolios()
     except Exception as e:
         logging.error(f"Portfolio processing failed: {e}")
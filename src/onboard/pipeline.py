@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.common.utility import process_pdf
+from src.onboard.fetch import PortfolioFetcher, decode_body
+from src.onboard.prepare import OnboardPortfolios, PortfolioExistsError
+
+logger = logging.getLogger("ingest.pipeline")
+
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+
+def display_name(candidate_key: str) -> str:
+    """Turns a shortlist key such as "JaneDoe" back into "Jane Doe"."""
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", candidate_key)
+
+
+@dataclass
+class OnboardSummary:
+    total: int = 0
+    fetched: int = 0
+    not_modified: int = 0  # Fetched pages the site reported unchanged since the last run
+    extracted: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)  # Candidate key -> reason
+    ingested: bool = False
+
+
+async def onboard_candidates(candidates: Dict[str, str], onboarder: OnboardPortfolios, fetcher: PortfolioFetcher,
+                             ingest: Optional[Callable[[], None]] = None,
+                             progress: Optional[ProgressCallback] = None,
+                             run_blocking: Callable[..., Awaitable] = asyncio.to_thread) -> OnboardSummary:
+    """Fetches, extracts and ingests the portfolios of a candidate shortlist.
+
+    Args:
+        candidates: Shortlist keys (see handlers._process_csv_rows) mapped to portfolio URLs.
+        onboarder: Structured extraction; portfolios are written to its output directory.
+        fetcher: Open PortfolioFetcher; all pages are fetched concurrently through it.
+        ingest: Blocking callable that upserts the output directory into the collection.
+        progress: Awaited with a short status line after each stage.
+        run_blocking: How blocking parsing, extraction and ingest calls are run off the event loop.
+    """
+    summary = OnboardSummary(total=len(candidates))
+
+    async def report(text: str):
+        logger.info(text)
+        if progress:
+            await progress(text)
+
+    keys = list(candidates)
+    results = await fetcher.fetch_all(candidates[key] for key in keys)
+    pages = {}
+    for key, result in zip(keys, results):
+        if not result.ok:
+            summary.failed[key] = result.error or "no content"
+            continue
+        summary.fetched += 1
+        summary.not_modified += result.not_modified
+        pages[key] = result
+    await report(f"Fetched {summary.fetched}/{summary.total} portfolios "
+                 f"({summary.not_modified} unchanged since last time).")
+
+    semaphore = asyncio.Semaphore(onboarder.concurrency)
+
+    async def extract(key: str):
+        result = pages[key]
+        try:
+            if "pdf" in result.content_type.lower():
+                text = await process_pdf(result.body)
+            else:
+                text = await run_blocking(decode_body, result)  # Parsing a few MB of HTML takes a while
+            if not text.strip():
+                summary.failed[key] = "no readable text"
+                return
+            async with semaphore:
+                data = await run_blocking(onboarder.create_portfolio_from_page, display_name(key), result.url, text)
+        except PortfolioExistsError as e:
+            summary.failed[key] = str(e)
+            return
+        except Exception as e:
+            logger.exception(f"Error onboarding {key}: {e}")
+            data = None
+        if data is None:
+            summary.failed.setdefault(key, "extraction failed")
+        else:
+            summary.extracted += 1
+
+    await asyncio.gather(*(extract(key) for key in pages))
+    await report(f"Extracted {summary.extracted}/{summary.fetched} portfolios.")
+
+    if ingest and summary.extracted:
+        await report("Updating the search index...")
+        await run_blocking(ingest)
+        summary.ingested = True
+    return summary
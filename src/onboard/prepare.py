@@ -1,12 +1,23 @@
 import os
 import dotenv
+import hashlib
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from src.data_classes.candidate import Candidate
 from src.data_classes.project import Project
-from src.data_classes.utility import generate_prompt
-from src.common.utility import write_json_to_yaml
+from src.data_classes.utility import generate_combined_prompt, generate_prompt
+from src.common.catalog import CatalogWriter
+from src.common.read_portfolio import load_candidate_data
+from src.common.utility import portfolio_filename, write_json_to_yaml
+from src.common.ratelimit import TokenBucket, get_status_code, retry_with_backoff
+from src.onboard.cache import ExtractionCache, extraction_key, file_sha256
+from src.onboard.uploads import UPLOAD_CONCURRENCY, UPLOAD_TTL, UploadRegistry
 from google import genai
+from google.genai import types
 
 dotenv.load_dotenv()
 
@@ -16,23 +27,66 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S')
 
+GEMINI_MODEL = 'gemini-2.0-flash'
+# "per_file": one call per PDF; "combined": one call per candidate with all their PDFs;
+# "batch": combined requests submitted as Gemini batch jobs and polled for results
+EXTRACTION_MODES = ("per_file", "combined", "batch")
+BATCH_MAX_REQUESTS = 200  # Candidates per batch job
+BATCH_POLL_INTERVAL = 30.0  # Seconds between batch job status checks
+BATCH_TIMEOUT = 24 * 3600.0  # Batch jobs are completed or expired by Gemini within a day
+BATCH_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+STALE_UPLOAD_STATUS_CODES = {403, 404}  # Returned for uploaded files that expired or were deleted
+
+
+class PortfolioExistsError(Exception):
+    """Raised instead of overwriting a candidate's portfolio that came from a different source."""
+
 
 class OnboardPortfolios:
-    def __init__(self, input_root_dir: str, output_dir: str):
+    def __init__(self, input_root_dir: str, output_dir: str, concurrency: int = 1,
+                 requests_per_minute: Optional[float] = None, max_retries: int = 5,
+                 cache: Optional[ExtractionCache] = None, client: Optional[genai.Client] = None,
+                 extraction_mode: str = "per_file", batch_poll_interval: float = BATCH_POLL_INTERVAL,
+                 upload_registry: Optional[UploadRegistry] = None, upload_concurrency: int = UPLOAD_CONCURRENCY,
+                 catalog: Optional[CatalogWriter] = None, write_yaml: bool = True):
         """Initialize OnboardPortfolios with input and output directories.
 
         Args:
             input_root_dir: Root directory containing portfolio subdirectories.
             output_dir: Directory for processed output
+            concurrency: Number of worker threads used for uploads and extraction (1 = sequential).
+            requests_per_minute: Optional limit on generate_content calls per minute.
+            max_retries: Retries for rate-limited (429) or server (5xx) errors.
+            cache: Optional extraction cache; hits skip both the upload and generate_content.
+            client: Gemini client to use instead of one configured from the environment.
+            extraction_mode: One of EXTRACTION_MODES.
+            batch_poll_interval: Seconds between status checks of a submitted batch job.
+            upload_registry: Optional registry of uploaded files; unexpired handles are reused instead of uploading again.
+            upload_concurrency: Maximum number of uploads in flight at once.
+            catalog: Optional catalog that each extracted candidate is also appended to.
+            write_yaml: Write one YAML file per candidate to output_dir.
         """
+        if extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(f"extraction_mode must be one of {EXTRACTION_MODES}, got {extraction_mode!r}")
         self.logger = logging.getLogger("ingest")
         self.input_root_dir = input_root_dir  
         self.output_dir = output_dir
         self.missing_resumes = []  
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.cache = cache
+        self.extraction_mode = extraction_mode
+        self.batch_poll_interval = batch_poll_interval
+        self.upload_registry = upload_registry
+        self.upload_concurrency = max(1, upload_concurrency)
+        self._upload_slots = threading.BoundedSemaphore(self.upload_concurrency)
+        self.catalog = catalog
+        self.write_yaml = write_yaml
 
         # Initialize Gemini client
         try:
-            self.client = genai.Client()
+            self.client = client or genai.Client()
         except Exception as e:
             self.logger.error(f"Error configuring Gemini API: {e}")
             raise
@@ -40,31 +94,28 @@ class OnboardPortfolios:
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def create_structured_portfolio(self, input_dir: str):
-        """Process all portfolio PDFs in the input directory."""
-        self.input_dir = input_dir  
-
-        # Local variables for each portfolio
-        candidate_data = {}
-        projects = []
+    def _collect_files(self, input_dir: str):
+        """Split the PDFs in a portfolio directory into a resume and project files.
 
+        Returns:
+            A (resume_path, project_paths) tuple, or None if the directory can't be read.
+        """
         try:
-            filenames = [f for f in os.listdir(self.input_dir) if f.endswith(".pdf")]
+            filenames = [f for f in os.listdir(input_dir) if f.endswith(".pdf")]
         except FileNotFoundError:
-            self.logger.error(f"Error: Input directory '{self.input_dir}' not found.")
-            return
+            self.logger.error(f"Error: Input directory '{input_dir}' not found.")
+            return None
         except Exception as e:
             self.logger.error(f"Exception occurred: {e}")
-            return
+            return None
 
-        self.logger.info(f"Processing {len(filenames)} files in directory: {self.input_dir}")
+        self.logger.info(f"Processing {len(filenames)} files in directory: {input_dir}")
 
-        # Collect all project files first
         project_files = []
         resume_file = None
 
         for filename in filenames:
-            filepath = os.path.join(self.input_dir, filename)
+            filepath = os.path.join(input_dir, filename)
             file_parts = filename[:-4].split("_")  # Remove '.pdf' and split
             if len(file_parts) < 2:
                 self.logger.info(f"Skipping improperly formatted filename: {filename}")
@@ -76,64 +127,257 @@ class OnboardPortfolios:
                 self.logger.warning(f"Skipping Home/AboutMe file: {filename}")
                 continue  # Skip Home files
 
-            try:
-                self.logger.info(f"Uploading file: {filename}")
-                uploaded_file = self.client.files.upload(file=filepath)
-                
-                if page_type == "resume":
-                    resume_file = uploaded_file
-                else:
-                    project_files.append(uploaded_file)
-                    
-            except Exception as e:
-                self.logger.info("Exception in file upload", e)
-                continue
+            if page_type == "resume":
+                resume_file = filepath
+            else:
+                project_files.append(filepath)
 
-        # Process resume first if available
-        if resume_file:
-            try:
-                prompt = generate_prompt(Candidate)
-                response = self.client.models.generate_content(
-                    model='gemini-2.0-flash',
-                    contents=[prompt, resume_file],
-                    config={
-                        'response_mime_type': 'application/json',
-                        'response_schema': Candidate
-                    }
-                )
-                candidate_data = json.loads(response.text)
-            except Exception as e:
-                self.logger.info(f"Error processing resume: {e}")
-                candidate_data = {}
+        return resume_file, project_files
+
+    def _generate(self, prompt: str, content, schema: type):
+        """Calls generate_content on uploaded files or text, honouring the rate limit and retrying transient errors."""
+        contents = [prompt, *content] if isinstance(content, list) else [prompt, content]
+
+        def call():
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            return self.client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=contents,
+                config={
+                    'response_mime_type': 'application/json',
+                    'response_schema': schema
+                }
+            )
+        return retry_with_backoff(call, max_retries=self.max_retries)
+
+    def _cache_key(self, filepath: str, schema: type) -> str:
+        return extraction_key(file_sha256(filepath), generate_prompt(schema), GEMINI_MODEL, schema)
+
+    def _upload(self, filepath: str, reuse: bool = True, valid_for: float = 0.0):
+        """Uploads a PDF to the Gemini Files API, returning the file handle or None on failure.
+
+        With an upload registry, a handle uploaded earlier for the same content is
+        returned instead while it has not expired.
+
+        Args:
+            filepath: The PDF to upload.
+            reuse: Whether a registered handle may be reused; False forces a fresh upload.
+            valid_for: Seconds a reused handle must remain valid for, e.g. while a batch job waits to run.
+        """
+        content_hash = file_sha256(filepath) if self.upload_registry else None
+        if content_hash and reuse:
+            entry = self.upload_registry.get(content_hash, valid_for=valid_for)
+            if entry is not None:
+                self.logger.info(f"Reusing uploaded file for {os.path.basename(filepath)}")
+                return types.File(name=entry["name"], uri=entry["uri"], mime_type=entry["mime_type"])
+
+        try:
+            with self._upload_slots:
+                self.logger.info(f"Uploading file: {os.path.basename(filepath)}")
+                uploaded = retry_with_backoff(lambda: self.client.files.upload(file=filepath),
+                                              max_retries=self.max_retries)
+        except Exception as e:
+            self.logger.info(f"Exception in file upload: {e}")
+            if content_hash:
+                self.upload_registry.invalidate(content_hash)
+            return None
+
+        if content_hash:
+            self.upload_registry.put(content_hash, uploaded.name, uploaded.uri, uploaded.mime_type,
+                                     _expiry_time(uploaded))
+        return uploaded
+
+    def _generate_uploaded(self, prompt: str, paths: List[str], uploaded: list, schema: type):
+        """_generate on uploaded files. If the API rejects a reused handle, uploads the files again and retries once."""
+        try:
+            return self._generate(prompt, uploaded, schema)
+        except Exception as e:
+            if not self.upload_registry or get_status_code(e) not in STALE_UPLOAD_STATUS_CODES:
+                raise
+            self.logger.info(f"Uploaded file no longer available ({e}); uploading again")
+        uploaded = self._upload_paths(paths, reuse=False)
+        if uploaded is None:
+            raise RuntimeError(f"Re-upload failed for {', '.join(os.path.basename(p) for p in paths)}")
+        return self._generate(prompt, uploaded, schema)
+
+    def _combined_prompt(self, resume_path: Optional[str], project_paths: List[str]) -> str:
+        return generate_combined_prompt(Candidate, "projects", Project, resume_path is not None, len(project_paths))
+
+    def _combined_cache_key(self, resume_path: Optional[str], project_paths: List[str]) -> str:
+        hashes = [file_sha256(resume_path) if resume_path else ""] + [file_sha256(path) for path in project_paths]
+        content_hash = hashlib.sha256("\0".join(hashes).encode('utf-8')).hexdigest()
+        return extraction_key(content_hash, self._combined_prompt(resume_path, project_paths), GEMINI_MODEL, Candidate)
+
+    def _upload_all(self, resume_path: Optional[str], project_paths: List[str]) -> Optional[list]:
+        """Uploads a candidate's resume and project PDFs, in prompt order; None if any upload fails."""
+        return self._upload_paths(([resume_path] if resume_path else []) + project_paths)
+
+    def _upload_paths(self, paths: List[str], reuse: bool = True, valid_for: float = 0.0) -> Optional[list]:
+        """Uploads PDFs concurrently (up to upload_concurrency at once), in order; None if any upload fails."""
+        if len(paths) > 1 and self.upload_concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(len(paths), self.upload_concurrency),
+                                    thread_name_prefix="upload") as executor:
+                uploaded = list(executor.map(lambda path: self._upload(path, reuse, valid_for), paths))
         else:
+            uploaded = [self._upload(path, reuse, valid_for) for path in paths]
+        return None if any(uploaded_file is None for uploaded_file in uploaded) else uploaded
+
+    @staticmethod
+    def _split_combined(data: dict) -> tuple:
+        """Splits a combined extraction into (candidate_data, projects), as _write_portfolio expects."""
+        projects = data.pop("projects", None) or []
+        return data, [project for project in projects if isinstance(project, dict)]
+
+    def _extract_combined(self, resume_path: Optional[str], project_paths: List[str]) -> Optional[dict]:
+        """Extracts a candidate and all of their projects with a single generate_content call."""
+        cache_key = None
+        source = os.path.dirname(resume_path or project_paths[0])
+        if self.cache:
+            cache_key = self._combined_cache_key(resume_path, project_paths)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.info(f"Cache hit for {source}")
+                return cached
+
+        uploaded = self._upload_all(resume_path, project_paths)
+        if uploaded is None:
+            return None
+        try:
+            paths = ([resume_path] if resume_path else []) + project_paths
+            response = self._generate_uploaded(self._combined_prompt(resume_path, project_paths), paths, uploaded,
+                                               Candidate)
+            data = json.loads(response.text)
+        except Exception as e:
+            self.logger.info(f"Error processing portfolio {source}: {e}")
+            return None
+
+        if cache_key:
+            self.cache.put(cache_key, data, source=source)
+        return data
+
+    def _extract(self, filepath: str, schema: type) -> Optional[dict]:
+        """Upload a PDF and extract structured data for the given schema from it."""
+        cache_key = None
+        if self.cache:
+            cache_key = self._cache_key(filepath, schema)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.info(f"Cache hit for {os.path.basename(filepath)}")
+                return cached
+
+        uploaded_file = self._upload(filepath)
+        if uploaded_file is None:
+            return None
+
+        try:
+            response = self._generate_uploaded(generate_prompt(schema), [filepath], [uploaded_file], schema)
+            data = json.loads(response.text)
+        except Exception as e:
+            self.logger.info(f"Error processing {schema.__name__.lower()} file {filepath}: {e}")
+            return None
+
+        if cache_key:
+            self.cache.put(cache_key, data, source=filepath)
+        return data
+
+    def extract_text(self, text: str, schema: type, source: str = "", prompt: Optional[str] = None) -> Optional[dict]:
+        """Extract structured data for the given schema from already-fetched text, e.g. a web page.
+
+        Args:
+            prompt: Extraction prompt; generate_prompt(schema) if omitted.
+        """
+        prompt = prompt or generate_prompt(schema)
+        cache_key = None
+        if self.cache:
+            content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            cache_key = extraction_key(content_hash, prompt, GEMINI_MODEL, schema)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.info(f"Cache hit for {source}")
+                return cached
+
+        try:
+            response = self._generate(prompt, text, schema)
+            data = json.loads(response.text)
+        except Exception as e:
+            self.logger.info(f"Error processing {schema.__name__.lower()} from {source}: {e}")
+            return None
+
+        if cache_key:
+            self.cache.put(cache_key, data, source=source)
+        return data
+
+    def create_portfolio_from_page(self, name: str, url: str, text: str) -> Optional[dict]:
+        """Builds and writes a structured portfolio from the text of a candidate's portfolio site.
+
+        The candidate and the projects on the page are extracted in one call. The
+        name given by the recruiter overrides the extracted one, so the portfolio can
+        be matched back to their shortlist.
+
+        Raises:
+            PortfolioExistsError: A portfolio for this name already exists from another source, such as
+                their PDFs; it is left alone rather than overwritten.
+        """
+        existing_path = os.path.join(self.output_dir, portfolio_filename(name))
+        if os.path.exists(existing_path):
+            existing = load_candidate_data(existing_path) or {}
+            if existing.get("portfolio") != url:
+                raise PortfolioExistsError(f"{name} is already onboarded from {existing.get('portfolio') or 'PDFs'}")
+
+        prompt = generate_combined_prompt(Candidate, "projects", Project, True, None)
+        data = self.extract_text(text, Candidate, source=url, prompt=prompt)
+        if data is None:
+            return None
+        candidate_data, projects = self._split_combined(dict(data))
+        candidate_data["name"] = name
+        candidate_data["portfolio"] = url
+        candidate_data["projects"] = projects
+        self._save_candidate(candidate_data)
+        return candidate_data
+
+    def _save_candidate(self, candidate_data: dict) -> None:
+        """Writes a finished candidate record to the YAML output and/or the catalog."""
+        if self.write_yaml:
+            write_json_to_yaml(candidate_data, self.output_dir)
+        if self.catalog:
+            self.catalog.append(candidate_data)
+
+    def _write_portfolio(self, input_dir: str, resume_path: Optional[str], candidate_data: Optional[dict],
+                         projects: list) -> None:
+        """Combine candidate data and projects and write them to the output directory."""
+        if not resume_path:
             # Get candidate name from directory path
-            candidate_name = os.path.basename(self.input_dir)
+            candidate_name = os.path.basename(input_dir)
             self.logger.warning(f"No resume found for candidate: {candidate_name}")
             self.missing_resumes.append(candidate_name)
 
-        # Process all project files
-        projects = []
-        for project_file in project_files:
-            try:
-                prompt = generate_prompt(Project)
-                response = self.client.models.generate_content(
-                    model='gemini-2.0-flash',
-                    contents=[prompt, project_file],
-                    config={
-                        'response_mime_type': 'application/json',
-                        'response_schema': Project
-                    }
-                )
-                parsed_response = json.loads(response.text)
-                projects.append(parsed_response)
-            except Exception as e:
-                self.logger.info(f"Error processing project file: {e}")
-                continue
+        candidate_data = candidate_data or {}
+        candidate_data["projects"] = [project for project in projects if project is not None]
+
+        self._save_candidate(candidate_data)
 
-        # Combine candidate data and projects
-        candidate_data["projects"] = projects  # Add projects to candidate
+    def create_structured_portfolio(self, input_dir: str):
+        """Process all portfolio PDFs in the input directory."""
+        self.input_dir = input_dir  
+
+        files = self._collect_files(input_dir)
+        if files is None:
+            return
+        resume_path, project_paths = files
+        if self.extraction_mode != "per_file":
+            data = self._extract_combined(resume_path, project_paths) if resume_path or project_paths else None
+            if data is None:
+                self.logger.warning(f"No portfolio extracted from {input_dir}")
+                return
+            self._write_portfolio(input_dir, resume_path, *self._split_combined(dict(data)))
+            return
 
-        write_json_to_yaml(candidate_data, self.output_dir)
+        # Process resume first if available
+        candidate_data = self._extract(resume_path, Candidate) if resume_path else None
+        projects = [self._extract(path, Project) for path in project_paths]
+
+        self._write_portfolio(input_dir, resume_path, candidate_data, projects)
 
     def _get_portfolios(self) -> list:
         """Helper function to get all portfolio subdirectories."""
@@ -152,6 +396,120 @@ class OnboardPortfolios:
 
         return portfolio_dirs
 
+    def _create_structured_portfolios_concurrently(self, portfolio_dirs: list):
+        """Extract every file of every portfolio on a bounded thread pool.
+
+        All uploads and generate_content calls across directories are submitted as
+        independent tasks, so a slow file never stalls the rest of its directory.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="onboard") as executor:
+            if self.extraction_mode != "per_file":
+                list(executor.map(self.create_structured_portfolio, portfolio_dirs))
+                return
+            pending = []
+            for portfolio_dir in portfolio_dirs:
+                files = self._collect_files(portfolio_dir)
+                if files is None:
+                    continue
+                resume_path, project_paths = files
+                resume_future = executor.submit(self._extract, resume_path, Candidate) if resume_path else None
+                project_futures = [executor.submit(self._extract, path, Project) for path in project_paths]
+                pending.append((portfolio_dir, resume_path, resume_future, project_futures))
+
+            for portfolio_dir, resume_path, resume_future, project_futures in pending:
+                candidate_data = resume_future.result() if resume_future else None
+                projects = [future.result() for future in project_futures]
+                self._write_portfolio(portfolio_dir, resume_path, candidate_data, projects)
+                self.logger.info(f"Finished portfolio directory: {portfolio_dir}")
+
+    def _create_structured_portfolios_batch(self, portfolio_dirs: list):
+        """Extracts every portfolio through Gemini batch jobs, one combined request per candidate.
+
+        Cached candidates are written straight away. The rest have their files
+        uploaded (concurrently), are submitted in jobs of BATCH_MAX_REQUESTS, and
+        are written as each job finishes.
+        """
+        pending = []  # (portfolio_dir, resume_path, project_paths, cache_key)
+        for portfolio_dir in portfolio_dirs:
+            files = self._collect_files(portfolio_dir)
+            if files is None or not (files[0] or files[1]):
+                continue
+            resume_path, project_paths = files
+            cache_key = self._combined_cache_key(resume_path, project_paths) if self.cache else None
+            cached = self.cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                self._write_portfolio(portfolio_dir, resume_path, *self._split_combined(dict(cached)))
+            else:
+                pending.append((portfolio_dir, resume_path, project_paths, cache_key))
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="onboard") as executor:
+            # Files are read when the job runs, which may be up to BATCH_TIMEOUT after submission
+            uploads = list(executor.map(
+                lambda item: self._upload_paths(([item[1]] if item[1] else []) + item[2], valid_for=BATCH_TIMEOUT),
+                pending
+            ))
+
+        requests = []
+        for item, uploaded in zip(pending, uploads):
+            if uploaded is None:
+                self.logger.warning(f"Skipping {item[0]}: upload failed")
+                continue
+            contents = [types.Part.from_text(text=self._combined_prompt(item[1], item[2]))]
+            contents += [types.Part.from_uri(file_uri=f.uri, mime_type=f.mime_type) for f in uploaded]
+            requests.append((item, {
+                'contents': [{'role': 'user', 'parts': contents}],
+                'config': {'response_mime_type': 'application/json', 'response_schema': Candidate},
+            }))
+
+        for start in range(0, len(requests), BATCH_MAX_REQUESTS):
+            chunk = requests[start:start + BATCH_MAX_REQUESTS]
+            responses = self._run_batch([request for _, request in chunk])
+            for (item, _), response in zip(chunk, responses):
+                portfolio_dir, resume_path, project_paths, cache_key = item
+                try:
+                    data = json.loads(response.text) if response is not None else None
+                except (json.JSONDecodeError, TypeError, ValueError) as e:
+                    self.logger.info(f"Error processing portfolio {portfolio_dir}: {e}")
+                    data = None
+                if data is None:
+                    self.logger.warning(f"No portfolio extracted from {portfolio_dir}")
+                    continue
+                if cache_key:
+                    self.cache.put(cache_key, data, source=portfolio_dir)
+                self._write_portfolio(portfolio_dir, resume_path, *self._split_combined(dict(data)))
+
+    def _run_batch(self, requests: list) -> list:
+        """Submits inline requests as one batch job and polls it until done.
+
+        Returns:
+            One GenerateContentResponse per request, in order, or None for those that failed.
+        """
+        job = retry_with_backoff(
+            lambda: self.client.batches.create(model=GEMINI_MODEL, src=requests,
+                                               config={'display_name': f"onboard-{int(time.time())}"}),
+            max_retries=self.max_retries
+        )
+        self.logger.info(f"Submitted batch job {job.name} with {len(requests)} candidates")
+        deadline = time.monotonic() + BATCH_TIMEOUT
+        while _state_name(job.state) not in BATCH_DONE_STATES:
+            if time.monotonic() > deadline:
+                self.logger.error(f"Batch job {job.name} did not finish within {BATCH_TIMEOUT:g}s")
+                return [None] * len(requests)
+            time.sleep(self.batch_poll_interval)
+            job = retry_with_backoff(lambda: self.client.batches.get(name=job.name), max_retries=self.max_retries)
+
+        state = _state_name(job.state)
+        inlined = getattr(job.dest, "inlined_responses", None) or []
+        if state != "JOB_STATE_SUCCEEDED" or len(inlined) != len(requests):
+            self.logger.error(f"Batch job {job.name} ended in {state} with {len(inlined)}/{len(requests)} responses")
+            if state != "JOB_STATE_SUCCEEDED":
+                return [None] * len(requests)
+        self.logger.info(f"Batch job {job.name} finished")
+        responses = [entry.response if not entry.error else None for entry in inlined]
+        return responses + [None] * (len(requests) - len(responses))
+
     def create_structured_portfolios(self):
         """Creates structured portfolios for all subdirectories in the input root directory."""
         portfolio_dirs = self._get_portfolios()
@@ -159,9 +517,16 @@ class OnboardPortfolios:
             self.logger.warning(f"No portfolio directories found in '{self.input_root_dir}'.")
             return
 
-        for portfolio_dir in portfolio_dirs:
-            self.logger.info(f"Processing portfolio directory: {portfolio_dir}")
-            self.create_structured_portfolio(portfolio_dir)
+        if self.extraction_mode == "batch":
+            self.logger.info(f"Processing {len(portfolio_dirs)} portfolios as batch jobs")
+            self._create_structured_portfolios_batch(portfolio_dirs)
+        elif self.concurrency > 1:
+            self.logger.info(f"Processing {len(portfolio_dirs)} portfolios with {self.concurrency} workers")
+            self._create_structured_portfolios_concurrently(portfolio_dirs)
+        else:
+            for portfolio_dir in portfolio_dirs:
+                self.logger.info(f"Processing portfolio directory: {portfolio_dir}")
+                self.create_structured_portfolio(portfolio_dir)
 
         # Print summary of missing resumes
         if self.missing_resumes:
@@ -169,7 +534,38 @@ class OnboardPortfolios:
             for candidate in self.missing_resumes:
                 self.logger.warning(f"- {candidate}")
 
+        if self.cache:
+            self.cache.log_stats()
+
+    def prune_cache(self) -> int:
+        """Removes cache entries that no current portfolio PDF, prompt or model maps to."""
+        if not self.cache:
+            return 0
+        keep_keys = set()
+        for portfolio_dir in self._get_portfolios():
+            files = self._collect_files(portfolio_dir)
+            if files is None:
+                continue
+            resume_path, project_paths = files
+            if resume_path:
+                keep_keys.add(self._cache_key(resume_path, Candidate))
+            keep_keys.update(self._cache_key(path, Project) for path in project_paths)
+            if resume_path or project_paths:
+                keep_keys.add(self._combined_cache_key(resume_path, project_paths))
+        return self.cache.prune(keep_keys)
+
+
+def _expiry_time(uploaded) -> float:
+    """Unix time at which an uploaded file is deleted by Gemini, assuming the usual TTL if not reported."""
+    expiration_time = getattr(uploaded, "expiration_time", None)
+    return expiration_time.timestamp() if expiration_time else time.time() + UPLOAD_TTL
+
+
+def _state_name(state) -> str:
+    """Name of a batch job state, whether the client returns an enum or a string."""
+    return getattr(state, "name", None) or str(state)
+
 
 if __name__ == "__main__":
     onboarder = OnboardPortfolios("data/input/raw", "data/output/portfolio")  # Pass input root and output
-    onboarder.create_structured_portfolios()
\ No newline at end of file
+    onboarder.create_structured_portfolios()
@@ -0,0 +1,273 @@
+import argparse
+import json
+import logging
+import os
+import random
+from math import log2
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import yaml
+
+from src.common.utility import candidate_key, portfolio_filename
+from src.data_classes.candidate import Candidate, Education, Experience
+from src.data_classes.project import Project
+
+logger = logging.getLogger("ingest.synthetic")
+
+DEFAULT_SEED = 42
+DEFAULT_JOB_COUNT = 50
+PORTFOLIO_SUBDIR = "portfolio"
+JOBS_FILENAME = "job_descriptions.jsonl"  # One job description per line, with its graded relevance labels
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)  # The C dumper is ~10x faster at 100k files
+
+FIRST_NAMES = [
+    "Anya", "Ben", "Chloe", "David", "Emily", "Farah", "Gabriel", "Hana", "Isaac", "Julia", "Kofi", "Lena", "Mateo",
+    "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Samuel", "Tara", "Umar", "Valeria", "Wei", "Ximena", "Yusuf", "Zoe",
+    "Aisha", "Bruno", "Carmen", "Diego", "Elif", "Felix", "Grace", "Hugo", "Ines", "Jonas", "Keiko", "Liam", "Maya",
+    "Noah", "Olivia", "Pavel", "Rahul", "Sofia", "Tomas", "Uma", "Victor", "Wren", "Yara", "Zain",
+]
+LAST_NAMES = [
+    "Sharma", "Carter", "Davis", "Lee", "Watson", "Ahmed", "Silva", "Tanaka", "Cohen", "Novak", "Mensah", "Schmidt",
+    "Garcia", "Haddad", "Khan", "Patel", "Murphy", "Rossi", "Okafor", "Nguyen", "Ali", "Moreno", "Zhang", "Lopez",
+    "Demir", "Brown", "Yilmaz", "Costa", "Fischer", "Kowalski", "Andersen", "Ibrahim", "Santos", "Kim", "Martin",
+    "Dubois", "Sato", "Walker", "Ortiz", "Petrov", "Gupta", "Hughes", "Larsen", "Mendes", "Reyes", "Park", "Wright",
+    "Bauer", "Chen", "Evans",
+]
+
+# Weights follow a rough power law: a few tools are near-universal in UX, most are niche
+TOOLS = {
+    "Figma": 60, "Miro": 22, "Sketch": 18, "Adobe XD": 16, "Jira": 14, "Adobe Illustrator": 12,
+    "Adobe Photoshop": 12, "FigJam": 10, "Notion": 9, "Confluence": 8, "InVision": 7, "Maze": 6, "Framer": 6,
+    "Principle": 4, "ProtoPie": 4, "Axure RP": 4, "Dovetail": 4, "UserTesting": 4, "Hotjar": 3, "Webflow": 3,
+    "Zeplin": 3, "Balsamiq": 3, "Optimal Workshop": 2, "Lookback": 2, "After Effects": 2, "Blender": 1,
+}
+SKILLS = {
+    "UX Design": 40, "UI Design": 30, "User Research": 28, "Prototyping": 26, "Interaction Design": 20,
+    "Wireframing": 20, "Usability Testing": 18, "Information Architecture": 14, "Visual Design": 14,
+    "Design Systems": 12, "Accessibility": 10, "Service Design": 6, "Motion Design": 5, "Content Design": 5,
+    "Design Sprints": 5, "Data Visualization": 4, "Voice Interfaces": 2,
+}
+ROLES = {"UX Designer": 30, "Product Designer": 30, "UX/UI Designer": 15, "Lead UX Designer": 8,
+         "UX Researcher": 8, "Interaction Designer": 5, "Senior Product Designer": 4}
+# How often each process step shows up in a case study; wireframes and flows are nearly always there
+PROCESS_RATES = {
+    "User / customer problem": 0.6, "User / customers needs": 0.45, "User / customer pain points": 0.4,
+    "User / customer journey mapping": 0.3, "User flows": 0.75, "Wireframes": 0.85, "User Testing": 0.5,
+    "Iterations": 0.5, "Prototypes": 0.7, "Outcome": 0.35,
+}
+OUTCOMES = {"Website": 40, "Mobile App": 30, "Web app": 35, "Devices": 4, "Other": 5}
+DOMAINS = {
+    "fintech": ("budgeting app", "checkout flow", "loan application"),
+    "healthcare": ("patient portal", "appointment booking", "telehealth visit"),
+    "e-commerce": ("product search", "cart and checkout", "returns process"),
+    "education": ("course catalog", "learning dashboard", "assignment submission"),
+    "travel": ("flight booking", "hotel search", "itinerary planner"),
+    "logistics": ("shipment tracking", "driver dispatch", "warehouse scanning"),
+    "media": ("video player", "content discovery", "subscription signup"),
+    "saas": ("admin console", "onboarding wizard", "analytics dashboard"),
+}
+PROBLEMS = ("users abandoned the {feature} halfway through", "support tickets about the {feature} kept rising",
+            "the {feature} was confusing for first-time users", "the {feature} failed accessibility audits",
+            "engagement with the {feature} had dropped for a year")
+SOLUTIONS = ("a simplified {feature} with clearer information architecture",
+             "a redesigned {feature} built on a new design system",
+             "a guided {feature} with progressive disclosure", "an accessible {feature} validated with user testing")
+COMPANIES = ("Acme Corp", "Globex", "Initech", "Umbrella Health", "Stark Pay", "Wayne Logistics", "Hooli",
+             "Vandelay Travel", "Soylent Media", "Pied Piper")
+DEGREES = ("B.A. Graphic Design", "B.S. Human-Computer Interaction", "M.S. Human-Computer Interaction",
+           "B.A. Psychology", "B.F.A. Interaction Design", "M.Des. Interaction Design")
+INSTITUTIONS = ("Carnegie Mellon University", "University of Washington", "Parsons School of Design",
+                "Georgia Tech", "RISD", "University College London", "TU Delft")
+
+
+def _allowed_values(cls, name: str) -> List[str]:
+    return next(f.metadata["allowed_values"] for f in fields(cls) if f.name == name)
+
+
+def _weighted_sample(rng: random.Random, weights: Dict[str, float], k: int) -> List[str]:
+    """k distinct values, each drawn with probability proportional to its weight."""
+    # Efraimidis-Spirakis: keep the k largest u^(1/w)
+    keyed = sorted(weights, key=lambda value: rng.random() ** (1.0 / weights[value]), reverse=True)
+    return keyed[:k]
+
+
+@dataclass
+class JobDescription:
+    id: str
+    text: str
+    domain: str
+    outcome: str
+    tools: List[str]
+    processes: List[str]
+    relevant: Dict[str, int] = field(default_factory=dict)  # Candidate key -> grade (2 strong, 1 partial)
+
+
+def _grade(profile: Tuple[set, set], job: JobDescription) -> int:
+    """Relevance of a candidate to a job.
+
+    2: a project in the job's domain with its outcome, and every required tool.
+    1: the project but not all the tools. 0: no such project; tools alone are too common to count.
+    """
+    tools, domain_outcomes = profile
+    if (job.domain, job.outcome) not in domain_outcomes:
+        return 0
+    return 2 if all(tool in tools for tool in job.tools) else 1
+
+
+class SyntheticCorpus:
+    """Seeded generator of Candidate portfolios and labelled job descriptions.
+
+    The same seed always yields the same candidates and jobs, so corpora of any
+    size can be regenerated instead of stored.
+    """
+
+    def __init__(self, seed: int = DEFAULT_SEED):
+        self.seed = seed
+        # Draw from the dataclass's allowed values, so the corpus can't drift from the extraction schema
+        self.process_rates = {step: PROCESS_RATES.get(step, 0.3) for step in _allowed_values(Project, "process")}
+        self.outcomes = {outcome: OUTCOMES.get(outcome, 5) for outcome in _allowed_values(Project, "outcome")}
+
+    def _project(self, rng: random.Random, domain: str, tools: List[str]) -> Project:
+        feature = rng.choice(DOMAINS[domain])
+        outcome = _weighted_sample(rng, self.outcomes, 1 if rng.random() < 0.85 else 2)
+        project_tools = rng.sample(tools, min(len(tools), rng.randint(1, 3)))
+        return Project(
+            name=f"{feature.title()} Redesign",
+            role=_weighted_sample(rng, ROLES, 1)[0],
+            problem_description=f"In a {domain} product, {rng.choice(PROBLEMS).format(feature=feature)}.",
+            solution_description=f"Designed {rng.choice(SOLUTIONS).format(feature=feature)}.",
+            process=[step for step, rate in self.process_rates.items() if rng.random() < rate] or ["Wireframes"],
+            outcome=outcome,
+            software_or_tools_used=project_tools,
+        )
+
+    def candidates(self, count: int) -> Iterator[Candidate]:
+        """Yields count candidates with unique names."""
+        for candidate, _ in self._candidates(count):
+            yield candidate
+
+    def _candidates(self, count: int) -> Iterator[Tuple[Candidate, set]]:
+        """Yields each candidate with the (domain, outcome) pairs of its projects, which the labels need."""
+        rng = random.Random(self.seed)
+        seen: Dict[str, int] = {}
+        for _ in range(count):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            seen[name] = seen.get(name, 0) + 1
+            if seen[name] > 1:
+                name = f"{name} {seen[name]}"  # Keeps candidate keys unique at any corpus size
+            slug = name.lower().replace(" ", "")
+            tools = _weighted_sample(rng, TOOLS, rng.randint(3, 8))
+            domains = rng.sample(list(DOMAINS), rng.randint(1, 3))
+            project_domains = [rng.choice(domains) for _ in range(min(5, 1 + int(rng.expovariate(0.6))))]
+            projects = [self._project(rng, domain, tools) for domain in project_domains]
+            experience = [
+                Experience(company=rng.choice(COMPANIES), title=_weighted_sample(rng, ROLES, 1)[0],
+                           location="Remote", start_date=f"{2024 - 2 * (i + 1)}-0{rng.randint(1, 9)}",
+                           end_date="Present" if i == 0 else f"{2024 - 2 * i}-0{rng.randint(1, 9)}",
+                           description=f"Designed {rng.choice(DOMAINS[rng.choice(domains)])} experiences.")
+                for i in range(rng.randint(1, 3))
+            ]
+            candidate = Candidate(
+                name=name,
+                email=f"{slug}@example.com",
+                phone=f"+1-555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+                linkedin=f"https://www.linkedin.com/in/{slug}/",
+                github="",
+                portfolio=f"https://{slug}.example.com",
+                skills=_weighted_sample(rng, SKILLS, rng.randint(3, 7)),
+                tools=tools,
+                experience=experience,
+                education=[Education(degree=rng.choice(DEGREES), institution=rng.choice(INSTITUTIONS),
+                                     graduation_year=rng.randint(2008, 2023), gpa=None)],
+                projects=projects,
+            )
+            yield candidate, {(domain, outcome) for domain, project in zip(project_domains, projects)
+                              for outcome in project.outcome}
+
+    def job_descriptions(self, count: int) -> List[JobDescription]:
+        """Jobs drawn from the same distributions, so common requirements match many candidates."""
+        rng = random.Random(self.seed + 1)
+        jobs = []
+        for i in range(count):
+            domain = rng.choice(list(DOMAINS))
+            outcome = _weighted_sample(rng, {k: v for k, v in self.outcomes.items() if k != "Other"}, 1)[0]
+            tools = _weighted_sample(rng, TOOLS, rng.randint(1, 2))
+            processes = rng.sample([step for step in self.process_rates if step != "Outcome"], 3)
+            text = (f"We're hiring a {_weighted_sample(rng, ROLES, 1)[0]} to work on our {domain} "
+                    f"{outcome.lower()}, starting with the {rng.choice(DOMAINS[domain])}. "
+                    f"You'll own {', '.join(p.lower() for p in processes)}. "
+                    f"Must be fluent in {' and '.join(tools)}.")
+            jobs.append(JobDescription(id=f"jd-{i:04d}", text=text, domain=domain, outcome=outcome,
+                                       tools=tools, processes=processes))
+        return jobs
+
+    def generate(self, output_dir: str, candidate_count: int,
+                 job_count: int = DEFAULT_JOB_COUNT) -> Tuple[int, List[JobDescription]]:
+        """Writes candidate YAML files and labelled job descriptions under output_dir.
+
+        Portfolios go to output_dir/portfolio, in the layout ingest_data reads, and the
+        jobs with their relevance labels to output_dir/job_descriptions.jsonl.
+
+        Returns:
+            The number of candidates written and the labelled jobs.
+        """
+        portfolio_dir = os.path.join(output_dir, PORTFOLIO_SUBDIR)
+        os.makedirs(portfolio_dir, exist_ok=True)
+        jobs = self.job_descriptions(job_count)
+        written = 0
+        for candidate, domain_outcomes in self._candidates(candidate_count):
+            key = candidate_key(candidate.name)
+            tools = set(candidate.tools)
+            for project in candidate.projects:
+                tools.update(project.software_or_tools_used)
+            for job in jobs:
+                grade = _grade((tools, domain_outcomes), job)
+                if grade:
+                    job.relevant[key] = grade
+            with open(os.path.join(portfolio_dir, portfolio_filename(candidate.name)), 'w', encoding='utf-8') as f:
+                yaml.dump(asdict(candidate), f, Dumper=YAML_DUMPER, indent=2, sort_keys=False)
+            written += 1
+        with open(os.path.join(output_dir, JOBS_FILENAME), 'w', encoding='utf-8') as f:
+            for job in jobs:
+                f.write(json.dumps(asdict(job)) + "\n")
+        logger.info(f"Wrote {written} candidates and {len(jobs)} job descriptions to {output_dir}")
+        return written, jobs
+
+
+def load_job_descriptions(path: str) -> List[JobDescription]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [JobDescription(**json.loads(line)) for line in f if line.strip()]
+
+
+def recall_at_k(ranked: Sequence[str], relevant: Dict[str, int], k: int) -> float:
+    """Share of the strongly relevant (grade 2) candidates found in the top k, or of all relevant ones if none are."""
+    targets = {key for key, grade in relevant.items() if grade == 2} or set(relevant)
+    if not targets:
+        return 0.0
+    return len(targets.intersection(ranked[:k])) / min(len(targets), k)
+
+
+def ndcg_at_k(ranked: Sequence[str], relevant: Dict[str, int], k: int) -> float:
+    """Normalized discounted cumulative gain of a ranking of candidate keys, using the graded labels."""
+    dcg = sum((2 ** relevant.get(key, 0) - 1) / log2(rank + 2) for rank, key in enumerate(ranked[:k]))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2 ** grade - 1) / log2(rank + 2) for rank, grade in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic portfolio corpus with labelled job descriptions.')
+    parser.add_argument('--candidates', type=int, default=1000, help='Number of candidate YAML files (default: 1000)')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOB_COUNT,
+                        help=f'Number of labelled job descriptions (default: {DEFAULT_JOB_COUNT})')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f'Random seed (default: {DEFAULT_SEED})')
+    parser.add_argument('--output-dir', default='data/synthetic', help='Output directory (default: data/synthetic)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    SyntheticCorpus(args.seed).generate(args.output_dir, args.candidates, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
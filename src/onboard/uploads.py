@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger("ingest.uploads")
+
+DEFAULT_UPLOAD_REGISTRY = "data/cache/uploads.json"
+UPLOAD_TTL = 48 * 3600.0  # Gemini deletes uploaded files after 48 hours
+EXPIRY_MARGIN = 3600.0  # Handles this close to expiry are re-uploaded, so they can't lapse mid-extraction
+UPLOAD_CONCURRENCY = 4  # Simultaneous uploads across all workers
+
+
+class UploadRegistry:
+    """Persistent map of PDF content hash -> Gemini file handle (name, uri, mime type, expiry).
+
+    Lets unchanged PDFs reuse the file uploaded by an earlier run instead of being
+    uploaded again. The whole registry is one small JSON file, rewritten atomically
+    on every change.
+    """
+
+    def __init__(self, path: str = DEFAULT_UPLOAD_REGISTRY, margin: float = EXPIRY_MARGIN):
+        self.path = path
+        self.margin = margin
+        self.reused = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+        self.prune()
+
+    def get(self, content_hash: str, valid_for: float = 0.0, now: Optional[float] = None) -> Optional[dict]:
+        """Returns the handle for content_hash if it stays valid for valid_for plus margin more seconds."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is None or entry["expires_at"] - self.margin - valid_for <= now:
+                return None
+            self.reused += 1
+            return dict(entry)
+
+    def put(self, content_hash: str, name: str, uri: str, mime_type: str, expires_at: float) -> None:
+        with self._lock:
+            self._entries[content_hash] = {"name": name, "uri": uri, "mime_type": mime_type,
+                                           "expires_at": expires_at}
+            self._save()
+
+    def invalidate(self, content_hash: str) -> None:
+        """Forgets a handle the API no longer recognizes, e.g. a file deleted before its expiry."""
+        with self._lock:
+            if self._entries.pop(content_hash, None) is not None:
+                self._save()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drops expired handles. Returns how many were removed."""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry["expires_at"] <= now]
+            for key in expired:
+                del self._entries[key]
+            if expired:
+                self._save()
+                logger.info(f"Dropped {len(expired)} expired upload handles")
+        return len(expired)
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
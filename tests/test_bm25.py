@@ -0,0 +1,33 @@
+"""BM25 search, filtering and incremental updates."""
+import pytest
+
+from src.common.bm25 import BM25Index
+
+CHUNKS = [
+    ("a1", "Figma prototypes for a checkout redesign", {"document_id": "ann.yaml", "candidate_key": "AnnLee"}),
+    ("a2", "Usability testing with diary studies", {"document_id": "ann.yaml", "candidate_key": "AnnLee"}),
+    ("b1", "Design system in Sketch for a banking app", {"document_id": "bob.yaml", "candidate_key": "BobKim"}),
+    ("c1", "Figma design tokens and accessibility audits", {"document_id": "cy.yaml", "candidate_key": "CyDiaz"}),
+]
+
+
+def test_search_ranks_keyword_matches_and_applies_filters():
+    index = BM25Index.build(CHUNKS)
+    assert [chunk_id for chunk_id, _ in index.search("figma checkout", top_k=10)] == ["a1", "c1"]
+    assert index.search("figma", top_k=10, where={"candidate_key": {"$in": ["CyDiaz"]}})[0][0] == "c1"
+    assert [chunk_id for chunk_id, _ in index.search("figma", top_k=10, where={"candidate_key": "BobKim"})] == []
+
+
+def test_update_matches_a_rebuild(tmp_path):
+    new_chunk = ("b2", "Figma onboarding flows", {"document_id": "bob.yaml", "candidate_key": "BobKim"})
+    updated = BM25Index.build(CHUNKS).update(["bob.yaml"], [new_chunk])
+    rebuilt = BM25Index.build([chunk for chunk in CHUNKS if chunk[0] != "b1"] + [new_chunk])
+
+    updated.save(str(tmp_path / "bm25"))
+    loaded = BM25Index.load(str(tmp_path / "bm25"))
+    for query in ("figma", "banking sketch", "usability testing", "figma onboarding"):
+        expected = rebuilt.search(query, top_k=10)
+        for index in (updated, loaded):
+            results = index.search(query, top_k=10)
+            assert [chunk_id for chunk_id, _ in results] == [chunk_id for chunk_id, _ in expected]
+            assert [score for _, score in results] == pytest.approx([score for _, score in expected])
@@ -0,0 +1,86 @@
+"""Catalog reads and writes, including recovery from interrupted writers and compactions."""
+import os
+
+from src.common.catalog import Catalog, CatalogWriter, compact, index_path
+
+
+def _record(name: str, role: str = "UX designer") -> dict:
+    return {"name": name, "portfolio": None, "projects": [{"name": "Checkout", "role": role}]}
+
+
+def test_latest_record_wins_and_removals_hide_keys(tmp_path):
+    path = str(tmp_path / "catalog.jsonl")
+    with CatalogWriter(path) as writer:
+        writer.append(_record("Ann Lee"))
+        writer.append(_record("Bob Kim"))
+        writer.append(_record("Ann Lee", role="Lead designer"))
+        writer.remove("BobKim")
+    with Catalog(path) as catalog:
+        assert catalog.keys() == ["AnnLee"] and "BobKim" not in catalog
+        assert catalog.get("AnnLee")["projects"][0]["role"] == "Lead designer"
+
+
+def test_writer_indexes_records_a_crashed_writer_left_unindexed(tmp_path):
+    path = str(tmp_path / "catalog.jsonl")
+    with CatalogWriter(path) as writer:
+        writer.append(_record("Ann Lee"))
+        writer.append(_record("Bob Kim"))
+    with open(index_path(path), 'r+') as f:  # Crash after the data write, before the index write
+        first_line = f.readline()
+        f.truncate(len(first_line))
+
+    with CatalogWriter(path) as writer:
+        writer.append(_record("Cy Diaz"))
+    with open(index_path(path)) as f:
+        assert [line.split("\t")[0] for line in f] == ["AnnLee", "BobKim", "CyDiaz"]
+    with Catalog(path) as catalog:
+        assert sorted(catalog.keys()) == ["AnnLee", "BobKim", "CyDiaz"]
+
+
+def test_partial_last_record_is_discarded(tmp_path):
+    path = str(tmp_path / "catalog.jsonl")
+    with CatalogWriter(path) as writer:
+        writer.append(_record("Ann Lee"))
+    with open(path, 'ab') as f:
+        f.write(b'{"key":"BobKim","rec')
+    with Catalog(path) as catalog:
+        assert catalog.keys() == ["AnnLee"]
+    with CatalogWriter(path) as writer:
+        writer.append(_record("Cy Diaz"))
+    with Catalog(path) as catalog:
+        assert sorted(catalog.keys()) == ["AnnLee", "CyDiaz"]
+
+
+def test_mismatched_index_is_ignored_and_rebuilt(tmp_path):
+    path = str(tmp_path / "catalog.jsonl")
+    with CatalogWriter(path) as writer:
+        for name in ("Ann Lee", "Bob Kim", "Cy Diaz"):
+            writer.append(_record(name))
+        writer.remove("AnnLee")
+    with open(index_path(path), 'rb') as f:
+        old_index = f.read()
+    assert compact(path) == 2
+    with open(index_path(path), 'wb') as f:  # Compaction interrupted with the old index still in place
+        f.write(old_index)
+
+    with Catalog(path) as catalog:
+        assert sorted(catalog.keys()) == ["BobKim", "CyDiaz"]
+        assert catalog.get("CyDiaz")["name"] == "Cy Diaz"
+    CatalogWriter(path).close()
+    with open(index_path(path)) as f:
+        assert [line.split("\t")[0] for line in f] == ["BobKim", "CyDiaz"]
+
+
+def test_compact_drops_replaced_and_removed_records(tmp_path):
+    path = str(tmp_path / "catalog.jsonl")
+    with CatalogWriter(path) as writer:
+        for role in ("Intern", "Designer", "Lead designer"):
+            writer.append(_record("Ann Lee", role=role))
+        writer.append(_record("Bob Kim"))
+        writer.remove("BobKim")
+    size = os.path.getsize(path)
+    assert compact(path) == 1
+    assert os.path.getsize(path) < size
+    with Catalog(path) as catalog:
+        assert catalog.keys() == ["AnnLee"]
+        assert catalog.get("AnnLee")["projects"][0]["role"] == "Lead designer"
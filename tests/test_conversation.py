@@ -0,0 +1,60 @@
+"""Conversation expiry and the SQLite write-behind store."""
+import time
+
+from src.bot.conversation import SHORTLIST_TIMEOUT, ConversationManager, ConversationStore, WorkflowState
+
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "conversations.sqlite")
+    manager = ConversationManager(store=ConversationStore(path))
+    manager.start_conversation(1, user_id=10)
+    conversation = manager.start_conversation(2, user_id=20)
+    conversation.state = WorkflowState.AWAITING_CANDIDATE_LIST
+    conversation.candidates = {"JaneDoe": "https://jane.example"}
+    manager.start_conversation(3, user_id=30)
+    manager.end_conversation(3)
+    manager.flush()
+
+    restored = ConversationManager(store=ConversationStore(path)).active_conversations
+    assert sorted(restored) == [1, 2]
+    assert restored[1].user_id == 10 and restored[1].state == WorkflowState.AWAITING_START_CONFIRMATION
+    assert restored[2].state == WorkflowState.AWAITING_CANDIDATE_LIST
+    assert restored[2].candidates == {"JaneDoe": "https://jane.example"}
+    assert restored[2].last_active == conversation.last_active
+
+
+def test_expired_conversations_are_not_restored(tmp_path):
+    path = str(tmp_path / "conversations.sqlite")
+    manager = ConversationManager(store=ConversationStore(path))
+    manager.start_conversation(1, user_id=10).last_active = time.time() - 301
+    manager.start_conversation(2, user_id=20)
+    manager.flush()
+    assert sorted(ConversationManager(store=ConversationStore(path)).active_conversations) == [2]
+
+
+def test_shortlist_outlives_the_inactivity_timeout(tmp_path):
+    path = str(tmp_path / "conversations.sqlite")
+    manager = ConversationManager(store=ConversationStore(path))
+    conversation = manager.start_conversation(1, user_id=10)
+    conversation.candidates = {"JaneDoe": "https://jane.example"}
+    conversation.state = WorkflowState.COMPLETED
+    conversation.timeout = SHORTLIST_TIMEOUT
+    manager.start_conversation(2, user_id=20)
+    now = time.time()
+
+    assert manager.sweep(now + 600) == 1  # Only the conversation without a shortlist
+    manager.flush()
+    restored = ConversationManager(store=ConversationStore(path))
+    assert restored.active_conversations[1].candidates == {"JaneDoe": "https://jane.example"}
+    assert restored.sweep(now + SHORTLIST_TIMEOUT + 1) == 1
+    assert restored.get_conversation(1) is None
+
+
+def test_changes_are_not_tracked_without_a_store():
+    manager = ConversationManager()
+    for thread_id in range(100):
+        manager.start_conversation(thread_id, user_id=thread_id)
+        manager.get_conversation(thread_id)
+        manager.end_conversation(thread_id)
+    assert not manager.active_conversations
+    assert not manager._dirty and not manager._deleted
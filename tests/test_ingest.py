@@ -0,0 +1,70 @@
+"""Incremental ingest against a throwaway Chroma database, with offline embeddings."""
+import os
+
+import chromadb
+import yaml
+from llama_index.core import SimpleDirectoryReader, StorageContext, VectorStoreIndex
+from llama_index.vector_stores.chroma import ChromaVectorStore
+
+from benchmarks.fakes import HashEmbedding
+from src.onboard.ingest import COLLECTION_NAME, ingest_data, load_manifest, new_node_parser
+
+CANDIDATES = {
+    "jane_doe.yaml": {"name": "Jane Doe", "portfolio": "https://jane.example", "skills": ["Research"],
+                      "projects": [{"name": "Checkout redesign", "role": "Lead designer"}]},
+    "bob_kim.yaml": {"name": "Bob Kim", "portfolio": "https://bob.example", "skills": ["Prototyping"],
+                     "projects": [{"name": "Banking app", "role": "UX designer"}]},
+}
+
+
+def _write_portfolios(directory) -> None:
+    directory.mkdir(exist_ok=True)
+    for filename, data in CANDIDATES.items():
+        with open(directory / filename, 'w') as f:
+            yaml.safe_dump(data, f)
+
+
+def _collection_count(chroma_path: str) -> int:
+    return chromadb.PersistentClient(path=chroma_path).get_or_create_collection(COLLECTION_NAME).count()
+
+
+def _ingest(input_dir, chroma_path: str) -> dict:
+    return ingest_data(input_dir=str(input_dir), chroma_path=chroma_path, embed_model=HashEmbedding(dim=64),
+                       configure_globals=False)
+
+
+def test_incremental_ingest_only_embeds_changes(tmp_path):
+    input_dir, chroma_path = tmp_path / "portfolio", str(tmp_path / "chroma")
+    _write_portfolios(input_dir)
+
+    first = _ingest(input_dir, chroma_path)
+    assert first["changed_files"] == 2 and first["collection_chunks"] > 0
+    second = _ingest(input_dir, chroma_path)
+    assert second["changed_files"] == 0 and second["chunks"] == 0
+    assert second["collection_chunks"] == first["collection_chunks"]
+
+    os.remove(input_dir / "bob_kim.yaml")
+    third = _ingest(input_dir, chroma_path)
+    assert third["removed_files"] == 1
+    assert third["collection_chunks"] < first["collection_chunks"]
+    assert list(load_manifest(chroma_path)["files"]) == ["jane_doe.yaml"]
+
+
+def test_upgrading_a_baseline_collection_does_not_duplicate_chunks(tmp_path):
+    input_dir, chroma_path = tmp_path / "portfolio", str(tmp_path / "chroma")
+    _write_portfolios(input_dir)
+
+    # Ingest as it was before the manifest: random chunk ids and no record of which file they came from
+    collection = chromadb.PersistentClient(path=chroma_path).get_or_create_collection(COLLECTION_NAME)
+    storage_context = StorageContext.from_defaults(vector_store=ChromaVectorStore(chroma_collection=collection))
+    VectorStoreIndex.from_documents(SimpleDirectoryReader(input_dir=str(input_dir)).load_data(),
+                                    storage_context=storage_context, embed_model=HashEmbedding(dim=64),
+                                    transformations=[new_node_parser()])
+    baseline = _collection_count(chroma_path)
+    assert baseline > 0
+
+    upgraded = _ingest(input_dir, chroma_path)
+    assert upgraded["collection_chunks"] == baseline
+    assert _collection_count(chroma_path) == baseline
+    assert sorted(load_manifest(chroma_path)["files"]) == sorted(CANDIDATES)
+    assert _ingest(input_dir, chroma_path)["collection_chunks"] == baseline
@@ -0,0 +1,113 @@
+"""Shortlist onboarding against a local aiohttp server standing in for the portfolio sites."""
+import asyncio
+import os
+
+import yaml
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from benchmarks.fakes import FakeGeminiClient
+from src.onboard.fetch import FetchCache, PortfolioFetcher
+from src.onboard.pipeline import onboard_candidates
+from src.onboard.prepare import OnboardPortfolios
+
+PAGE = "<html><body><h1>{name}</h1><p>UX designer. Project: checkout redesign.</p></body></html>"
+
+
+class PortfolioSites:
+    """Serves /{name} with an ETag, answering 304 to a matching If-None-Match, and tracks concurrency."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.requests = 0
+        self.not_modified = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            name = request.match_info["name"]
+            etag = f'"{name}-v1"'
+            if request.headers.get("If-None-Match") == etag:
+                self.not_modified += 1
+                return web.Response(status=304, headers={"ETag": etag})
+            return web.Response(text=PAGE.format(name=name), content_type="text/html", headers={"ETag": etag})
+        finally:
+            self.in_flight -= 1
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/{name}", self.handle)
+        return app
+
+
+async def _with_server(sites: PortfolioSites, body):
+    server = TestServer(sites.app())
+    await server.start_server()
+    try:
+        return await body(server)
+    finally:
+        await server.close()
+
+
+def test_conditional_get_serves_cached_page_on_304(tmp_path):
+    sites = PortfolioSites()
+    cache = FetchCache(str(tmp_path / "fetch"))
+
+    async def body(server):
+        url = str(server.make_url("/jane"))
+        async with PortfolioFetcher(cache=cache) as fetcher:
+            first = await fetcher.fetch(url)
+            second = await fetcher.fetch(url)
+        return first, second
+
+    first, second = asyncio.run(_with_server(sites, body))
+    assert first.ok and not first.not_modified
+    assert second.ok and second.not_modified and second.status == 304
+    assert second.body == first.body
+    assert sites.not_modified == 1
+
+
+def test_per_host_connection_limit(tmp_path):
+    sites = PortfolioSites(delay=0.1)
+
+    async def body(server):
+        urls = [str(server.make_url(f"/candidate{i}")) for i in range(8)]
+        async with PortfolioFetcher(max_per_host=2) as fetcher:
+            return await fetcher.fetch_all(urls)
+
+    results = asyncio.run(_with_server(sites, body))
+    assert all(result.ok for result in results)
+    assert sites.requests == 8
+    assert sites.max_in_flight == 2
+
+
+def test_onboard_candidates_writes_portfolios_and_keeps_existing_ones(tmp_path):
+    sites = PortfolioSites()
+    output_dir = tmp_path / "portfolio"
+    output_dir.mkdir()
+    with open(output_dir / "bob_kim.yaml", 'w') as f:  # Onboarded earlier from PDFs
+        yaml.safe_dump({"name": "Bob Kim", "portfolio": None, "projects": []}, f)
+    client = FakeGeminiClient(upload_latency=0, generate_latency=0, per_document_latency=0)
+    onboarder = OnboardPortfolios(str(tmp_path), str(output_dir), concurrency=2, client=client)
+
+    async def body(server):
+        candidates = {"JaneDoe": str(server.make_url("/jane")), "BobKim": str(server.make_url("/bob")),
+                      "Missing": str(server.make_url("/missing/page"))}
+        async with PortfolioFetcher(cache=FetchCache(str(tmp_path / "fetch"))) as fetcher:
+            return await onboard_candidates(candidates, onboarder, fetcher)
+
+    summary = asyncio.run(_with_server(sites, body))
+    assert summary.total == 3 and summary.fetched == 2 and summary.extracted == 1
+    assert set(summary.failed) == {"BobKim", "Missing"}
+    assert client.calls["models.generate_content"] == 1  # Candidate and projects in one call
+    with open(output_dir / "jane_doe.yaml") as f:
+        jane = yaml.safe_load(f)
+    assert jane["name"] == "Jane Doe" and jane["portfolio"].endswith("/jane")
+    with open(output_dir / "bob_kim.yaml") as f:
+        assert yaml.safe_load(f)["portfolio"] is None
+    assert sorted(os.listdir(output_dir)) == ["bob_kim.yaml", "jane_doe.yaml"]